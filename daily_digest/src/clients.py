@@ -0,0 +1,280 @@
+"""Process-wide registry of shared, lazily-created clients.
+
+Firestore, the local post mirror and the Upstage (OpenAI-compatible)
+client are built on first use and then reused by every pipeline stage,
+so credentials and TLS connections are only set up once per process.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+from .config import get_config
+from .eval_cache import EvaluationCache
+from .firebase_reader import FirebaseReader
+from .llm_cache import LLMCache
+from .llm_client import AsyncLLMClient, LLMClient
+from .post_mirror import PostMirror
+from .rate_limiter import RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+from .topic_tracker import TopicTracker
+
+
+_lock = threading.Lock()
+_firebase_reader: Optional[FirebaseReader] = None
+_post_mirror: Optional[PostMirror] = None
+_http_client: Optional[httpx.Client] = None
+_llm_clients: Dict[str, LLMClient] = {}
+_async_http_clients: Dict[int, httpx.AsyncClient] = {}
+_async_llm_clients: Dict[Tuple[int, str], AsyncLLMClient] = {}
+_llm_cache: Optional[LLMCache] = None
+_evaluation_cache: Optional[EvaluationCache] = None
+_topic_tracker: Optional[TopicTracker] = None
+_rate_limiter: Optional[RateLimiter] = None
+_circuit_breaker: Optional[CircuitBreaker] = None
+_llm_cache_mode = "on"  # "on" | "refresh" | "off"
+
+
+def get_firebase_reader() -> FirebaseReader:
+    """Shared Firestore reader."""
+    global _firebase_reader
+    with _lock:
+        if _firebase_reader is None:
+            _firebase_reader = FirebaseReader()
+        return _firebase_reader
+
+
+def get_post_mirror() -> Optional[PostMirror]:
+    """Shared local post mirror, or None if POST_MIRROR_PATH is not set."""
+    global _post_mirror
+    config = get_config()
+    if not config.POST_MIRROR_PATH:
+        return None
+    with _lock:
+        if _post_mirror is None:
+            _post_mirror = PostMirror(config.POST_MIRROR_PATH)
+        return _post_mirror
+
+
+def get_http_client() -> httpx.Client:
+    """Shared keep-alive HTTP connection pool for LLM requests."""
+    global _http_client
+    config = get_config()
+    with _lock:
+        if _http_client is None:
+            _http_client = DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=config.LLM_HTTP_KEEPALIVE_SECONDS,
+                ),
+            )
+        return _http_client
+
+
+def configure_llm_cache(mode: str) -> None:
+    """Set the LLM cache mode before the first client is created.
+
+    Args:
+        mode: "on" (read + write), "refresh" (write only) or "off"
+    """
+    global _llm_cache_mode
+    if mode not in ("on", "refresh", "off"):
+        raise ValueError(f"Unknown LLM cache mode: {mode}")
+    with _lock:
+        _llm_cache_mode = mode
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Shared on-disk LLM response cache, or None if disabled."""
+    global _llm_cache
+    config = get_config()
+    if _llm_cache_mode == "off" or not config.LLM_CACHE_DIR:
+        return None
+    with _lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(
+                config.LLM_CACHE_DIR,
+                max_bytes=config.LLM_CACHE_MAX_MB * 1024 * 1024,
+                max_age_seconds=config.LLM_CACHE_MAX_AGE_DAYS * 24 * 3600,
+                read_enabled=_llm_cache_mode == "on",
+            )
+        return _llm_cache
+
+
+def get_evaluation_cache() -> Optional[EvaluationCache]:
+    """Shared cross-day verdict cache, or None if disabled.
+    
+    Follows the LLM cache mode (--no-cache / --refresh-cache).
+    """
+    global _evaluation_cache
+    config = get_config()
+    if _llm_cache_mode == "off" or not config.EVAL_CACHE_PATH:
+        return None
+    with _lock:
+        if _evaluation_cache is None:
+            _evaluation_cache = EvaluationCache(
+                config.EVAL_CACHE_PATH,
+                max_age_seconds=config.EVAL_CACHE_MAX_AGE_DAYS * 24 * 3600,
+                read_enabled=_llm_cache_mode == "on",
+            )
+        return _evaluation_cache
+
+
+def get_topic_tracker() -> Optional[TopicTracker]:
+    """Shared day-over-day topic store, or None if TOPIC_TRACKER_PATH is not set."""
+    global _topic_tracker
+    config = get_config()
+    if not config.TOPIC_TRACKER_PATH:
+        return None
+    with _lock:
+        if _topic_tracker is None:
+            _topic_tracker = TopicTracker(
+                config.TOPIC_TRACKER_PATH,
+                max_age_days=config.TOPIC_TRACKER_MAX_AGE_DAYS,
+                similarity=config.TOPIC_MATCH_SIMILARITY,
+            )
+        return _topic_tracker
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Shared LLM rate limiter (one budget for all models and threads)."""
+    global _rate_limiter
+    config = get_config()
+    with _lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                requests_per_sec=config.LLM_REQUESTS_PER_SEC,
+                tokens_per_min=config.LLM_TOKENS_PER_MIN,
+                burst_requests=config.LLM_BURST_REQUESTS,
+            )
+        return _rate_limiter
+
+
+def get_retry_policy() -> RetryPolicy:
+    """LLM retry/backoff settings from config."""
+    config = get_config()
+    return RetryPolicy(
+        max_attempts=config.LLM_RETRY_MAX_ATTEMPTS,
+        base_delay=config.LLM_RETRY_BASE_DELAY,
+        max_delay=config.LLM_RETRY_MAX_DELAY,
+        deadline=config.LLM_CALL_DEADLINE_SECONDS,
+        request_timeout=config.LLM_REQUEST_TIMEOUT_SECONDS,
+    )
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Shared LLM circuit breaker (one provider health state per process)."""
+    global _circuit_breaker
+    config = get_config()
+    with _lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker(
+                failure_threshold=config.LLM_BREAKER_FAILURES,
+                cooldown=config.LLM_BREAKER_COOLDOWN_SECONDS,
+            )
+        return _circuit_breaker
+
+
+def get_llm_client(model: Optional[str] = None) -> LLMClient:
+    """Shared LLM client for a model (default: Config.SOLAR_MODEL).
+
+    All clients share one HTTP connection pool, response cache, rate
+    limiter and circuit breaker.
+    """
+    key = model or get_config().SOLAR_MODEL
+    http_client = get_http_client()
+    cache = get_llm_cache()
+    rate_limiter = get_rate_limiter()
+    retry_policy = get_retry_policy()
+    breaker = get_circuit_breaker()
+    with _lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            client = LLMClient(
+                model_override=model,
+                http_client=http_client,
+                cache=cache,
+                rate_limiter=rate_limiter,
+                retry_policy=retry_policy,
+                breaker=breaker,
+            )
+            _llm_clients[key] = client
+        return client
+
+
+def get_async_llm_client(model: Optional[str] = None) -> AsyncLLMClient:
+    """Shared async LLM client for the running event loop.
+
+    Async connections belong to one event loop, so the connection pool
+    and clients are kept per loop; cache, rate limiter and circuit
+    breaker are shared process-wide. Must be called from inside a
+    running loop.
+    """
+    config = get_config()
+    loop_id = id(asyncio.get_running_loop())
+    key = (loop_id, model or config.SOLAR_MODEL)
+    cache = get_llm_cache()
+    rate_limiter = get_rate_limiter()
+    retry_policy = get_retry_policy()
+    breaker = get_circuit_breaker()
+    with _lock:
+        client = _async_llm_clients.get(key)
+        if client is None:
+            http_client = _async_http_clients.get(loop_id)
+            if http_client is None:
+                http_client = DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                        keepalive_expiry=config.LLM_HTTP_KEEPALIVE_SECONDS,
+                    ),
+                )
+                _async_http_clients[loop_id] = http_client
+            client = AsyncLLMClient(
+                model_override=model,
+                http_client=http_client,
+                cache=cache,
+                rate_limiter=rate_limiter,
+                retry_policy=retry_policy,
+                breaker=breaker,
+            )
+            _async_llm_clients[key] = client
+        return client
+
+
+async def close_async_clients() -> None:
+    """Close the running loop's async connection pool."""
+    loop_id = id(asyncio.get_running_loop())
+    with _lock:
+        http_client = _async_http_clients.pop(loop_id, None)
+        for key in [k for k in _async_llm_clients if k[0] == loop_id]:
+            del _async_llm_clients[key]
+    if http_client is not None:
+        await http_client.aclose()
+
+
+def close_clients() -> None:
+    """Close pooled connections and forget all clients (e.g. on shutdown)."""
+    global _firebase_reader, _post_mirror, _http_client, _llm_cache, _rate_limiter
+    global _circuit_breaker, _evaluation_cache, _topic_tracker
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        if _post_mirror is not None:
+            _post_mirror.close()
+        if _evaluation_cache is not None:
+            _evaluation_cache.close()
+        if _topic_tracker is not None:
+            _topic_tracker.close()
+        _firebase_reader = None
+        _post_mirror = None
+        _http_client = None
+        _llm_cache = None
+        _evaluation_cache = None
+        _topic_tracker = None
+        _rate_limiter = None
+        _circuit_breaker = None
+        _llm_clients.clear()
@@ -64,12 +64,64 @@ class Config:
     UPSTAGE_API_KEY: str = ""
     UPSTAGE_BASE_URL: str = "https://api.upstage.ai/v1/solar"
     SOLAR_MODEL: str = "solar-pro3"
+    LLM_HTTP_MAX_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_SECONDS: float = 60.0
+    
+    # Shared LLM rate limit (0 = unlimited)
+    LLM_REQUESTS_PER_SEC: float = 2.0
+    LLM_BURST_REQUESTS: float = 4.0
+    LLM_TOKENS_PER_MIN: int = 100000
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_STREAM: bool = True  # stream responses, stop once the answer is complete
+    
+    # Retries for transient LLM errors (429/5xx/timeouts)
+    LLM_RETRY_MAX_ATTEMPTS: int = 4
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 20.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    LLM_CALL_DEADLINE_SECONDS: float = 120.0
+    LLM_BREAKER_FAILURES: int = 5  # 0 = breaker disabled
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 60.0
+    
+    # On-disk LLM response cache (empty dir = disabled)
+    LLM_CACHE_DIR: str = ".cache/llm"
+    LLM_CACHE_MAX_MB: int = 200
+    LLM_CACHE_MAX_AGE_DAYS: int = 14
+    
+    # Cross-day post verdict cache (empty path = disabled)
+    EVAL_CACHE_PATH: str = ".cache/evaluations.sqlite"
+    EVAL_CACHE_MAX_AGE_DAYS: int = 8
     
     DIGEST_HOURS: int = 24
     MAX_POSTS_TO_EVALUATE: int = 100
     MIN_HOT_SCORE: float = 0.5
+    DEDUP_SIMILARITY: float = 0.7  # shingle Jaccard for near-duplicates (0 = off)
+    SPAM_THRESHOLD: float = 1.0  # junk score that drops a post (0 = off)
+    TOPIC_CLUSTER_SIMILARITY: float = 0.15  # avg cosine to merge topic clusters
+    
+    # Day-over-day topic tracking (empty path = disabled)
+    TOPIC_TRACKER_PATH: str = ".cache/topics.sqlite"
+    TOPIC_TRACKER_MAX_AGE_DAYS: int = 14
+    TOPIC_MATCH_SIMILARITY: float = 0.2  # post-to-centroid cosine for a running story
     MAX_DIGEST_POSTS: int = 20
     
+    # Prompt packing for evaluation/grouping (estimated input tokens)
+    PROMPT_TOKEN_BUDGET: int = 24000
+    PROMPT_PREVIEW_MIN_CHARS: int = 120
+    PROMPT_PREVIEW_MAX_CHARS: int = 1000
+    
+    FETCH_PAGE_SIZE: int = 200
+    FETCH_MAX_WORKERS: int = 4
+    TOP_POSTS_LOOKBACK_DAYS: int = 7
+    TOP_POSTS_LIMIT: int = 50
+    COMMENT_HIGHLIGHTS_PER_POST: int = 3  # 0 = disabled
+    COMMENT_HIGHLIGHT_MAX_CHARS: int = 300
+    
+    # Optional local SQLite mirror of `posts` (empty = disabled)
+    POST_MIRROR_PATH: str = ""
+    MIRROR_REFRESH_HOURS: int = 168
+    MIRROR_SYNC_INTERVAL_MINUTES: int = 10
+    
     @classmethod
     def load(cls) -> "Config":
         """Load config. .env.local > os.environ."""
@@ -118,9 +170,48 @@ class Config:
         if not config.UPSTAGE_API_KEY:
             raise ValueError("UPSTAGE_API_KEY is required")
         
+        config.LLM_HTTP_MAX_CONNECTIONS = int(_get("LLM_HTTP_MAX_CONNECTIONS", "20"))
+        config.LLM_HTTP_KEEPALIVE_SECONDS = float(_get("LLM_HTTP_KEEPALIVE_SECONDS", "60"))
+        config.LLM_REQUESTS_PER_SEC = float(_get("LLM_REQUESTS_PER_SEC", "2"))
+        config.LLM_BURST_REQUESTS = float(_get("LLM_BURST_REQUESTS", "4"))
+        config.LLM_TOKENS_PER_MIN = int(_get("LLM_TOKENS_PER_MIN", "100000"))
+        config.LLM_MAX_CONCURRENCY = int(_get("LLM_MAX_CONCURRENCY", "4"))
+        config.LLM_STREAM = _get("LLM_STREAM", "true").lower() in ("1", "true", "yes")
+        config.LLM_RETRY_MAX_ATTEMPTS = int(_get("LLM_RETRY_MAX_ATTEMPTS", "4"))
+        config.LLM_RETRY_BASE_DELAY = float(_get("LLM_RETRY_BASE_DELAY", "1"))
+        config.LLM_RETRY_MAX_DELAY = float(_get("LLM_RETRY_MAX_DELAY", "20"))
+        config.LLM_REQUEST_TIMEOUT_SECONDS = float(_get("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+        config.LLM_CALL_DEADLINE_SECONDS = float(_get("LLM_CALL_DEADLINE_SECONDS", "120"))
+        config.LLM_BREAKER_FAILURES = int(_get("LLM_BREAKER_FAILURES", "5"))
+        config.LLM_BREAKER_COOLDOWN_SECONDS = float(_get("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
+        config.LLM_CACHE_DIR = _get("LLM_CACHE_DIR", ".cache/llm")
+        config.LLM_CACHE_MAX_MB = int(_get("LLM_CACHE_MAX_MB", "200"))
+        config.LLM_CACHE_MAX_AGE_DAYS = int(_get("LLM_CACHE_MAX_AGE_DAYS", "14"))
+        config.EVAL_CACHE_PATH = _get("EVAL_CACHE_PATH", ".cache/evaluations.sqlite")
+        config.EVAL_CACHE_MAX_AGE_DAYS = int(_get("EVAL_CACHE_MAX_AGE_DAYS", "8"))
+        
         config.DIGEST_HOURS = int(_get("DIGEST_HOURS", "24"))
         config.MAX_POSTS_TO_EVALUATE = int(_get("MAX_POSTS_TO_EVALUATE", "100"))
         config.MIN_HOT_SCORE = float(_get("MIN_HOT_SCORE", "0.5"))
+        config.DEDUP_SIMILARITY = float(_get("DEDUP_SIMILARITY", "0.7"))
+        config.SPAM_THRESHOLD = float(_get("SPAM_THRESHOLD", "1.0"))
+        config.TOPIC_CLUSTER_SIMILARITY = float(_get("TOPIC_CLUSTER_SIMILARITY", "0.15"))
+        config.TOPIC_TRACKER_PATH = _get("TOPIC_TRACKER_PATH", ".cache/topics.sqlite")
+        config.TOPIC_TRACKER_MAX_AGE_DAYS = int(_get("TOPIC_TRACKER_MAX_AGE_DAYS", "14"))
+        config.TOPIC_MATCH_SIMILARITY = float(_get("TOPIC_MATCH_SIMILARITY", "0.2"))
+        config.PROMPT_TOKEN_BUDGET = int(_get("PROMPT_TOKEN_BUDGET", "24000"))
+        config.PROMPT_PREVIEW_MIN_CHARS = int(_get("PROMPT_PREVIEW_MIN_CHARS", "120"))
+        config.PROMPT_PREVIEW_MAX_CHARS = int(_get("PROMPT_PREVIEW_MAX_CHARS", "1000"))
+        config.FETCH_PAGE_SIZE = int(_get("FETCH_PAGE_SIZE", "200"))
+        config.FETCH_MAX_WORKERS = int(_get("FETCH_MAX_WORKERS", "4"))
+        config.TOP_POSTS_LOOKBACK_DAYS = int(_get("TOP_POSTS_LOOKBACK_DAYS", "7"))
+        config.TOP_POSTS_LIMIT = int(_get("TOP_POSTS_LIMIT", "50"))
+        config.COMMENT_HIGHLIGHTS_PER_POST = int(_get("COMMENT_HIGHLIGHTS_PER_POST", "3"))
+        config.COMMENT_HIGHLIGHT_MAX_CHARS = int(_get("COMMENT_HIGHLIGHT_MAX_CHARS", "300"))
+        
+        config.POST_MIRROR_PATH = _get("POST_MIRROR_PATH", "")
+        config.MIRROR_REFRESH_HOURS = int(_get("MIRROR_REFRESH_HOURS", "168"))
+        config.MIRROR_SYNC_INTERVAL_MINUTES = int(_get("MIRROR_SYNC_INTERVAL_MINUTES", "10"))
         
         return config
 
@@ -1,10 +1,18 @@
 """LLM-based post evaluation for digest inclusion."""
+import asyncio
+import hashlib
+import sys
 from dataclasses import dataclass
-from typing import List
+from itertools import count
+from typing import Any, Generator, List, Optional, Tuple
 
 from .firebase_reader import Post
-from .llm_client import LLMClient
+from .clients import get_async_llm_client, get_evaluation_cache, get_llm_client
+from .config import get_config
+from .eval_cache import EvaluationCache, Verdict
+from .parallel import map_concurrently
 from .post_fetcher import format_post_summary
+from .prompt_packer import PackedPrompt, estimate_tokens, pack_posts
 
 
 @dataclass
@@ -48,36 +56,63 @@ def evaluate_posts(posts: List[Post]) -> List[EvaluationResult]:
     Returns:
         List of EvaluationResult, only including posts marked for inclusion
     """
-    llm = LLMClient()
+    llm = get_llm_client()
     results = []
     
     for i, post in enumerate(posts, 1):
-        post_info = format_post_summary(post, i)
-        
         try:
-            response = llm.chat_json(
-                user_prompt=EVALUATION_USER_PROMPT.format(post_info=post_info),
-                system_prompt=EVALUATION_SYSTEM_PROMPT,
-                temperature=0.3,
-            )
-            
-            result = EvaluationResult(
-                post=post,
-                include=response.get("include", False),
-                reason=response.get("reason", ""),
-                score=response.get("score", 5),
-            )
-            results.append(result)
-            
+            response = llm.chat_json(**_single_request(post, i))
+            results.append(_single_result(post, response))
         except Exception as e:
             # On error, skip this post
             print(f"⚠️  포스트 평가 오류 [{post.id}]: {e}")
             continue
     
-    # Filter to only included posts, sorted by score
+    return _included_by_score(results)
+
+
+async def evaluate_posts_async(posts: List[Post]) -> List[EvaluationResult]:
+    """Async variant of evaluate_posts(); posts are evaluated concurrently."""
+    llm = get_async_llm_client()
+    
+    async def evaluate_one(i: int, post: Post) -> Optional[EvaluationResult]:
+        try:
+            response = await llm.chat_json(**_single_request(post, i))
+            return _single_result(post, response)
+        except Exception as e:
+            # On error, skip this post
+            print(f"⚠️  포스트 평가 오류 [{post.id}]: {e}")
+            return None
+    
+    results = await asyncio.gather(*(
+        evaluate_one(i, post) for i, post in enumerate(posts, 1)
+    ))
+    return _included_by_score([r for r in results if r is not None])
+
+
+def _single_request(post: Post, index: int) -> dict:
+    """chat_json() kwargs for evaluating one post."""
+    return dict(
+        user_prompt=EVALUATION_USER_PROMPT.format(post_info=format_post_summary(post, index)),
+        system_prompt=EVALUATION_SYSTEM_PROMPT,
+        temperature=0.3,
+        schema={"include": bool},
+    )
+
+
+def _single_result(post: Post, response: dict) -> EvaluationResult:
+    return EvaluationResult(
+        post=post,
+        include=response.get("include", False),
+        reason=response.get("reason", ""),
+        score=response.get("score", 5),
+    )
+
+
+def _included_by_score(results: List[EvaluationResult]) -> List[EvaluationResult]:
+    """Filter to only included posts, sorted by score."""
     included = [r for r in results if r.include]
     included.sort(key=lambda r: r.score, reverse=True)
-    
     return included
 
 
@@ -97,63 +132,333 @@ BATCH_EVALUATION_PROMPT = """다음 포스트들 중 봇마당 일일 다이제
 - 중복/반복 내용
 - 저품질 스팸
 
-다음 JSON 형식으로 응답 (최대 15개 선별):
+다음 JSON 형식으로 응답 (최대 {max_selected}개 선별).
+excluded에는 제외 대상에 해당하는 포스트 번호만 넣으세요 (선별되지 않았을 뿐인 포스트는 넣지 마세요):
 {{
   "selected": [
     {{"index": 1, "reason": "선정 이유", "score": 8}},
     ...
-  ]
+  ],
+  "excluded": [3, 7]
 }}"""
 
+# Map-reduce evaluation: each shard shortlists a few posts, the
+# shortlists meet in further rounds until one prompt picks the final set.
+FINAL_SELECTION = 15
+SHARD_SHORTLIST = 8
+
+# Round requests from _tournament(): (shards, max posts selected per shard)
+_Round = Tuple[List[PackedPrompt], int]
+_RoundResults = List[Optional[List[EvaluationResult]]]
+
 
 def evaluate_posts_batch(posts: List[Post]) -> List[EvaluationResult]:
     """Evaluate posts in batch for efficiency.
     
+    Posts with a cached verdict from an earlier run (same content, model
+    and prompt) skip the shard rounds: exclusions are dropped, selections
+    go straight to the final round. Candidates that don't fit one
+    prompt are split into shards that are evaluated concurrently; the
+    shortlisted posts then go through a tournament merge until a single
+    prompt selects the final posts.
+    
     Args:
-        posts: List of candidate posts (max ~30 for context limits)
+        posts: Candidate posts, best first
         
     Returns:
-        List of EvaluationResult for selected posts
+        List of EvaluationResult for selected posts (max FINAL_SELECTION)
     """
-    llm = LLMClient()
+    llm = get_llm_client()
+    max_workers = get_config().LLM_MAX_CONCURRENCY
     
-    # Format posts list
-    posts_list = "\n\n".join(
-        format_post_summary(p, i) 
-        for i, p in enumerate(posts, 1)
-    )
+    def evaluate_shard(shard: PackedPrompt, max_selected: int) -> Optional[List[EvaluationResult]]:
+        try:
+            response = llm.chat_json(**_batch_request(shard, max_selected))
+            return _batch_results(response, shard.posts)
+        except Exception as e:
+            print(f"⚠️  배치 평가 오류: {e}")
+            return None
     
-    try:
-        response = llm.chat_json(
-            user_prompt=BATCH_EVALUATION_PROMPT.format(posts_list=posts_list),
-            system_prompt=EVALUATION_SYSTEM_PROMPT,
-            temperature=0.3,
-            max_tokens=3000,
+    rounds = _tournament(posts)
+    done, step = _next_round(rounds)
+    while not done:
+        shards, max_selected = step
+        shard_results = map_concurrently(
+            lambda shard: evaluate_shard(shard, max_selected), shards, max_workers
         )
+        done, step = _next_round(rounds, shard_results)
+    selection = step
+    
+    if selection is not None:
+        return selection
+    # Fallback to individual evaluation
+    return evaluate_posts(posts[:FINAL_SELECTION])
+
+
+async def evaluate_posts_batch_async(posts: List[Post]) -> List[EvaluationResult]:
+    """Async variant of evaluate_posts_batch()."""
+    llm = get_async_llm_client()
+    
+    async def evaluate_shard(shard: PackedPrompt, max_selected: int) -> Optional[List[EvaluationResult]]:
+        try:
+            response = await llm.chat_json(**_batch_request(shard, max_selected))
+            return _batch_results(response, shard.posts)
+        except Exception as e:
+            print(f"⚠️  배치 평가 오류: {e}")
+            return None
+    
+    # Rounds read and write the verdict cache (SQLite): keep them off the loop
+    rounds = _tournament(posts)
+    done, step = await asyncio.to_thread(_next_round, rounds)
+    while not done:
+        shards, max_selected = step
+        shard_results = await asyncio.gather(*(
+            evaluate_shard(shard, max_selected) for shard in shards
+        ))
+        done, step = await asyncio.to_thread(_next_round, rounds, list(shard_results))
+    selection = step
+    
+    if selection is not None:
+        return selection
+    # Fallback to individual evaluation
+    return await evaluate_posts_async(posts[:FINAL_SELECTION])
+
+
+def _next_round(
+    rounds: Generator[_Round, _RoundResults, Optional[List[EvaluationResult]]],
+    shard_results: Optional[_RoundResults] = None,
+) -> Tuple[bool, Any]:
+    """Advance _tournament(): (False, next round) or (True, final selection).
+    
+    Returns instead of raising StopIteration, which cannot cross
+    asyncio.to_thread().
+    """
+    try:
+        return False, rounds.send(shard_results)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def _tournament(
+    posts: List[Post],
+) -> Generator[_Round, _RoundResults, Optional[List[EvaluationResult]]]:
+    """Drive the evaluation rounds (shared by the sync and async evaluators).
+    
+    Yields each round's shards and receives their results (None for a
+    failed shard). Returns the final selection (empty if the LLM selected
+    nothing), or None if no round could be evaluated.
+    """
+    cache = get_evaluation_cache()
+    version = _evaluation_version()
+    carry, fresh = _split_cached(posts, cache, version)
+    if not carry and not fresh:
+        return []
+    if not fresh:
+        print(f"   🗃️  평가 캐시: 신규 포스트 없음 - 캐시된 {len(carry)}개 선정 결과만 재평가")
+    
+    # Cached selections skip the shard rounds but are re-judged: their
+    # stored scores come from other prompts and are not comparable, so
+    # they join the fresh shortlist once it fits a single prompt
+    shards = _shard_posts(fresh)
+    pool_size = len(fresh)
+    shortlist: List[EvaluationResult] = []
+    waiting = carry  # cached selections that have not joined a round yet
+    
+    for round_no in count(1):
+        joining: List[EvaluationResult] = []
+        if waiting and len(shards) <= 1:
+            joining, waiting = waiting, []
+            shortlisted = shards[0].posts if shards else []
+            shards = _shard_posts(shortlisted + [r.post for r in joining])
+            pool_size = len(shortlisted) + len(joining)
+        final = len(shards) == 1
+        shard_results = yield shards, FINAL_SELECTION if final else SHARD_SHORTLIST
+        if round_no == 1:
+            _store_verdicts(cache, version, shard_results)
+        shard_results = [r if r is None else _included_by_score(r) for r in shard_results]
         
-        # Handle both {"selected": [...]} and direct list [...] formats
-        if isinstance(response, list):
-            selected = response
-        else:
-            selected = response.get("selected", [])
-        
-        results = []
+        if final:
+            print(f"   📦 평가 프롬프트: {shards[0].report()}")
+            results = shard_results[0]
+            if results is None:
+                # Final round failed: keep the previous round's shortlist
+                # and the cached selections, by score
+                selection = _with_cached(joining, shortlist)
+                return selection if selection or round_no > 1 else None
+            return results[:FINAL_SELECTION]
         
-        for item in selected:
-            idx = item.get("index", 0) - 1  # Convert to 0-based
-            if 0 <= idx < len(posts):
-                results.append(EvaluationResult(
-                    post=posts[idx],
-                    include=True,
-                    reason=item.get("reason", ""),
-                    score=item.get("score", 5),
-                ))
+        if all(r is None for r in shard_results):
+            selection = _with_cached(joining + waiting, shortlist)
+            return selection if selection or round_no > 1 else None
         
-        # Sort by score
-        results.sort(key=lambda r: r.score, reverse=True)
-        return results
+        advancing = []
+        for shard, results in zip(shards, shard_results):
+            if results is None:
+                # Failed shard: its best-ranked posts advance unjudged
+                results = [
+                    EvaluationResult(post=p, include=True, reason="배치 평가 실패 - 인기순", score=0)
+                    for p in shard.posts[:SHARD_SHORTLIST]
+                ]
+            advancing.extend(results[:SHARD_SHORTLIST])
+        # Scores of different shards are not comparable; the next round re-judges
+        advancing.sort(key=lambda r: r.score, reverse=True)
         
-    except Exception as e:
-        print(f"⚠️  배치 평가 오류: {e}")
-        # Fallback to individual evaluation
-        return evaluate_posts(posts[:15])
+        print(
+            f"   🏆 토너먼트 {round_no}라운드: {pool_size}개 → {len(shards)}개 샤드 "
+            f"→ {len(advancing)}개 진출"
+        )
+        if not advancing and not waiting:
+            return []  # every shard was judged and selected nothing
+        if len(advancing) >= pool_size:
+            # Shards too small to shrink the pool: stop here
+            return _with_cached(waiting, advancing)
+        pool_size = len(advancing)
+        shortlist = advancing
+        shards = _shard_posts([r.post for r in advancing])
+
+
+def _evaluation_version() -> str:
+    """Model + batch prompt fingerprint; verdicts of other versions are ignored."""
+    prompt_hash = hashlib.sha256(
+        (EVALUATION_SYSTEM_PROMPT + BATCH_EVALUATION_PROMPT).encode("utf-8")
+    ).hexdigest()[:12]
+    return f"{get_config().SOLAR_MODEL}:{prompt_hash}"
+
+
+def _split_cached(
+    posts: List[Post],
+    cache: Optional[EvaluationCache],
+    version: str,
+) -> Tuple[List[EvaluationResult], List[Post]]:
+    """Split into (cached selections sorted by score, posts to evaluate)."""
+    if cache is None:
+        return [], posts
+    
+    verdicts = cache.get_many(posts, version)
+    carry = [
+        EvaluationResult(post=p, include=True, reason=v.reason, score=v.score)
+        for p in posts
+        if (v := verdicts.get(p.id)) is not None and v.include
+    ]
+    carry.sort(key=lambda r: r.score, reverse=True)
+    fresh = [p for p in posts if p.id not in verdicts]
+    if verdicts:
+        print(
+            f"   🗃️  평가 캐시: {len(verdicts)}개 재사용 (선정 {len(carry)}개) / "
+            f"신규 평가 {len(fresh)}개"
+        )
+    return carry, fresh
+
+
+def _with_cached(
+    carry: List[EvaluationResult],
+    results: List[EvaluationResult],
+) -> List[EvaluationResult]:
+    """Merge cached selections into results by score (top FINAL_SELECTION).
+    
+    Only for fallbacks when no round could re-judge them together.
+    """
+    merged = carry + results
+    merged.sort(key=lambda r: _as_int(r.score), reverse=True)
+    return merged[:FINAL_SELECTION]
+
+
+def _store_verdicts(
+    cache: Optional[EvaluationCache],
+    version: str,
+    shard_results: _RoundResults,
+) -> None:
+    """Persist first-round verdicts: selected and explicitly excluded posts.
+    
+    A post that merely missed its shard's shortlist lost to that shard's
+    field, which says nothing about later days; it is not stored and is
+    judged again next time. Stored selections skip later shard rounds
+    but still meet the final round (see _tournament).
+    """
+    if cache is None:
+        return
+    verdicts = [
+        (r.post, Verdict(
+            include=r.include,
+            score=_as_int(r.score) if r.include else 0,
+            reason=r.reason,
+        ))
+        for results in shard_results if results is not None
+        for r in results
+    ]
+    if verdicts:
+        cache.put_many(verdicts, version)
+
+
+def _as_int(value: Any, default: int = 5) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _shard_posts(posts: List[Post]) -> List[PackedPrompt]:
+    """Split candidates into prompts that each fit the token budget."""
+    template_tokens = estimate_tokens(BATCH_EVALUATION_PROMPT + EVALUATION_SYSTEM_PROMPT)
+    budget = get_config().PROMPT_TOKEN_BUDGET - template_tokens
+    
+    shards = []
+    remaining = posts
+    while remaining:
+        shard = pack_posts(remaining, budget)
+        if not shard.posts:
+            # A single post over budget still gets its own (minimal) prompt
+            shard = pack_posts(remaining[:1], sys.maxsize, max_preview=1)
+            shard.dropped = remaining[1:]
+        shards.append(shard)
+        remaining = shard.dropped
+    return shards
+
+
+def _batch_request(packed: PackedPrompt, max_selected: int = FINAL_SELECTION) -> dict:
+    """chat_json() kwargs for evaluating a batch of posts."""
+    return dict(
+        user_prompt=BATCH_EVALUATION_PROMPT.format(
+            posts_list=packed.text, max_selected=max_selected,
+        ),
+        system_prompt=EVALUATION_SYSTEM_PROMPT,
+        temperature=0.3,
+        max_tokens=3000,
+        schema={"selected": list},
+    )
+
+
+def _batch_results(response: Any, posts: List[Post]) -> List[EvaluationResult]:
+    """Map a batch response back to posts: selections sorted by score,
+    then explicit exclusions (include=False)."""
+    # Handle both {"selected": [...]} and direct list [...] formats
+    if isinstance(response, list):
+        selected, excluded = response, []
+    else:
+        selected = response.get("selected", [])
+        excluded = response.get("excluded", [])
+    
+    results = []
+    
+    for item in selected:
+        idx = item.get("index", 0) - 1  # Convert to 0-based
+        if 0 <= idx < len(posts):
+            results.append(EvaluationResult(
+                post=posts[idx],
+                include=True,
+                reason=item.get("reason", ""),
+                score=item.get("score", 5),
+            ))
+    
+    # Sort by score
+    results.sort(key=lambda r: r.score, reverse=True)
+    
+    chosen = {r.post.id for r in results}
+    for index in excluded if isinstance(excluded, list) else []:
+        idx = _as_int(index, 0) - 1
+        if 0 <= idx < len(posts) and posts[idx].id not in chosen:
+            chosen.add(posts[idx].id)
+            results.append(EvaluationResult(
+                post=posts[idx], include=False, reason="제외 대상", score=0,
+            ))
+    return results
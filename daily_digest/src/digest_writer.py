@@ -1,10 +1,19 @@
 """Digest writer in 뉴닉 style - v3 with LLM summaries and deep dives."""
+import asyncio
+import re
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from .topic_grouper import TopicGroup
-from .llm_client import LLMClient
+from .clients import get_async_llm_client, get_llm_client
+from .config import get_config
+from .digest_evaluator import EvaluationResult
+from .llm_client import AsyncLLMClient, LLMClient
+from .llm_stream import SectionEnd
 from .firebase_reader import Post
+from .parallel import map_concurrently
+from .post_fetcher import format_comment_highlights
 
 
 # 시스템 프롬프트
@@ -33,12 +42,12 @@ DEEP_DIVE_PROMPT = """다음 봇마당 포스트를 뉴닉 뉴스레터 스타
 마당: {submadang}
 내용:
 {content}
-
+{discussion}
 === 작성 규칙 ===
 1. 소제목을 이모지와 함께 만들어주세요 (예: "🤖 AI 코딩 전쟁, 우리는 어떻게 해야 할까?")
 2. 핵심 내용을 독자가 이해하기 쉽게 3-5문장으로 요약해주세요
 3. "왜 중요한가?"를 1-2문장으로 설명해주세요
-4. 봇마당 커뮤니티에서 이 주제가 왜 화제인지 멘트 추가
+4. 봇마당 커뮤니티에서 이 주제가 왜 화제인지 멘트 추가 (댓글 하이라이트가 있으면 참고)
 5. 최대 200자 내외로 작성
 6. 링크를 포함하지 마세요 (별도로 추가됩니다)
 7. URL을 만들어내지 마세요
@@ -82,18 +91,74 @@ def generate_digest(
     3. Brief news (remaining ~7 posts) - LLM
     4. Outro + Footer
     
-    Total LLM calls: ~10 (3 deep + 7 brief)
+    Total LLM calls: ~10 (3 deep + 7 brief), written concurrently
+    (LLM_MAX_CONCURRENCY workers, paced by the shared rate limiter),
+    plus one small review call per section that fails local checks
     """
-    llm = LLMClient()
-    sections = []
+    llm = get_llm_client()
+    deep_posts, brief_posts = _pick_posts(main_groups, brief_groups)
+    jobs = _section_jobs(deep_posts, brief_posts, _running_stories(main_groups + brief_groups))
+    
+    # Each section is an independent call; results come back in input
+    # order, so the layout stays deterministic.
+    written = map_concurrently(
+        lambda job: _write_section(llm, job),
+        jobs,
+        max_workers=get_config().LLM_MAX_CONCURRENCY,
+    )
+    
+    # Quality review pass (2차 검수), section by section
+    print("\n🔍 품질 검수 중...")
+    written = review_sections(written, llm)
+    raw_digest = _assemble_digest(
+        target_date, deep_posts, written[:len(deep_posts)], written[len(deep_posts):]
+    )
+    # Regex-based cleanup (always runs)
+    return _sanitize_links(raw_digest)
+
+
+async def generate_digest_async(
+    main_groups: List[TopicGroup],
+    brief_groups: List[TopicGroup],
+    target_date: datetime
+) -> str:
+    """Async variant of generate_digest(); all sections are in flight at once."""
+    llm = get_async_llm_client()
+    deep_posts, brief_posts = _pick_posts(main_groups, brief_groups)
+    jobs = _section_jobs(deep_posts, brief_posts, _running_stories(main_groups + brief_groups))
+    
+    written = await asyncio.gather(*(_write_section_async(llm, job) for job in jobs))
     
-    # Collect all posts, keep top 10
+    # Quality review pass (2차 검수), section by section
+    print("\n🔍 품질 검수 중...")
+    written = await review_sections_async(list(written), llm)
+    raw_digest = _assemble_digest(
+        target_date, deep_posts, written[:len(deep_posts)], written[len(deep_posts):]
+    )
+    return _sanitize_links(raw_digest)
+
+
+def _pick_posts(
+    main_groups: List[TopicGroup],
+    brief_groups: List[TopicGroup],
+) -> Tuple[List[EvaluationResult], List[EvaluationResult]]:
+    """Collect all posts, keep top 10: (deep dive top 3, briefs)."""
     all_evaluated = []
     for g in main_groups + brief_groups:
         all_evaluated.extend(g.posts)
     all_evaluated = all_evaluated[:10]
-    
-    post_count = len(all_evaluated)
+    return all_evaluated[:3], all_evaluated[3:10]
+
+
+def _assemble_digest(
+    target_date: datetime,
+    deep_posts: List[EvaluationResult],
+    deep_sections: List[str],
+    brief_sections: List[str],
+) -> str:
+    """Lay out header, intro, written sections, outro and footer."""
+    sections = []
+    post_count = len(deep_posts) + len(brief_sections)
     
     # 한국어 요일
     weekdays = ["월", "화", "수", "목", "금", "토", "일"]
@@ -108,9 +173,6 @@ def generate_digest(
     # ──────────────────────────────────────────
     # 2. Intro
     # ──────────────────────────────────────────
-    deep_posts = all_evaluated[:3]
-    brief_posts = all_evaluated[3:10]
-    
     topic_names = [ep.post.title[:20] for ep in deep_posts]
     intro = _generate_intro(topic_names, post_count)
     sections.append(intro)
@@ -119,48 +181,11 @@ def generate_digest(
     # ──────────────────────────────────────────
     # 3. Deep dive (top 3)
     # ──────────────────────────────────────────
-    for i, ep in enumerate(deep_posts):
-        post = ep.post
-        category = post.submadang or "일반"
-        emoji = EMOJI_MAP.get(category.lower(), "📝")
-        link = f"https://botmadang.org/post/{post.id}"
-        
-        print(f"   ✍️  딥다이브 {i+1}/3: {post.title[:30]}...")
-        
-        # LLM으로 딥다이브 작성
-        try:
-            deep_content = llm.chat(
-                user_prompt=DEEP_DIVE_PROMPT.format(
-                    title=post.title,
-                    author=post.author_name,
-                    submadang=category,
-                    content=post.content[:1500],  # 충분한 컨텍스트
-                ),
-                system_prompt=SYSTEM_PROMPT,
-                temperature=0.7,
-                max_tokens=1500,
-            )
-            # Remove any fabricated links from LLM output
-            import re as _re
-            deep_content = _re.sub(r'👉\s*\[자세히 보기\]\([^)]*\)', '', deep_content)
-            deep_content = _re.sub(r'\[자세히 보기\]\([^)]*\)', '', deep_content)
-            deep_content = deep_content.strip()
-            # Add real link
-            deep_content += f"\n\n👉 [자세히 보기]({link})"
-        except Exception as e:
-            print(f"   ⚠️  딥다이브 오류: {e}")
-            # Fallback
-            summary = post.content[:300].strip()
-            deep_content = (
-                f"### {emoji} {post.title}\n\n"
-                f"{summary}...\n\n"
-                f"👉 [자세히 보기]({link})"
-            )
-        
-        sections.append(deep_content.strip())
+    for i, deep_content in enumerate(deep_sections):
+        sections.append(deep_content)
         
         # 딥다이브 구분선
-        if i < len(deep_posts) - 1:
+        if i < len(deep_sections) - 1:
             sections.append("")
     
     sections.append("\n---\n")
@@ -168,42 +193,14 @@ def generate_digest(
     # ──────────────────────────────────────────
     # 4. Brief news (remaining ~7)
     # ──────────────────────────────────────────
-    if brief_posts:
+    if brief_sections:
         sections.append("## ⚡ 한눈에 보기\n")
         
-        for i, ep in enumerate(brief_posts):
-            post = ep.post
-            category = post.submadang or "일반"
-            emoji = EMOJI_MAP.get(category.lower(), "📝")
-            link = f"https://botmadang.org/post/{post.id}"
-            
-            print(f"   📝 브리프 {i+1}/{len(brief_posts)}: {post.title[:30]}...")
-            
-            # LLM으로 요약 생성
-            try:
-                summary = llm.chat(
-                    user_prompt=BRIEF_SUMMARY_PROMPT.format(
-                        title=post.title,
-                        author=post.author_name,
-                        content=post.content[:800],
-                    ),
-                    system_prompt=SYSTEM_PROMPT,
-                    temperature=0.5,
-                    max_tokens=500,
-                )
-            except Exception as e:
-                print(f"   ⚠️  브리프 오류: {e}")
-                summary = post.content[:100].strip() + "..."
-            
-            entry = (
-                f"**{category}** | {post.title} {emoji}\n\n"
-                f"{summary.strip()} "
-                f"[자세히 보기]({link})"
-            )
+        for i, entry in enumerate(brief_sections):
             sections.append(entry)
             
             # 주제 간 구분선
-            if i < len(brief_posts) - 1:
+            if i < len(brief_sections) - 1:
                 sections.append("---")
     
     # ──────────────────────────────────────────
@@ -218,64 +215,327 @@ def generate_digest(
         f"[botmadang.org](https://botmadang.org)*"
     )
     
-    raw_digest = "\n\n".join(sections)
+    return "\n\n".join(sections)
+
+
+@dataclass
+class _SectionJob:
+    """One LLM-written section: a deep dive or a brief entry."""
+    kind: str  # "deep" | "brief"
+    post: Post
+    index: int
+    total: int
+    story: str = ""  # name of the earlier topic this post continues
     
-    # ──────────────────────────────────────────
-    # 7. Quality review pass (2차 검수)
-    # ──────────────────────────────────────────
-    print("\n🔍 품질 검수 중...")
-    reviewed = review_digest(raw_digest, llm)
+    @property
+    def category(self) -> str:
+        return self.post.submadang or "일반"
     
-    return reviewed
+    @property
+    def emoji(self) -> str:
+        return EMOJI_MAP.get(self.category.lower(), "📝")
+    
+    @property
+    def link(self) -> str:
+        return f"https://botmadang.org/post/{self.post.id}"
 
 
-REVIEW_PROMPT = """다음은 봇마당 데일리 다이제스트입니다. 편집자로서 최종 검수를 해주세요.
+def _section_jobs(
+    deep_posts: List[EvaluationResult],
+    brief_posts: List[EvaluationResult],
+    stories: Dict[str, str],
+) -> List[_SectionJob]:
+    return [
+        _SectionJob("deep", ep.post, i, len(deep_posts), stories.get(ep.post.id, ""))
+        for i, ep in enumerate(deep_posts)
+    ] + [
+        _SectionJob("brief", ep.post, i, len(brief_posts), stories.get(ep.post.id, ""))
+        for i, ep in enumerate(brief_posts)
+    ]
 
-=== 검수 항목 ===
-1. **외부 링크 제거**: botmadang.org 이외의 URL(카카오톡, 네이버 등)이 있으면 삭제
-2. **중복 내용 제거**: 같은 내용이 반복되면 하나만 남기기
-3. **영어/reasoning 흔적 제거**: 영어 문장, [thinking], <analysis> 등 제거
-4. **문장 다듬기**: 어색한 표현 자연스럽게 수정
-5. **마크다운 형식 유지**: 제목, 볼드, 이모지, 링크 형식 그대로 유지
+
+def _running_stories(groups: List[TopicGroup]) -> Dict[str, str]:
+    """Post id -> topic name, for posts continuing an earlier day's topic."""
+    return {
+        r.post.id: g.name
+        for g in groups if g.continuing
+        for r in g.posts
+    }
+
+
+def _write_section(llm: LLMClient, job: _SectionJob) -> str:
+    """Write one section (falls back to a content excerpt on failure)."""
+    _print_progress(job)
+    try:
+        return _section_result(job, llm.chat(**_section_request(job)))
+    except Exception as e:
+        return _section_fallback(job, e)
+
+
+async def _write_section_async(llm: AsyncLLMClient, job: _SectionJob) -> str:
+    """Async variant of _write_section()."""
+    _print_progress(job)
+    try:
+        return _section_result(job, await llm.chat(**_section_request(job)))
+    except Exception as e:
+        return _section_fallback(job, e)
+
+
+def _print_progress(job: _SectionJob) -> None:
+    if job.kind == "deep":
+        print(f"   ✍️  딥다이브 {job.index+1}/{job.total}: {job.post.title[:30]}...")
+    else:
+        print(f"   📝 브리프 {job.index+1}/{job.total}: {job.post.title[:30]}...")
+
+
+def _section_request(job: _SectionJob) -> dict:
+    """chat() kwargs for a section."""
+    post = job.post
+    if job.kind == "deep":
+        # LLM으로 딥다이브 작성
+        return dict(
+            user_prompt=DEEP_DIVE_PROMPT.format(
+                title=post.title,
+                author=post.author_name,
+                submadang=job.category,
+                content=post.content[:1500],  # 충분한 컨텍스트
+                discussion=_format_discussion(post),
+            ),
+            system_prompt=SYSTEM_PROMPT,
+            temperature=0.7,
+            max_tokens=1500,
+            end_detector=SectionEnd,
+        )
+    # LLM으로 요약 생성
+    return dict(
+        user_prompt=BRIEF_SUMMARY_PROMPT.format(
+            title=post.title,
+            author=post.author_name,
+            content=post.content[:800],
+        ),
+        system_prompt=SYSTEM_PROMPT,
+        temperature=0.5,
+        max_tokens=500,
+        end_detector=SectionEnd,
+    )
+
+
+def _section_result(job: _SectionJob, text: str) -> str:
+    """Turn LLM output into the final section markdown."""
+    if job.kind == "deep":
+        # Remove any fabricated links from LLM output
+        deep_content = re.sub(r'👉\s*\[자세히 보기\]\([^)]*\)', '', text)
+        deep_content = re.sub(r'\[자세히 보기\]\([^)]*\)', '', deep_content)
+        deep_content = deep_content.strip()
+        if job.story:
+            deep_content += f"\n\n{_story_tag(job)}"
+        # Add real link
+        deep_content += f"\n\n👉 [자세히 보기]({job.link})"
+        return deep_content.strip()
+    return _brief_entry(job, text)
+
+
+def _section_fallback(job: _SectionJob, error: Exception) -> str:
+    """Content-excerpt section used when the LLM call fails."""
+    post = job.post
+    if job.kind == "deep":
+        print(f"   ⚠️  딥다이브 오류: {error}")
+        summary = post.content[:300].strip()
+        story = f"{_story_tag(job)}\n\n" if job.story else ""
+        return (
+            f"### {job.emoji} {post.title}\n\n"
+            f"{summary}...\n\n"
+            f"{story}"
+            f"👉 [자세히 보기]({job.link})"
+        )
+    print(f"   ⚠️  브리프 오류: {error}")
+    return _brief_entry(job, post.content[:100].strip() + "...")
+
+
+def _story_tag(job: _SectionJob) -> str:
+    return f"{_STORY_TAG} · {job.story}"
+
+
+def _brief_entry(job: _SectionJob, summary: str) -> str:
+    story = " · 🔁 계속되는 이야기" if job.story else ""
+    return (
+        f"**{job.category}** | {job.post.title} {job.emoji}{story}\n\n"
+        f"{summary.strip()} "
+        f"[자세히 보기]({job.link})"
+    )
+
+
+REVIEW_PROMPT = """다음은 봇마당 데일리 다이제스트의 한 섹션입니다. 편집자로서 검수해주세요.
+
+=== 발견된 문제 ===
+{issues}
 
 === 규칙 ===
-- botmadang.org 링크는 반드시 유지
-- 전체 구조와 분량은 유지 (삭제만 하고 새로운 내용 추가하지 마세요)
-- 수정한 부분만 바꾸고 나머지는 그대로 출력
-- 바로 수정된 전체 다이제스트를 출력하세요 (설명 없이)
+- 위 문제가 있는 부분만 고치세요 (외부 링크 삭제, 영어/reasoning 흔적 삭제, 중복 문장 삭제)
+- botmadang.org 링크와 마크다운 형식은 그대로 유지
+- 새로운 내용을 추가하지 마세요
+
+=== 섹션 ===
+{section}
 
-=== 다이제스트 ===
-{digest}"""
+고칠 부분을 원문에서 그대로 복사해 find에, 바꿀 내용을 replace에 넣어 응답하세요.
+삭제는 replace를 빈 문자열로 합니다. 섹션 전체를 다시 쓰지 마세요.
+{{"edits": [{{"find": "원문 일부", "replace": "수정문"}}]}}"""
 
+_EXTERNAL_URL = re.compile(r'https?://(?!botmadang\.org)[^\s)\]]+')
+_REASONING_TRACE = re.compile(r'\[/?thinking\]|</?(analysis|think)>', re.IGNORECASE)
+# Six or more English words in a row (a sentence, not a product name)
+_ENGLISH_RUN = re.compile(r"[A-Za-z][A-Za-z']*(?:[ ,]+[A-Za-z][A-Za-z']*){5,}")
+# Lines too short or structural to count as duplicated content
+_MIN_DUPLICATE_CHARS = 10
+# Added by the writer itself: review must neither flag nor remove them
+_STORY_TAG = "🔁 **계속되는 이야기**"
+_PROTECTED = ("botmadang.org", _STORY_TAG)
 
-def review_digest(digest: str, llm: LLMClient) -> str:
-    """Review and clean up the digest with a second LLM pass.
+
+def review_sections(sections: List[str], llm: LLMClient) -> List[str]:
+    """Review written sections; only sections failing local checks use the LLM.
+    
+    Each flagged section gets its own small request (concurrently) that
+    answers with find/replace edits instead of a rewritten document.
     
-    1. LLM review for quality issues
-    2. Regex-based link sanitization as fallback
+    Returns:
+        Sections in input order, with accepted edits applied
     """
-    import re
+    issues = _section_issues(sections)
+    flagged = [i for i, found in enumerate(issues) if found]
+    _print_review_plan(len(sections), len(flagged))
     
-    # Step 1: LLM review
-    try:
-        reviewed = llm.chat(
-            user_prompt=REVIEW_PROMPT.format(digest=digest),
-            system_prompt=SYSTEM_PROMPT,
-            temperature=0.2,
-            max_tokens=8000,
-            model_override="solar-pro",  # non-reasoning model for editing
-        )
-        
-        if reviewed and len(reviewed) > len(digest) * 0.5:
-            # LLM review succeeded and output is reasonable length
-            digest = reviewed.strip()
-            print("   ✅ LLM 검수 완료")
-        else:
-            print("   ⚠️  LLM 검수 출력 부족, 원본 유지")
-    except Exception as e:
-        print(f"   ⚠️  LLM 검수 실패: {e}, 원본 유지")
+    def review_one(i: int) -> str:
+        try:
+            response = llm.chat_json(**_review_request(sections[i], issues[i]))
+            return _apply_edits(sections[i], response)
+        except Exception as e:
+            print(f"   ⚠️  섹션 검수 실패: {e}, 원본 유지")
+            return sections[i]
     
-    # Step 2: Regex-based cleanup (always runs)
+    reviewed = list(sections)
+    results = map_concurrently(review_one, flagged, max_workers=get_config().LLM_MAX_CONCURRENCY)
+    for i, text in zip(flagged, results):
+        reviewed[i] = text
+    return reviewed
+
+
+async def review_sections_async(sections: List[str], llm: AsyncLLMClient) -> List[str]:
+    """Async variant of review_sections()."""
+    issues = _section_issues(sections)
+    flagged = [i for i, found in enumerate(issues) if found]
+    _print_review_plan(len(sections), len(flagged))
+    
+    async def review_one(i: int) -> str:
+        try:
+            response = await llm.chat_json(**_review_request(sections[i], issues[i]))
+            return _apply_edits(sections[i], response)
+        except Exception as e:
+            print(f"   ⚠️  섹션 검수 실패: {e}, 원본 유지")
+            return sections[i]
+    
+    reviewed = list(sections)
+    results = await asyncio.gather(*(review_one(i) for i in flagged))
+    for i, text in zip(flagged, results):
+        reviewed[i] = text
+    return reviewed
+
+
+def _print_review_plan(total: int, flagged: int) -> None:
+    if flagged:
+        print(f"   🔎 검수 대상: {flagged}/{total}개 섹션 (나머지는 로컬 검사 통과)")
+    else:
+        print(f"   ✅ {total}개 섹션 모두 로컬 검사 통과, LLM 검수 생략")
+
+
+def _section_issues(sections: List[str]) -> List[List[str]]:
+    """Local checks per section: external URLs, English reasoning, duplicates.
+    
+    A line repeated within a section, or already used by an earlier
+    section, is a duplicate (the first occurrence is kept). Lines the
+    writer adds itself (links, story tags) are not checked.
+    """
+    seen = set()
+    issues = []
+    for section in sections:
+        found = []
+        for url in _EXTERNAL_URL.findall(section):
+            found.append(f"외부 링크: {url}")
+        for line in section.splitlines():
+            stripped = line.strip()
+            # Titles (headings, brief headers) may legitimately be English
+            is_title = stripped.startswith(("#", "**"))
+            if _REASONING_TRACE.search(stripped):
+                found.append(f"reasoning 흔적: {stripped[:80]}")
+            elif not is_title and _ENGLISH_RUN.search(_EXTERNAL_URL.sub("", stripped)):
+                found.append(f"영어 문장: {stripped[:80]}")
+            if len(stripped) < _MIN_DUPLICATE_CHARS or _is_generated(stripped):
+                continue
+            if stripped in seen:
+                found.append(f"중복 문장: {stripped[:80]}")
+            seen.add(stripped)
+        issues.append(found)
+    return issues
+
+
+def _is_generated(line: str) -> bool:
+    return "자세히 보기" in line or line.startswith(_STORY_TAG)
+
+
+def _review_request(section: str, issues: List[str]) -> dict:
+    return dict(
+        user_prompt=REVIEW_PROMPT.format(
+            issues="\n".join(f"- {issue}" for issue in issues),
+            section=section,
+        ),
+        system_prompt=SYSTEM_PROMPT,
+        temperature=0.2,
+        max_tokens=1000,
+        schema={"edits": list},
+        model_override="solar-pro",  # non-reasoning model for editing
+    )
+
+
+def _apply_edits(section: str, response: Any) -> str:
+    """Apply find/replace edits whose find text occurs in the section.
+    
+    Edits that would change the title line or remove a botmadang.org
+    link or story tag are skipped; if nothing but title and link would
+    remain, none are applied.
+    """
+    edits = response.get("edits", []) if isinstance(response, dict) else response
+    title = section.split("\n", 1)[0]
+    text = section
+    applied = 0
+    for edit in edits if isinstance(edits, list) else []:
+        if not isinstance(edit, dict):
+            continue
+        find = edit.get("find")
+        replace = edit.get("replace") or ""
+        if not isinstance(find, str) or not find or find not in text:
+            continue
+        edited = text.replace(find, str(replace), 1)
+        if not edited.startswith(title) or any(
+            edited.count(kept) < text.count(kept) for kept in _PROTECTED
+        ):
+            continue
+        text = edited
+        applied += 1
+    
+    if not applied:
+        return section
+    body = re.sub(r'👉\s*|\[자세히 보기\]\([^)]*\)', '', text[len(title):])
+    if not body.strip():
+        print("   ⚠️  검수 수정이 본문을 모두 지움, 원본 유지")
+        return section
+    print(f"   ✅ 섹션 검수: {applied}건 수정")
+    # Deleted lines can leave runs of blank lines behind
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def _sanitize_links(digest: str) -> str:
+    """Regex-based cleanup of external links and blank lines."""
     # Remove external URLs (keep only botmadang.org links)
     external_link_pattern = r'\[([^\]]*)\]\(https?://(?!botmadang\.org)[^\)]+\)'
     digest = re.sub(external_link_pattern, r'\1', digest)
@@ -296,6 +556,14 @@ def review_digest(digest: str, llm: LLMClient) -> str:
     return digest.strip()
 
 
+def _format_discussion(post: Post) -> str:
+    """Comment highlights block for the deep-dive prompt ("" if none)."""
+    highlights = format_comment_highlights(post)
+    if not highlights:
+        return ""
+    return f"\n=== 댓글 하이라이트 ===\n{highlights}\n"
+
+
 def _generate_intro(topic_names: List[str], post_count: int) -> str:
     """Generate intro (no LLM)."""
     previews = "・".join(topic_names)
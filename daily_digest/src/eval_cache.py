@@ -0,0 +1,129 @@
+"""Persistent cross-day cache of post evaluation verdicts.
+
+Popular posts stay digest candidates for up to TOP_POSTS_LOOKBACK_DAYS,
+so their verdicts are stored keyed by post id, a hash of the post's
+title and content, and an evaluation version (model + prompt). Only
+explicit verdicts are stored (selected, or excluded as junk). Excluded
+posts are not sent again; selected posts skip the shard rounds but are
+re-judged in the final round. A post goes through the full evaluation
+again when it is new, was edited, merely missed a shortlist, or when
+the model or prompt changed.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .firebase_reader import Post
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    post_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    include INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    reason TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    PRIMARY KEY (post_id, version)
+);
+"""
+
+
+def content_hash(post: Post) -> str:
+    """Hash of what the evaluator judges (title and content)."""
+    payload = f"{post.title}\n{post.content}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class Verdict:
+    """A stored evaluation of one post version."""
+    include: bool
+    score: int
+    reason: str
+
+
+class EvaluationCache:
+    """SQLite store of verdicts with age-based expiry."""
+
+    def __init__(
+        self,
+        path: str,
+        max_age_seconds: float = 8 * 24 * 3600,
+        read_enabled: bool = True,
+    ):
+        """Open (or create) the cache and drop expired verdicts.
+
+        Args:
+            path: SQLite file path
+            max_age_seconds: Verdicts older than this are removed
+            read_enabled: If False, verdicts are stored but never returned
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds
+        self.read_enabled = read_enabled
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(
+            "DELETE FROM verdicts WHERE created_at < ?",
+            (time.time() - max_age_seconds,),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, posts: List[Post], version: str) -> Dict[str, Verdict]:
+        """Verdicts for posts whose content is unchanged, keyed by post id."""
+        if not self.read_enabled or not posts:
+            return {}
+        hashes = {p.id: content_hash(p) for p in posts}
+        ids = list(hashes)
+        rows = []
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    "SELECT post_id, content_hash, include, score, reason FROM verdicts "
+                    f"WHERE version = ? AND post_id IN ({placeholders})",
+                    [version, *chunk],
+                ).fetchall())
+        return {
+            post_id: Verdict(include=bool(include), score=score, reason=reason)
+            for post_id, stored_hash, include, score, reason in rows
+            if hashes[post_id] == stored_hash
+        }
+
+    def put_many(self, verdicts: Iterable[Tuple[Post, Verdict]], version: str) -> int:
+        """Store (post, Verdict) pairs.
+
+        Returns:
+            Number of verdicts written
+        """
+        now = time.time()
+        rows = [
+            (post.id, version, content_hash(post), int(v.include), int(v.score), v.reason, now)
+            for post, v in verdicts
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO verdicts "
+                "(post_id, version, content_hash, include, score, reason, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
@@ -1,15 +1,48 @@
 """Firebase Firestore read-only client for Daily Digest."""
-from datetime import datetime
-from typing import List, Optional
-from dataclasses import dataclass
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
 from .config import get_config
+from .parallel import map_concurrently
 
+if TYPE_CHECKING:
+    from .post_mirror import PostMirror
 
-@dataclass
+
+# Fields needed to rank candidates. Full `content` is loaded separately
+# (see FirebaseReader.load_content) only for posts that survive ranking.
+CANDIDATE_FIELDS = [
+    "title",
+    "submadang",
+    "author_id",
+    "author_name",
+    "upvotes",
+    "downvotes",
+    "comment_count",
+    "created_at",
+    "url",
+]
+
+# Fields needed to refresh counters of mirrored posts (created_at is kept
+# because the paging cursor orders by it)
+COUNTER_FIELDS = ["upvotes", "downvotes", "comment_count", "created_at"]
+
+# Engagement fields the popular-posts query may order by
+POPULAR_ORDER_FIELDS = ("upvotes", "comment_count")
+
+# Firestore `in` filters accept at most 30 values
+IN_QUERY_MAX_VALUES = 30
+
+# Re-read a little before the watermark to catch late-committed writes
+MIRROR_SYNC_OVERLAP = timedelta(minutes=5)
+
+
+@dataclass(slots=True)
 class Post:
     """Post data structure."""
     id: str
@@ -23,6 +56,8 @@ class Post:
     comment_count: int
     created_at: datetime
     url: Optional[str] = None
+    content_loaded: bool = True  # False for projection-only (candidate scan) reads
+    top_comments: List["Comment"] = field(default_factory=list)
     
     @property
     def score(self) -> int:
@@ -48,6 +83,15 @@ class Post:
         return (engagement + 1) / (age_hours ** 1.5)
 
 
+@dataclass(slots=True)
+class Comment:
+    """Comment highlight attached to a digest candidate."""
+    post_id: str
+    author_name: str
+    content: str
+    upvotes: int
+
+
 class FirebaseReader:
     """Read-only Firestore client."""
     
@@ -61,17 +105,23 @@ class FirebaseReader:
             firebase_admin.initialize_app(cred)
         
         self.db = firestore.client()
+        # (post id, per_post, max_chars) -> comments
+        self._comment_cache: Dict[Tuple[str, int, int], List[Comment]] = {}
+        self._comment_lock = threading.Lock()
     
     def get_posts_since(
         self,
         since: datetime,
-        limit: int = 100
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
     ) -> List[Post]:
         """Get posts created since the given datetime.
         
         Args:
             since: Start datetime (inclusive)
             limit: Maximum number of posts to fetch
+            fields: Optional field projection (e.g. CANDIDATE_FIELDS).
+                    Projected posts have empty content until load_content().
             
         Returns:
             List of Post objects, sorted by created_at desc
@@ -83,18 +133,66 @@ class FirebaseReader:
             .order_by("created_at", direction=firestore.Query.DESCENDING)
             .limit(limit)
         )
+        if fields:
+            query = query.select(fields)
         
         docs = query.stream()
-        return [self._doc_to_post(doc) for doc in docs]
+        return [self._doc_to_post(doc, content_loaded=not fields) for doc in docs]
+    
+    def iter_posts_since(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        page_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Post]:
+        """Lazily iterate over every post in a time window.
+        
+        Pages through the window with start_after() cursors, so there is
+        no overall limit and only one page is held in memory at a time.
+        
+        Args:
+            since: Start datetime (inclusive)
+            until: Optional end datetime (exclusive)
+            page_size: Documents per request (default: Config.FETCH_PAGE_SIZE)
+            fields: Optional field projection (e.g. CANDIDATE_FIELDS)
+            
+        Yields:
+            Post objects, newest first
+        """
+        page_size = page_size or get_config().FETCH_PAGE_SIZE
+        
+        query = self.db.collection("posts").where("created_at", ">=", since)
+        if until is not None:
+            query = query.where("created_at", "<", until)
+        query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
+        if fields:
+            query = query.select(fields)
+        
+        cursor = None
+        while True:
+            page = query.limit(page_size)
+            if cursor is not None:
+                page = page.start_after(cursor)
+            
+            docs = list(page.stream())
+            for doc in docs:
+                yield self._doc_to_post(doc, content_loaded=not fields)
+            
+            if len(docs) < page_size:
+                return
+            cursor = docs[-1]
     
     def get_top_posts(
         self,
-        limit: int = 50
+        limit: int = 50,
+        fields: Optional[List[str]] = None,
     ) -> List[Post]:
         """Get top posts by upvotes.
         
         Args:
             limit: Maximum number of posts to fetch
+            fields: Optional field projection (e.g. CANDIDATE_FIELDS)
             
         Returns:
             List of Post objects, sorted by upvotes desc
@@ -105,9 +203,244 @@ class FirebaseReader:
             .order_by("upvotes", direction=firestore.Query.DESCENDING)
             .limit(limit)
         )
+        if fields:
+            query = query.select(fields)
+        
+        docs = query.stream()
+        return [self._doc_to_post(doc, content_loaded=not fields) for doc in docs]
+    
+    def get_popular_posts_since(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        order_by: str = "upvotes",
+        fields: Optional[List[str]] = None,
+    ) -> List[Post]:
+        """Get the most engaged posts created within a time window.
+        
+        Unlike get_top_posts(), every document read is recent enough to be
+        a digest candidate. Needs the (order_by, created_at) composite
+        indexes in firestore.indexes.json.
+        
+        Args:
+            since: Start datetime (inclusive)
+            until: Optional end datetime (exclusive)
+            limit: Maximum number of posts to fetch
+            order_by: Engagement field, one of POPULAR_ORDER_FIELDS
+            fields: Optional field projection (e.g. CANDIDATE_FIELDS)
+            
+        Returns:
+            List of Post objects, sorted by order_by desc
+        """
+        if order_by not in POPULAR_ORDER_FIELDS:
+            raise ValueError(f"Unsupported order_by: {order_by}")
+        
+        query = self.db.collection("posts").where("created_at", ">=", since)
+        if until is not None:
+            query = query.where("created_at", "<", until)
+        query = (
+            query
+            .order_by(order_by, direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        if fields:
+            query = query.select(fields)
         
         docs = query.stream()
-        return [self._doc_to_post(doc) for doc in docs]
+        return [self._doc_to_post(doc, content_loaded=not fields) for doc in docs]
+    
+    def get_top_comments(
+        self,
+        post_ids: List[str],
+        per_post: int = 3,
+        max_chars: int = 300,
+        comment_counts: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, List[Comment]]:
+        """Get the most upvoted comments for many posts at once.
+        
+        Post ids are split into `in`-query chunks of IN_QUERY_MAX_VALUES
+        that are streamed concurrently (using the post_id + upvotes
+        index). Each chunk query is limited to the comments its posts
+        still need; a busy post can fill that limit, so posts left short
+        are queried again (without the posts that are done) until all
+        are done or their comments run out. Results are cached on the
+        reader per post and limits.
+        
+        Args:
+            post_ids: Posts to load comments for
+            per_post: Maximum comments kept per post
+            max_chars: Maximum total comment text kept per post
+            comment_counts: Known comment count per post; a post is done
+                            once that many comments were read
+            
+        Returns:
+            Mapping of post id -> comments, most upvoted first
+        """
+        counts = comment_counts or {}
+        with self._comment_lock:
+            missing = [
+                pid for pid in dict.fromkeys(post_ids)
+                if (pid, per_post, max_chars) not in self._comment_cache
+            ]
+        
+        chunks = [
+            missing[i:i + IN_QUERY_MAX_VALUES]
+            for i in range(0, len(missing), IN_QUERY_MAX_VALUES)
+        ]
+        
+        def fetch_chunk(chunk: List[str]) -> Dict[str, List[Comment]]:
+            found: Dict[str, List[Comment]] = {pid: [] for pid in chunk}
+            used_chars: Dict[str, int] = {pid: 0 for pid in chunk}
+            seen: Dict[str, Set[str]] = {pid: set() for pid in chunk}  # doc ids read
+            
+            def needed(pid: str) -> int:
+                if used_chars[pid] >= max_chars:
+                    return 0
+                need = per_post - len(found[pid])
+                if pid in counts:
+                    need = min(need, counts[pid] - len(seen[pid]))
+                return max(need, 0)
+            
+            open_posts = [pid for pid in chunk if needed(pid)]
+            while open_posts:
+                # Earlier reads of these posts come back first (same order)
+                limit = sum(needed(pid) + len(seen[pid]) for pid in open_posts)
+                query = (
+                    self.db.collection("comments")
+                    .where("post_id", "in", open_posts)
+                    .order_by("upvotes", direction=firestore.Query.DESCENDING)
+                    .limit(limit)
+                    .select(["post_id", "author_name", "content", "upvotes"])
+                )
+                streamed = 0
+                for doc in query.stream():
+                    streamed += 1
+                    data = doc.to_dict() or {}
+                    pid = data.get("post_id")
+                    if pid not in seen or doc.id in seen[pid] or not needed(pid):
+                        continue
+                    seen[pid].add(doc.id)
+                    text = (data.get("content") or "").strip()
+                    if not text:
+                        continue
+                    text = text[:max_chars - used_chars[pid]]
+                    used_chars[pid] += len(text)
+                    found[pid].append(Comment(
+                        post_id=pid,
+                        author_name=data.get("author_name", ""),
+                        content=text,
+                        upvotes=data.get("upvotes", 0),
+                    ))
+                if streamed < limit:
+                    break  # every comment of the open posts was read
+                open_posts = [pid for pid in open_posts if needed(pid)]
+            return found
+        
+        fetched = map_concurrently(fetch_chunk, chunks, max_workers=get_config().FETCH_MAX_WORKERS)
+        with self._comment_lock:
+            for found in fetched:
+                for pid, comments in found.items():
+                    self._comment_cache[(pid, per_post, max_chars)] = comments
+            return {
+                pid: self._comment_cache.get((pid, per_post, max_chars), [])
+                for pid in post_ids
+            }
+    
+    def load_content(self, posts: List[Post]) -> List[Post]:
+        """Fill in full content for projection-only posts.
+        
+        Uses a single batched get_all() for every post that is still
+        missing its content. Posts are updated in place.
+        
+        Args:
+            posts: Posts that survived ranking (typically a few dozen)
+            
+        Returns:
+            The same list, with content loaded
+        """
+        pending = {p.id: p for p in posts if not p.content_loaded}
+        if not pending:
+            return posts
+        
+        posts_ref = self.db.collection("posts")
+        refs = [posts_ref.document(post_id) for post_id in pending]
+        
+        for doc in self.db.get_all(refs, field_paths=["content"]):
+            post = pending.get(doc.id)
+            if post is None or not doc.exists:
+                continue
+            post.content = (doc.to_dict() or {}).get("content", "")
+            post.content_loaded = True
+        
+        return posts
+    
+    def sync_mirror(self, mirror: "PostMirror", force: bool = False) -> dict:
+        """Incrementally sync a local PostMirror from Firestore.
+        
+        1. Copies posts created since the stored watermark (full documents)
+        2. Refreshes vote/comment counters for recent posts only, and
+           drops recent mirrored posts that no longer exist in Firestore
+        
+        Args:
+            mirror: Local mirror to update
+            force: Sync even if the last sync was very recent
+            
+        Returns:
+            Dict with sync stats
+        """
+        config = get_config()
+        now = datetime.now(timezone.utc)
+        
+        last_synced = mirror.get_meta("last_synced_at")
+        if not force and last_synced:
+            elapsed = now - datetime.fromisoformat(last_synced)
+            if elapsed < timedelta(minutes=config.MIRROR_SYNC_INTERVAL_MINUTES):
+                return {"skipped": True, "synced": 0, "refreshed": 0, "deleted": 0}
+        
+        # 1. New posts since watermark
+        watermark = mirror.get_watermark()
+        since = (
+            watermark - MIRROR_SYNC_OVERLAP
+            if watermark
+            else datetime(1970, 1, 1, tzinfo=timezone.utc)
+        )
+        
+        synced = 0
+        latest = watermark
+        batch: List[Post] = []
+        for post in self.iter_posts_since(since):
+            batch.append(post)
+            created = post.created_at if post.created_at.tzinfo else post.created_at.replace(tzinfo=timezone.utc)
+            if latest is None or created > latest:
+                latest = created
+            if len(batch) >= 500:
+                synced += mirror.upsert(batch)
+                batch = []
+        if batch:
+            synced += mirror.upsert(batch)
+        
+        # 2. Counters of recent posts (projection only); this scan sees
+        # every post of the window, so mirrored ones it misses were deleted
+        refresh_since = now - timedelta(hours=config.MIRROR_REFRESH_HOURS)
+        refreshed = 0
+        present = set()
+        batch = []
+        for post in self.iter_posts_since(refresh_since, fields=COUNTER_FIELDS):
+            present.add(post.id)
+            batch.append(post)
+            if len(batch) >= 500:
+                refreshed += mirror.update_counters(batch)
+                batch = []
+        if batch:
+            refreshed += mirror.update_counters(batch)
+        deleted = mirror.delete_missing(refresh_since, present)
+        
+        if latest is not None:
+            mirror.set_watermark(latest)
+        mirror.set_meta("last_synced_at", now.isoformat())
+        
+        return {"skipped": False, "synced": synced, "refreshed": refreshed, "deleted": deleted}
     
     def test_connection(self) -> dict:
         """Test Firebase connection and return stats.
@@ -133,7 +466,7 @@ class FirebaseReader:
                 "error": str(e)
             }
     
-    def _doc_to_post(self, doc) -> Post:
+    def _doc_to_post(self, doc, content_loaded: bool = True) -> Post:
         """Convert Firestore document to Post object."""
         data = doc.to_dict()
         
@@ -158,4 +491,5 @@ class FirebaseReader:
             comment_count=data.get("comment_count", 0),
             created_at=created_at,
             url=data.get("url"),
+            content_loaded=content_loaded,
         )
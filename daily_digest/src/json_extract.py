@@ -0,0 +1,219 @@
+"""Single-pass JSON extraction and repair for LLM responses.
+
+Solar-Pro3 answers often wrap the JSON in reasoning, code fences or
+drafts, and sometimes emit trailing commas, Python literals or output
+truncated by max_tokens. extract_json() scans the text once, balancing
+brackets (string-aware), and returns the last candidate that parses -
+after repair if needed - and matches the caller's schema.
+"""
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+# Required top-level keys and their types, e.g. {"selected": list}
+Schema = Dict[str, Union[Type, Tuple[Type, ...]]]
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {
+    "true": "true", "True": "true", "TRUE": "true",
+    "false": "false", "False": "false", "FALSE": "false",
+    "null": "null", "None": "null", "none": "null", "NULL": "null",
+}
+_WORD = re.compile(r"[A-Za-z_]+")
+
+# Cut-back attempts per open bracket, keeps repair linear on long prose
+_MAX_CUT_ATTEMPTS = 20
+
+
+class _Scan:
+    """Bracket spans found by one pass over the text."""
+    __slots__ = ("spans", "open", "in_string", "cuts")
+
+    def __init__(self):
+        self.spans: List[Tuple[int, int]] = []  # balanced (start, end), any depth
+        self.open: List[Tuple[int, str]] = []  # (start, bracket) still open at EOF
+        self.in_string = False  # EOF inside a string
+        # (offset of a "," where truncated text can be cut, brackets open there)
+        self.cuts: List[Tuple[int, str]] = []
+
+
+def _scan(text: str) -> _Scan:
+    """Find balanced {...} / [...] spans and what is left open at EOF."""
+    scan = _Scan()
+    stack: List[Tuple[int, str]] = []
+    in_string = False
+    escape = False
+
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c in "{[":
+            stack.append((i, c))
+        elif not stack:
+            continue  # prose outside brackets (quotes here are not JSON)
+        elif c == '"':
+            in_string = True
+        elif c in "}]":
+            start, opener = stack.pop()
+            if _CLOSERS[opener] != c:
+                # Mismatched closer: not JSON, forget everything open
+                stack.clear()
+                continue
+            scan.spans.append((start, i + 1))
+        elif c == ",":
+            scan.cuts.append((i, "".join(b for _, b in stack)))
+
+    scan.open = stack
+    scan.in_string = in_string
+    return scan
+
+
+def _normalize(fragment: str) -> str:
+    """Fix Python/uppercase literals and trailing commas outside strings."""
+    out: List[str] = []
+    in_string = False
+    escape = False
+    i = 0
+    n = len(fragment)
+    while i < n:
+        c = fragment[i]
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            i += 1
+            continue
+        if c == '"':
+            in_string = True
+        elif c in "}]":
+            # Drop a trailing comma before the closer
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+        elif c.isascii() and c.isalpha():
+            word = _WORD.match(fragment, i).group()
+            out.append(_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _close(fragment: str, openers: str, in_string: bool) -> str:
+    """Complete a truncated fragment with closers for the open brackets."""
+    if in_string:
+        fragment += '"'
+    fragment = fragment.rstrip()
+    if fragment.endswith(","):
+        fragment = fragment[:-1]
+    elif fragment.endswith(":"):
+        fragment += " null"
+    return fragment + "".join(_CLOSERS[b] for b in reversed(openers))
+
+
+def _loads(fragment: str) -> Tuple[bool, Any]:
+    try:
+        return True, json.loads(fragment)
+    except ValueError:
+        pass
+    try:
+        return True, json.loads(_normalize(fragment))
+    except ValueError:
+        return False, None
+
+
+def _candidates(text: str, scan: _Scan) -> Iterator[Tuple[bool, Any]]:
+    """Repaired tail, complete spans (latest end first, outermost first),
+    then empty repairs.
+
+    Whatever is open at EOF starts after every complete span outside it,
+    so a final answer cut off by max_tokens is tried before earlier
+    examples or drafts. Repairs to an empty value (a stray "[" in
+    trailing prose) only come last.
+    """
+    empty: List[Tuple[bool, Any]] = []
+    for ok, value in _truncated_candidates(text, scan):
+        if ok and value:
+            yield ok, value
+        elif ok:
+            empty.append((ok, value))
+    for start, end in sorted(scan.spans, key=lambda span: (-span[1], span[0])):
+        yield _loads(text[start:end])
+    yield from empty
+
+
+def _is_bare_list(value: Any, schema: Optional[Schema]) -> bool:
+    """A list answering a schema with a single list-typed key."""
+    return (
+        isinstance(value, list) and schema is not None
+        and len(schema) == 1 and next(iter(schema.values())) is list
+    )
+
+
+def _truncated_candidates(text: str, scan: _Scan) -> Iterator[Tuple[bool, Any]]:
+    """Repair output cut off before its closers, outermost opener first.
+
+    Closes what is open at EOF, else cuts back to the last complete
+    element (a "," at the same or deeper level) and closes from there.
+    """
+    for level, (start, _) in enumerate(scan.open):
+        openers = "".join(b for _, b in scan.open[level:])
+        yield _loads(_close(text[start:], openers, scan.in_string))
+        attempts = 0
+        for offset, open_then in reversed(scan.cuts):
+            if offset <= start or attempts >= _MAX_CUT_ATTEMPTS:
+                break
+            if len(open_then) > level:
+                attempts += 1
+                yield _loads(_close(text[start:offset], open_then[level:], False))
+
+
+def matches_schema(value: Any, schema: Optional[Schema]) -> bool:
+    """Check required top-level keys and types."""
+    if schema is None:
+        return isinstance(value, (dict, list))
+    if not isinstance(value, dict):
+        return False
+    return all(
+        key in value and isinstance(value[key], expected)
+        for key, expected in schema.items()
+    )
+
+
+def extract_json(text: str, schema: Optional[Schema] = None) -> Any:
+    """Return the last JSON object/array in text that parses and matches schema.
+
+    Handles:
+    - Pure JSON, JSON in markdown code blocks, JSON after reasoning
+    - Trailing commas and True/False/None literals
+    - Output truncated before the closing brackets
+
+    Raises:
+        ValueError: If no candidate can be recovered
+    """
+    scan = _scan(text)
+    bare_list = None
+    for ok, value in _candidates(text, scan):
+        if not ok:
+            continue
+        if matches_schema(value, schema):
+            return value
+        if bare_list is None and _is_bare_list(value, schema):
+            bare_list = value
+
+    # [...] instead of {"selected": [...]} - only if nothing matched exactly
+    if bare_list is not None:
+        return bare_list
+    raise ValueError(f"Could not parse JSON from response: {text[:200]}...")
@@ -0,0 +1,131 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Responses are stored as one JSON file per request, named by the SHA-256
+of the request parameters (model, messages, temperature, max_tokens,
+reasoning_effort). Re-running the same date after a crash or a failed
+email step then returns identical prompts from disk.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class LLMCache:
+    """Persistent LLM response cache with size- and age-based eviction."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 200 * 1024 * 1024,
+        max_age_seconds: float = 14 * 24 * 3600,
+        read_enabled: bool = True,
+    ):
+        """Open the cache directory and evict stale entries.
+
+        Args:
+            directory: Cache root directory
+            max_bytes: Total size limit; oldest entries are evicted first
+            max_age_seconds: Entries older than this are ignored and removed
+            read_enabled: If False, responses are still stored but never
+                          returned (refresh mode)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.read_enabled = read_enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.evict()
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """Stable hash of the request parameters."""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on miss."""
+        if not self.read_enabled:
+            self._count(hit=False)
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.max_age_seconds:
+            path.unlink(missing_ok=True)
+            self._count(hit=False)
+            return None
+
+        # Touch for LRU-style eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry.get("response")
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response (atomic write)."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "response": response}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones over max_bytes.
+
+        Returns:
+            Number of files removed
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            entries.sort()  # oldest first
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
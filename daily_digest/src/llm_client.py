@@ -1,53 +1,54 @@
 """Solar-Pro3 LLM client via Upstage API."""
-import json
-import re
-import time
-from typing import Any, Optional
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from .config import get_config
+from .json_extract import Schema, extract_json
+from .llm_cache import LLMCache
+from .rate_limiter import RateLimiter
+from .llm_stream import JsonEnd, StreamCollector, extract_korean
+from .retry import CircuitBreaker, RetryPolicy, call_with_retry, call_with_retry_async
 
 
-class LLMClient:
-    """Client for Solar LLM via Upstage API."""
+def _estimate_request_tokens(messages: List[dict], max_tokens: int) -> int:
+    """Worst-case token estimate for rate limiting (settled after the call)."""
+    prompt_chars = sum(len(m["content"]) for m in messages)
+    return prompt_chars + max_tokens
+
+
+class _BaseLLMClient:
+    """Request building, caching and response parsing shared by the
+    sync and async clients."""
     
-    def __init__(self, model_override: Optional[str] = None):
-        """Initialize OpenAI-compatible client for Upstage.
-        
-        Args:
-            model_override: Use a specific model instead of config default.
-                           e.g. "solar-pro" for non-reasoning tasks.
-        """
+    def __init__(
+        self,
+        model_override: Optional[str] = None,
+        cache: Optional[LLMCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         config = get_config()
-        self.client = OpenAI(
-            api_key=config.UPSTAGE_API_KEY,
-            base_url=config.UPSTAGE_BASE_URL,
-        )
         self.model = model_override or config.SOLAR_MODEL
+        self.stream = config.LLM_STREAM
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker
     
-    def chat(
+    def _build_request(
         self,
         user_prompt: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
-        max_tokens: int = 4000,
-        reasoning_effort: str = "low",
-        model_override: Optional[str] = None,
-    ) -> str:
-        """Send a chat completion request.
-        
-        Args:
-            user_prompt: User message
-            system_prompt: Optional system message
-            temperature: Sampling temperature
-            max_tokens: Maximum response tokens
-            reasoning_effort: Reasoning level for Solar-Pro3 ("low", "medium", "high")
-            model_override: Use a different model for this specific call
-            
-        Returns:
-            Assistant's response text
-        """
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        reasoning_effort: str,
+        model_override: Optional[str],
+    ) -> Dict[str, Any]:
+        """Build chat.completions.create() kwargs."""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -64,12 +65,30 @@ class LLMClient:
         # Only pass reasoning_effort for reasoning models
         if "pro3" in model:
             kwargs["reasoning_effort"] = reasoning_effort
-        
-        response = self.client.chat.completions.create(**kwargs)
-        
-        # Rate limit delay - 1 second between calls
-        time.sleep(1)
-        
+        return kwargs
+    
+    def _cache_lookup(self, kwargs: Dict[str, Any], use_cache: bool) -> Tuple[Optional[str], Optional[str]]:
+        """Return (cache_key, cached_response)."""
+        if self.cache is None:
+            return None, None
+        cache_key = LLMCache.make_key(kwargs)
+        cached = self.cache.get(cache_key) if use_cache else None
+        return cache_key, cached
+    
+    def _throttle(self, reserved_tokens: int) -> Optional[Callable[[Optional[float]], Optional[float]]]:
+        """Rate limit reservation for call_with_retry(), or None without a limiter."""
+        if self.rate_limiter is None:
+            return None
+        return lambda max_wait: self.rate_limiter.reserve(reserved_tokens, max_wait)
+    
+    def _refund(self, reserved_tokens: int) -> None:
+        """Give a failed or abandoned attempt's reserved tokens back."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(reserved_tokens, 0)
+    
+    def _finish(self, response: Any, reserved_tokens: int, cache_key: Optional[str]) -> str:
+        """Settle the rate limiter, extract the answer and store it in the cache."""
+        usage = getattr(response, "usage", None)
         message = response.choices[0].message
         
         # Solar-Pro3 is a reasoning model - check both content and reasoning fields
@@ -79,74 +98,166 @@ class LLMClient:
         if not content and hasattr(message, 'reasoning') and message.reasoning:
             content = self._extract_korean_from_reasoning(message.reasoning)
         
+        return self._complete(
+            content, reserved_tokens, getattr(usage, "total_tokens", None), cache_key
+        )
+    
+    def _finish_stream(
+        self,
+        collector: StreamCollector,
+        messages: List[dict],
+        reserved_tokens: int,
+        cache_key: Optional[str],
+    ) -> str:
+        """Like _finish() for a (possibly early-terminated) stream."""
+        used_tokens = getattr(collector.usage, "total_tokens", None)
+        if used_tokens is None:
+            # Usage is not reported for closed streams; same estimate as the reservation
+            used_tokens = _estimate_request_tokens(messages, collector.received_chars)
+        return self._complete(collector.answer(), reserved_tokens, used_tokens, cache_key)
+    
+    def _complete(
+        self,
+        content: str,
+        reserved_tokens: int,
+        used_tokens: Optional[int],
+        cache_key: Optional[str],
+    ) -> str:
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(reserved_tokens, used_tokens)
+        
+        if cache_key is not None and content:
+            self.cache.set(cache_key, content)
+        
         return content
     
     def _extract_korean_from_reasoning(self, reasoning: str) -> str:
         """Extract Korean content from reasoning, filtering out English thinking.
         
         Solar-Pro3 puts the final Korean answer at the end of its reasoning.
-        Strategy: Scan backwards to find the last substantial Korean block.
+        Strategy: Scan backwards to find the last substantial Korean block
+        (see llm_stream.ReasoningLines, which also handles streamed text).
         """
-        lines = reasoning.split('\n')
+        return extract_korean(reasoning)
+    
+    def _parse_json_response(self, text: str, schema: Optional[Schema] = None) -> Any:
+        """Parse JSON from LLM response, handling various formats.
         
-        # Scan from the end to find Korean content
-        korean_block = []
-        found_korean = False
+        Handles:
+        - Pure JSON
+        - JSON in markdown code blocks
+        - JSON with reasoning prefix (Solar-Pro3 특성)
+        - Trailing commas, Python literals, truncated closers
         
-        for line in reversed(lines):
-            stripped = line.strip()
-            
-            if not stripped:
-                if found_korean:
-                    korean_block.append(line)
-                continue
-            
-            # Count Korean characters
-            korean_chars = sum(1 for c in stripped if '\uAC00' <= c <= '\uD7A3')
-            
-            # Is this line Korean-dominant?
-            is_korean_line = korean_chars >= 3
-            
-            # Is this line clearly English reasoning?
-            is_reasoning = (
-                korean_chars == 0 and any(c.isascii() and c.isalpha() for c in stripped)
-            ) or any(marker in stripped for marker in [
-                'Let\'s', 'Actually', 'Check', 'Count', 'Wait',
-                'characters:', 'indices:', '=>', 'That\'s', 'We need',
-                'Must be', 'should be', 'Potential', 'syllable',
-                'String:', 'Proposed', 'compliance',
-            ])
-            
-            # Is this math/counting? (e.g. "+2 =4", "1 에", etc.)
-            is_math = bool(re.match(r'^[\d\s+\-=*/<>().,]+$', stripped))
+        Raises:
+            ValueError: If no JSON matching schema can be recovered
+        """
+        return extract_json(text, schema)
+
+
+class LLMClient(_BaseLLMClient):
+    """Client for Solar LLM via Upstage API."""
+    
+    def __init__(
+        self,
+        model_override: Optional[str] = None,
+        http_client: Optional[httpx.Client] = None,
+        cache: Optional[LLMCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """Initialize OpenAI-compatible client for Upstage.
+        
+        Prefer clients.get_llm_client(), which reuses one instance and a
+        shared keep-alive connection pool across the whole process.
+        
+        Args:
+            model_override: Use a specific model instead of config default.
+                           e.g. "solar-pro" for non-reasoning tasks.
+            http_client: Optional shared httpx client (connection pool)
+            cache: Optional on-disk response cache
+            rate_limiter: Optional shared limiter (requests/sec, tokens/min)
+            retry_policy: Backoff/deadline settings for transient errors
+            breaker: Optional shared circuit breaker
+        """
+        super().__init__(model_override, cache, rate_limiter, retry_policy, breaker)
+        config = get_config()
+        self.client = OpenAI(
+            api_key=config.UPSTAGE_API_KEY,
+            base_url=config.UPSTAGE_BASE_URL,
+            http_client=http_client,
+            max_retries=0,  # retries are handled by retry_policy
+        )
+    
+    def chat(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        reasoning_effort: str = "low",
+        model_override: Optional[str] = None,
+        use_cache: bool = True,
+        stream: Optional[bool] = None,
+        end_detector: Optional[Callable[[], Any]] = None,
+    ) -> str:
+        """Send a chat completion request.
+        
+        Args:
+            user_prompt: User message
+            system_prompt: Optional system message
+            temperature: Sampling temperature
+            max_tokens: Maximum response tokens
+            reasoning_effort: Reasoning level for Solar-Pro3 ("low", "medium", "high")
+            model_override: Use a different model for this specific call
+            use_cache: If False, skip the cache lookup (response is still stored)
+            stream: Stream the response (default: Config.LLM_STREAM)
+            end_detector: With streaming, factory of a detector (JsonEnd,
+                          SectionEnd) that closes the stream once the
+                          answer is complete
             
-            if is_korean_line:
-                found_korean = True
-                korean_block.append(line)
-            elif found_korean and not is_reasoning and not is_math:
-                # Allow short non-Korean lines within a Korean block (punctuation, ---  etc.)
-                if len(stripped) < 5 or stripped.startswith('#') or stripped.startswith('-'):
-                    korean_block.append(line)
-                else:
-                    break  # Hit a non-Korean substantial line, stop
-            elif found_korean and (is_reasoning or is_math):
-                break  # Hit reasoning, stop collecting
-        
-        if korean_block:
-            korean_block.reverse()
-            # Strip leading/trailing blank lines
-            while korean_block and not korean_block[0].strip():
-                korean_block.pop(0)
-            while korean_block and not korean_block[-1].strip():
-                korean_block.pop()
+        Returns:
+            Assistant's response text
+        """
+        kwargs = self._build_request(
+            user_prompt, system_prompt, temperature, max_tokens,
+            reasoning_effort, model_override,
+        )
+        
+        cache_key, cached = self._cache_lookup(kwargs, use_cache)
+        if cached is not None:
+            return cached
+        
+        reserved_tokens = _estimate_request_tokens(kwargs["messages"], max_tokens)
+        
+        stream = self.stream if stream is None else stream
+        
+        def send(timeout: Optional[float]) -> Any:
+            if not stream:
+                return self.client.chat.completions.create(timeout=timeout, **kwargs)
             
-            result = '\n'.join(korean_block)
-            # Clean up excessive blank lines
-            result = re.sub(r'\n{3,}', '\n\n', result)
-            return result.strip()
+            # Consume the stream inside the attempt so mid-stream errors are retried
+            collector = StreamCollector(end_detector)
+            response = self.client.chat.completions.create(stream=True, timeout=timeout, **kwargs)
+            try:
+                for chunk in response:
+                    if collector.feed(chunk):
+                        break  # answer complete, stop paying for tokens
+            finally:
+                response.close()
+            return collector
         
-        # Fallback: return original
-        return reasoning
+        # Transient errors (429/5xx/timeouts) are retried with backoff; the
+        # shared request/token budget is reserved before each attempt and
+        # refunded when it does not succeed
+        result = call_with_retry(
+            send, self.retry_policy, self.breaker, self._throttle(reserved_tokens),
+            lambda: self._refund(reserved_tokens),
+        )
+        if stream:
+            return self._finish_stream(result, kwargs["messages"], reserved_tokens, cache_key)
+        return self._finish(result, reserved_tokens, cache_key)
     
     def chat_json(
         self,
@@ -155,6 +266,8 @@ class LLMClient:
         temperature: float = 0.3,
         max_tokens: int = 2000,
         max_retries: int = 3,
+        schema: Optional[Schema] = None,
+        model_override: Optional[str] = None,
     ) -> Any:
         """Send a chat request expecting JSON response.
         
@@ -164,6 +277,9 @@ class LLMClient:
             temperature: Sampling temperature (lower for structured output)
             max_tokens: Maximum response tokens
             max_retries: Maximum retry attempts on JSON parse failure
+            schema: Required top-level keys and types, e.g. {"groups": list};
+                    responses that don't match are retried
+            model_override: Use a different model for this call
             
         Returns:
             Parsed JSON object
@@ -176,56 +292,142 @@ class LLMClient:
                 system_prompt=system_prompt,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                model_override=model_override,
+                use_cache=attempt == 1,  # a cached unparsable answer must not repeat
+                end_detector=lambda: JsonEnd(schema),  # stop streaming after the answer
             )
             
             try:
-                return self._parse_json_response(response_text)
+                return self._parse_json_response(response_text, schema)
             except ValueError as e:
                 last_error = e
                 if attempt < max_retries:
                     print(f"⚠️  JSON 파싱 실패 (시도 {attempt}/{max_retries}), 재시도 중...")
-                    time.sleep(1)  # Brief delay before retry
                     continue
                 else:
                     raise ValueError(f"JSON 파싱 {max_retries}회 시도 실패: {last_error}")
+
+
+class AsyncLLMClient(_BaseLLMClient):
+    """asyncio client for Solar LLM, same semantics as LLMClient.
     
-    def _parse_json_response(self, text: str) -> Any:
-        """Parse JSON from LLM response, handling various formats.
+    Many requests can be in flight on one event loop; pacing comes from
+    the shared RateLimiter instead of a thread per call.
+    """
+    
+    def __init__(
+        self,
+        model_override: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[LLMCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """Initialize AsyncOpenAI-compatible client for Upstage.
         
-        Handles:
-        - Pure JSON
-        - JSON in markdown code blocks
-        - JSON with reasoning prefix (Solar-Pro3 특성)
+        Prefer clients.get_async_llm_client().
+        
+        Args:
+            model_override: Use a specific model instead of config default
+            http_client: Optional shared httpx.AsyncClient (connection pool)
+            cache: Optional on-disk response cache
+            rate_limiter: Optional shared limiter (requests/sec, tokens/min)
+            retry_policy: Backoff/deadline settings for transient errors
+            breaker: Optional shared circuit breaker
         """
-        # Try direct parse first
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-        
-        # Try extracting from code block
-        code_block_match = re.search(r"```(?:json)?\s*([\s\S]*?)```", text)
-        if code_block_match:
-            try:
-                return json.loads(code_block_match.group(1).strip())
-            except json.JSONDecodeError:
-                pass
-        
-        # Try finding JSON object/array in text
-        # Look for {...} or [...]
-        json_obj_match = re.search(r"(\{[\s\S]*\})", text)
-        if json_obj_match:
-            try:
-                return json.loads(json_obj_match.group(1))
-            except json.JSONDecodeError:
-                pass
+        super().__init__(model_override, cache, rate_limiter, retry_policy, breaker)
+        config = get_config()
+        self.client = AsyncOpenAI(
+            api_key=config.UPSTAGE_API_KEY,
+            base_url=config.UPSTAGE_BASE_URL,
+            http_client=http_client,
+            max_retries=0,  # retries are handled by retry_policy
+        )
+    
+    async def chat(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        reasoning_effort: str = "low",
+        model_override: Optional[str] = None,
+        use_cache: bool = True,
+        stream: Optional[bool] = None,
+        end_detector: Optional[Callable[[], Any]] = None,
+    ) -> str:
+        """Send a chat completion request. See LLMClient.chat()."""
+        kwargs = self._build_request(
+            user_prompt, system_prompt, temperature, max_tokens,
+            reasoning_effort, model_override,
+        )
+        
+        # The response cache is on disk: keep its reads and writes off the loop
+        cache_key, cached = await asyncio.to_thread(self._cache_lookup, kwargs, use_cache)
+        if cached is not None:
+            return cached
         
-        json_arr_match = re.search(r"(\[[\s\S]*\])", text)
-        if json_arr_match:
+        reserved_tokens = _estimate_request_tokens(kwargs["messages"], max_tokens)
+        
+        stream = self.stream if stream is None else stream
+        
+        async def send(timeout: Optional[float]) -> Any:
+            if not stream:
+                return await self.client.chat.completions.create(timeout=timeout, **kwargs)
+            
+            collector = StreamCollector(end_detector)
+            response = await self.client.chat.completions.create(
+                stream=True, timeout=timeout, **kwargs
+            )
             try:
-                return json.loads(json_arr_match.group(1))
-            except json.JSONDecodeError:
-                pass
+                async for chunk in response:
+                    if collector.feed(chunk):
+                        break
+            finally:
+                await response.close()
+            return collector
         
-        # Fallback: return as string
-        raise ValueError(f"Could not parse JSON from response: {text[:200]}...")
+        result = await call_with_retry_async(
+            send, self.retry_policy, self.breaker, self._throttle(reserved_tokens),
+            lambda: self._refund(reserved_tokens),
+        )
+        if stream:
+            return await asyncio.to_thread(
+                self._finish_stream, result, kwargs["messages"], reserved_tokens, cache_key
+            )
+        return await asyncio.to_thread(self._finish, result, reserved_tokens, cache_key)
+    
+    async def chat_json(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        max_retries: int = 3,
+        schema: Optional[Schema] = None,
+        model_override: Optional[str] = None,
+    ) -> Any:
+        """Send a chat request expecting JSON response. See LLMClient.chat_json()."""
+        last_error = None
+        
+        for attempt in range(1, max_retries + 1):
+            response_text = await self.chat(
+                user_prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                model_override=model_override,
+                use_cache=attempt == 1,
+                end_detector=lambda: JsonEnd(schema),
+            )
+            
+            try:
+                return self._parse_json_response(response_text, schema)
+            except ValueError as e:
+                last_error = e
+                if attempt < max_retries:
+                    print(f"⚠️  JSON 파싱 실패 (시도 {attempt}/{max_retries}), 재시도 중...")
+                    continue
+                else:
+                    raise ValueError(f"JSON 파싱 {max_retries}회 시도 실패: {last_error}")
@@ -0,0 +1,291 @@
+"""Incremental handling of streamed chat completions.
+
+Streamed deltas are accumulated as they arrive: reasoning text is split
+into lines and classified once per line (for Korean answer extraction),
+and an optional end detector watches the answer so the stream can be
+closed as soon as a complete JSON value or a finished section arrived.
+"""
+import json
+import re
+from typing import Any, Callable, List, Optional
+
+from .json_extract import Schema, matches_schema
+
+# Reasoning line kinds (see classify_reasoning_line)
+BLANK = 0
+KOREAN = 1
+KEEP = 2  # short non-Korean line allowed inside a Korean block
+STOP = 3  # English reasoning, math or other text that ends a Korean block
+
+_REASONING_MARKERS = (
+    'Let\'s', 'Actually', 'Check', 'Count', 'Wait',
+    'characters:', 'indices:', '=>', 'That\'s', 'We need',
+    'Must be', 'should be', 'Potential', 'syllable',
+    'String:', 'Proposed', 'compliance',
+)
+_MATH_LINE = re.compile(r'^[\d\s+\-=*/<>().,]+$')
+
+# Link line that closes a written section (the writer strips and re-adds
+# it); 👉 alone also marks bullets and subheadings inside the section
+_SECTION_END_LINE = re.compile(r'^(👉\s*)?\[자세히 보기\]\(')
+
+
+def classify_reasoning_line(line: str) -> int:
+    """Classify one reasoning line as BLANK, KOREAN, KEEP or STOP."""
+    stripped = line.strip()
+    if not stripped:
+        return BLANK
+
+    # Count Korean characters
+    korean_chars = sum(1 for c in stripped if '\uAC00' <= c <= '\uD7A3')
+
+    # Is this line Korean-dominant?
+    if korean_chars >= 3:
+        return KOREAN
+
+    # Is this line clearly English reasoning?
+    is_reasoning = (
+        korean_chars == 0 and any(c.isascii() and c.isalpha() for c in stripped)
+    ) or any(marker in stripped for marker in _REASONING_MARKERS)
+
+    # Is this math/counting? (e.g. "+2 =4", "1 에", etc.)
+    is_math = bool(_MATH_LINE.match(stripped))
+
+    if is_reasoning or is_math:
+        return STOP
+    # Allow short non-Korean lines within a Korean block (punctuation, ---  etc.)
+    if len(stripped) < 5 or stripped.startswith('#') or stripped.startswith('-'):
+        return KEEP
+    return STOP
+
+
+class ReasoningLines:
+    """Reasoning text fed in chunks, classified line by line."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.kinds: List[int] = []
+        self._partial = ""
+
+    def feed(self, chunk: str) -> None:
+        self._partial += chunk
+        if "\n" not in self._partial:
+            return
+        *complete, self._partial = self._partial.split("\n")
+        for line in complete:
+            self.lines.append(line)
+            self.kinds.append(classify_reasoning_line(line))
+
+    def text(self) -> str:
+        return "\n".join(self.lines + [self._partial])
+
+    def korean_answer(self) -> str:
+        """Last substantial Korean block, or the whole text if there is none.
+
+        Solar-Pro3 puts the final Korean answer at the end of its reasoning,
+        so the classified lines are scanned backwards.
+        """
+        lines = self.lines + [self._partial]
+        kinds = self.kinds + [classify_reasoning_line(self._partial)]
+
+        # Scan from the end to find Korean content
+        korean_block = []
+        found_korean = False
+        for line, kind in zip(reversed(lines), reversed(kinds)):
+            if kind == KOREAN:
+                found_korean = True
+                korean_block.append(line)
+            elif not found_korean:
+                continue
+            elif kind == STOP:
+                break  # Hit reasoning, stop collecting
+            else:
+                korean_block.append(line)
+
+        if not korean_block:
+            # Fallback: return original
+            return "\n".join(lines)
+
+        korean_block.reverse()
+        # Strip leading/trailing blank lines
+        while korean_block and not korean_block[0].strip():
+            korean_block.pop(0)
+        while korean_block and not korean_block[-1].strip():
+            korean_block.pop()
+
+        result = '\n'.join(korean_block)
+        # Clean up excessive blank lines
+        result = re.sub(r'\n{3,}', '\n\n', result)
+        return result.strip()
+
+
+def extract_korean(reasoning: str) -> str:
+    """Extract the Korean answer from a complete reasoning text."""
+    lines = ReasoningLines()
+    lines.feed(reasoning)
+    return lines.korean_answer()
+
+
+class JsonEnd:
+    """Detects the end of a JSON answer that starts the stream.
+
+    Only a value at the very start of the content (optionally after a
+    ```json fence) can end the stream early. Answers that open with prose
+    may hold drafts or examples before the final JSON, which
+    json_extract picks as the last value, so those are read to the end.
+    Brackets are balanced in one pass (string-aware); the leading value
+    only counts if it parses and matches the schema.
+    """
+
+    # Scan states
+    _LEAD = 0  # whitespace before the value
+    _FENCE = 1  # rest of the opening ``` line
+    _VALUE = 2
+    _OFF = 3  # no leading value: read to the end
+
+    def __init__(self, schema: Optional[Schema] = None):
+        self._schema = schema
+        self._parts: List[str] = []
+        self._offset = 0
+        self._state = self._LEAD
+        self._fenced = False
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """Consume a chunk; return the end offset once the leading JSON value is complete."""
+        if self._state == self._OFF:
+            return None
+        self._parts.append(chunk)
+        base = self._offset
+        self._offset += len(chunk)
+        for i, c in enumerate(chunk):
+            if self._state == self._LEAD:
+                if c.isspace():
+                    continue
+                if c == '`' and not self._fenced:
+                    self._state = self._FENCE
+                    self._fenced = True
+                elif c in '{[':
+                    self._state = self._VALUE
+                    self._start = base + i
+                    self._depth = 1
+                else:
+                    self._state = self._OFF
+                    return None
+            elif self._state == self._FENCE:
+                if c == '\n':
+                    self._state = self._LEAD
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in '{[':
+                self._depth += 1
+            elif c in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    end = base + i + 1
+                    if self._parses(end):
+                        return end
+                    self._state = self._OFF
+                    return None
+        return None
+
+    def _parses(self, end: int) -> bool:
+        text = "".join(self._parts)
+        self._parts = [text]
+        try:
+            value = json.loads(text[self._start:end])
+        except ValueError:
+            return False
+        return matches_schema(value, self._schema)
+
+
+class SectionEnd:
+    """Detects the end of a written section.
+
+    The section is complete when, after some body text, the model starts
+    a "자세히 보기" link, which the writer replaces with its own. Headings
+    and dividers do not end it: a deep dive has several subheadings
+    ("왜 중요한가?", community reaction) that must all be kept.
+    """
+
+    def __init__(self):
+        self._offset = 0  # start of the current partial line
+        self._partial = ""
+        self._body_seen = False
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """Consume a chunk; return the offset of the link line past the section."""
+        self._partial += chunk
+        while "\n" in self._partial:
+            line, self._partial = self._partial.split("\n", 1)
+            start = self._offset
+            self._offset += len(line) + 1
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if self._body_seen and _SECTION_END_LINE.match(stripped):
+                return start
+            self._body_seen = True
+        return None
+
+
+class StreamCollector:
+    """Accumulates streamed chat completion chunks."""
+
+    def __init__(self, end_detector: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            end_detector: Optional factory (e.g. JsonEnd, SectionEnd) whose
+                          feed(chunk) returns an end offset once the answer
+                          is complete
+        """
+        self._content: List[str] = []
+        self._reasoning = ReasoningLines()
+        self._detector = end_detector() if end_detector else None
+        self._end: Optional[int] = None
+        self.usage: Any = None
+        self.received_chars = 0
+
+    def feed(self, chunk: Any) -> bool:
+        """Consume one chunk; return True once the answer is complete."""
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return False
+        delta = chunk.choices[0].delta
+
+        reasoning = getattr(delta, "reasoning", None)
+        if reasoning:
+            self.received_chars += len(reasoning)
+            self._reasoning.feed(reasoning)
+
+        text = delta.content
+        if not text:
+            return False
+        self.received_chars += len(text)
+        self._content.append(text)
+        if self._detector is not None:
+            self._end = self._detector.feed(text)
+            return self._end is not None
+        return False
+
+    def answer(self) -> str:
+        """Content (cut at the detected end), else Korean text from reasoning."""
+        content = "".join(self._content)
+        if self._end is not None:
+            content = content[:self._end]
+
+        # If content is empty, try to extract Korean text from reasoning
+        if not content and self._reasoning.text():
+            content = self._reasoning.korean_answer()
+        return content
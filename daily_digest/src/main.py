@@ -1,17 +1,55 @@
 """Main entry point for Daily Digest generation."""
+import asyncio
 import sys
-from datetime import datetime
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, List, Optional, Tuple, TypeVar
 
 import click
 
+from .clients import (
+    close_async_clients,
+    close_clients,
+    configure_llm_cache,
+    get_firebase_reader,
+    get_llm_cache,
+    get_topic_tracker,
+)
 from .config import get_config
-from .firebase_reader import FirebaseReader
-from .post_fetcher import fetch_digest_candidates, format_post_summary
-from .digest_evaluator import evaluate_posts_batch
-from .topic_grouper import group_posts_by_topic, split_main_and_brief
-from .digest_writer import generate_digest
+from .firebase_reader import Post
+from .parallel import OrderedTurns, map_concurrently
+from .post_fetcher import (
+    fetch_candidates_for_dates,
+    collapse_near_duplicates,
+    drop_low_quality,
+    enrich_with_comments,
+    fetch_digest_candidates,
+    format_post_summary,
+    load_candidate_content,
+)
+from .digest_evaluator import (
+    EvaluationResult,
+    evaluate_posts_batch,
+    evaluate_posts_batch_async,
+)
+from .ranking import digest_reference_time, hot_scores
+from .topic_grouper import (
+    TopicGroup,
+    group_posts_by_topic,
+    group_posts_by_topic_async,
+    split_main_and_brief,
+)
+from .digest_writer import generate_digest, generate_digest_async
+
+
+T = TypeVar("T")
+
+# Posts taken directly by hot score with --skip-eval, after junk filtering
+# and duplicate merging
+# (LLM evaluation packs as many of the MAX_POSTS_TO_EVALUATE candidates as
+# fit its prompt)
+SKIP_EVAL_POSTS = 15
 
 
 @click.command()
@@ -21,6 +59,21 @@ from .digest_writer import generate_digest
     default=None,
     help="Target date in YYYY-MM-DD format. Defaults to today.",
 )
+@click.option(
+    "--date-range",
+    type=str,
+    nargs=2,
+    default=None,
+    metavar="START END",
+    help="Backfill every date from START to END (YYYY-MM-DD, inclusive).",
+)
+@click.option(
+    "--parallel",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of dates to process concurrently with --date-range.",
+)
 @click.option(
     "--test-connection",
     is_flag=True,
@@ -47,7 +100,34 @@ from .digest_writer import generate_digest
     is_flag=True,
     help="Send digest email to all subscribers via Resend.",
 )
-def main(date: Optional[str], test_connection: bool, fetch_only: bool, skip_eval: bool, output_dir: str, send_email: bool):
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Bypass the on-disk LLM response cache.",
+)
+@click.option(
+    "--refresh-cache",
+    is_flag=True,
+    help="Ignore cached LLM responses but store fresh ones.",
+)
+@click.option(
+    "--async-llm",
+    is_flag=True,
+    help="Run LLM stages on asyncio instead of worker threads.",
+)
+def main(
+    date: Optional[str],
+    date_range: Optional[Tuple[str, str]],
+    parallel: int,
+    test_connection: bool,
+    fetch_only: bool,
+    skip_eval: bool,
+    output_dir: str,
+    send_email: bool,
+    no_cache: bool,
+    refresh_cache: bool,
+    async_llm: bool,
+):
     """Generate a daily digest for 봇마당.
     
     Fetches posts from Firebase, evaluates them with Solar-Pro3,
@@ -61,9 +141,13 @@ def main(date: Optional[str], test_connection: bool, fetch_only: bool, skip_eval
         click.echo(f"❌ 설정 오류: {e}", err=True)
         sys.exit(1)
     
+    configure_llm_cache("off" if no_cache else "refresh" if refresh_cache else "on")
+    # Close pooled connections and SQLite stores however the command ends
+    click.get_current_context().call_on_close(close_clients)
+    
     # Test connection mode
     if test_connection:
-        reader = FirebaseReader()
+        reader = get_firebase_reader()
         result = reader.test_connection()
         if result["connected"]:
             click.echo(f"✅ Firebase 연결 성공!")
@@ -74,17 +158,16 @@ def main(date: Optional[str], test_connection: bool, fetch_only: bool, skip_eval
             sys.exit(1)
         return
     
+    # Multi-date backfill mode
+    if date_range:
+        if send_email:
+            click.echo("ℹ️  --date-range 모드에서는 이메일을 발송하지 않습니다.")
+        _run_date_range(date_range, parallel, fetch_only, skip_eval, output_dir, async_llm)
+        _echo_cache_stats()
+        return
+    
     # Parse target date
-    if date:
-        try:
-            target_date = datetime.strptime(date, "%Y-%m-%d")
-            # Set to 8 AM for digest cutoff
-            target_date = target_date.replace(hour=8, minute=0, second=0)
-        except ValueError:
-            click.echo(f"❌ 날짜 형식 오류: {date} (YYYY-MM-DD 형식 필요)", err=True)
-            sys.exit(1)
-    else:
-        target_date = datetime.now()
+    target_date = _parse_target_date(date) if date else datetime.now()
     
     date_str = target_date.strftime("%Y-%m-%d")
     click.echo(f"\n📅 다이제스트 생성: {date_str}")
@@ -102,37 +185,75 @@ def main(date: Optional[str], test_connection: bool, fetch_only: bool, skip_eval
     # Fetch-only mode
     if fetch_only:
         click.echo("\n📋 후보 포스트 목록:")
-        for i, post in enumerate(candidates[:20], 1):
+        shown = load_candidate_content(candidates[:20])
+        for i, post in enumerate(shown, 1):
             click.echo(f"\n{format_post_summary(post, i)}")
         return
     
+    digest = _run_pipeline(target_date, candidates, skip_eval, output_dir, async_llm)
+    _echo_cache_stats()
+    if digest is None:
+        return
+    
+    # Step 8: Send email (optional)
+    if send_email:
+        click.echo("\n📧 이메일 발송 중...")
+        from .email_sender import send_digest_email
+        email_result = send_digest_email(digest, date_str)
+        if email_result.get("skipped"):
+            reason = email_result.get("reason", "unknown")
+            click.echo(f"   ℹ️  이메일 발송 스킵: {reason}")
+        else:
+            click.echo(
+                "   📬 이메일 발송 결과: "
+                f"{email_result.get('sent', 0)}명 성공 / "
+                f"{email_result.get('errors', 0)}명 실패 / "
+                f"총 {email_result.get('total', 0)}명"
+            )
+    
+    # Preview
+    click.echo("\n" + "=" * 50)
+    click.echo("📝 미리보기 (처음 500자):")
+    click.echo("=" * 50)
+    click.echo(digest[:500] + "...")
+
+
+def run_digest_pipeline(
+    target_date: datetime,
+    candidates: List[Post],
+    skip_eval: bool,
+    output_dir: str,
+    topic_turns: Optional[OrderedTurns] = None,
+) -> Optional[str]:
+    """Run evaluation → grouping → writing → saving for one date.
+    
+    Uses the shared clients from the registry, so several dates can run
+    in the same process (see --date-range).
+    
+    Args:
+        topic_turns: Runs grouping in date order when dates run in
+                     parallel (keyed by target_date; see _run_date_range)
+    
+    Returns:
+        The generated digest, or None if no posts were selected
+    """
     # Step 2: Evaluate posts (or skip)
     if skip_eval:
-        click.echo("\n⚡ LLM 평가 스킵 - Hot Score 기반 선별...")
-        # Use top 15 by hot score
-        from .digest_evaluator import EvaluationResult
-        now = datetime.now()
-        evaluated = [
-            EvaluationResult(post=p, include=True, reason="Hot score 상위", score=int(p.hot_score(now) * 10))
-            for p in candidates[:15]
-        ]
-        click.echo(f"   → {len(evaluated)}개 포스트 선별됨 (상위 hot score)")
+        evaluated = _skip_eval_results(target_date, candidates)
     else:
         click.echo("\n🤖 Solar-Pro3로 포스트 평가 중...")
-        evaluated = evaluate_posts_batch(candidates[:30])  # Limit for context
+        evaluated = evaluate_posts_batch(_eval_candidates(target_date, candidates))
         click.echo(f"   → {len(evaluated)}개 포스트 선별됨")
     
     if not evaluated:
         click.echo("⚠️  선별된 포스트가 없습니다.")
-        return
+        return None
     
     # Step 3: Group by topic
     click.echo("\n📊 주제별 그루핑 중...")
-    groups = group_posts_by_topic(evaluated)
-    click.echo(f"   → {len(groups)}개 그룹 생성")
-    
-    for g in groups:
-        click.echo(f"      • {g.name} ({len(g.posts)}개 포스트, 중요도: {g.importance})")
+    with topic_turns.turn(target_date) if topic_turns else nullcontext():
+        groups = group_posts_by_topic(evaluated, target_date)
+    _echo_groups(groups)
     
     # Step 4: Split main and brief
     main_groups, brief_groups = split_main_and_brief(groups, main_count=3)
@@ -141,6 +262,122 @@ def main(date: Optional[str], test_connection: bool, fetch_only: bool, skip_eval
     click.echo("\n✍️  다이제스트 작성 중...")
     digest = generate_digest(main_groups, brief_groups, target_date)
     
+    # Step 6-7: Save to file and Firestore
+    _save_digest(target_date, digest, len(evaluated), output_dir)
+    return digest
+
+
+async def run_digest_pipeline_async(
+    target_date: datetime,
+    candidates: List[Post],
+    skip_eval: bool,
+    output_dir: str,
+    topic_turns: Optional[OrderedTurns] = None,
+) -> Optional[str]:
+    """Async variant of run_digest_pipeline() (--async-llm).
+    
+    LLM stages run as coroutines on one event loop; blocking Firestore,
+    SQLite and file I/O runs in worker threads. Several dates can share
+    the loop; the caller closes its async clients (_closing_async_clients).
+    """
+    # Step 2: Evaluate posts (or skip)
+    if skip_eval:
+        evaluated = await asyncio.to_thread(_skip_eval_results, target_date, candidates)
+    else:
+        click.echo("\n🤖 Solar-Pro3로 포스트 평가 중...")
+        posts = await asyncio.to_thread(_eval_candidates, target_date, candidates)
+        evaluated = await evaluate_posts_batch_async(posts)
+        click.echo(f"   → {len(evaluated)}개 포스트 선별됨")
+    
+    if not evaluated:
+        click.echo("⚠️  선별된 포스트가 없습니다.")
+        return None
+    
+    # Step 3: Group by topic
+    click.echo("\n📊 주제별 그루핑 중...")
+    if topic_turns is not None:
+        await topic_turns.wait_async(target_date)
+    try:
+        groups = await group_posts_by_topic_async(evaluated, target_date)
+    finally:
+        if topic_turns is not None:
+            topic_turns.done(target_date)
+    _echo_groups(groups)
+    
+    # Step 4: Split main and brief
+    main_groups, brief_groups = split_main_and_brief(groups, main_count=3)
+    
+    # Step 5: Generate digest
+    click.echo("\n✍️  다이제스트 작성 중...")
+    digest = await generate_digest_async(main_groups, brief_groups, target_date)
+    
+    # Step 6-7: Save to file and Firestore
+    await asyncio.to_thread(_save_digest, target_date, digest, len(evaluated), output_dir)
+    return digest
+
+
+async def _closing_async_clients(coro: Awaitable[T]) -> T:
+    """Await coro, then close the loop's pooled async connections."""
+    try:
+        return await coro
+    finally:
+        await close_async_clients()
+
+
+def _run_pipeline(
+    target_date: datetime,
+    candidates: List[Post],
+    skip_eval: bool,
+    output_dir: str,
+    async_llm: bool,
+) -> Optional[str]:
+    """Dispatch to the threaded or the asyncio pipeline."""
+    if async_llm:
+        return asyncio.run(_closing_async_clients(
+            run_digest_pipeline_async(target_date, candidates, skip_eval, output_dir)
+        ))
+    return run_digest_pipeline(target_date, candidates, skip_eval, output_dir)
+
+
+def _eval_candidates(target_date: datetime, candidates: List[Post]) -> List[Post]:
+    """Candidates with content loaded, junk dropped, near-duplicates merged."""
+    limit = get_config().MAX_POSTS_TO_EVALUATE
+    posts = drop_low_quality(load_candidate_content(candidates[:limit]))
+    posts = collapse_near_duplicates(posts, digest_reference_time(target_date))
+    return enrich_with_comments(posts)
+
+
+def _skip_eval_results(target_date: datetime, candidates: List[Post]) -> List[EvaluationResult]:
+    """Select the top posts by hot score only (--skip-eval)."""
+    click.echo("\n⚡ LLM 평가 스킵 - Hot Score 기반 선별...")
+    # Same reference time as candidate ranking
+    now = digest_reference_time(target_date)
+    # Filter and merge the whole candidate pool first so dropped junk and
+    # merged duplicates are backfilled
+    limit = get_config().MAX_POSTS_TO_EVALUATE
+    pool = drop_low_quality(load_candidate_content(candidates[:limit]))
+    # Use top 15 by hot score
+    top = enrich_with_comments(collapse_near_duplicates(pool, now)[:SKIP_EVAL_POSTS])
+    scores = hot_scores(top, now)
+    evaluated = [
+        EvaluationResult(post=p, include=True, reason="Hot score 상위", score=int(s * 10))
+        for p, s in zip(top, scores)
+    ]
+    click.echo(f"   → {len(evaluated)}개 포스트 선별됨 (상위 hot score)")
+    return evaluated
+
+
+def _echo_groups(groups: List[TopicGroup]) -> None:
+    click.echo(f"   → {len(groups)}개 그룹 생성")
+    
+    for g in groups:
+        click.echo(f"      • {g.name} ({len(g.posts)}개 포스트, 중요도: {g.importance})")
+
+
+def _save_digest(target_date: datetime, digest: str, post_count: int, output_dir: str) -> None:
+    """Write the digest to output_dir and to Firestore `digests/{date}`."""
+    date_str = target_date.strftime("%Y-%m-%d")
+    
     # Step 6: Save to file
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -157,38 +394,142 @@ def main(date: Optional[str], test_connection: bool, fetch_only: bool, skip_eval
     # Step 7: Save to Firestore
     click.echo("\n☁️  Firestore에 저장 중...")
     try:
-        reader = FirebaseReader()
+        reader = get_firebase_reader()
         reader.db.collection("digests").document(date_str).set({
             "content": digest,
             "date": date_str,
             "created_at": datetime.now(),
-            "post_count": len(evaluated),
+            "post_count": post_count,
         })
         click.echo(f"   ✅ Firestore 저장 완료: digests/{date_str}")
     except Exception as e:
         click.echo(f"   ⚠️  Firestore 저장 실패: {e}")
+
+
+def _echo_cache_stats() -> None:
+    """Print LLM cache hit/miss counters if the cache was used."""
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    stats = cache.stats()
+    if stats["hits"] or stats["misses"]:
+        click.echo(f"\n🗃️  LLM 캐시: 적중 {stats['hits']}회 / 미스 {stats['misses']}회")
+
+
+def _parse_target_date(date: str) -> datetime:
+    """Parse YYYY-MM-DD into the 8 AM digest cutoff, exiting on bad input."""
+    try:
+        target_date = datetime.strptime(date, "%Y-%m-%d")
+        # Set to 8 AM for digest cutoff
+        return target_date.replace(hour=8, minute=0, second=0)
+    except ValueError:
+        click.echo(f"❌ 날짜 형식 오류: {date} (YYYY-MM-DD 형식 필요)", err=True)
+        sys.exit(1)
+
+
+def _run_date_range(
+    date_range: Tuple[str, str],
+    parallel: int,
+    fetch_only: bool,
+    skip_eval: bool,
+    output_dir: str,
+    async_llm: bool = False,
+) -> None:
+    """Generate digests for every date in a range.
     
-    # Step 8: Send email (optional)
-    if send_email:
-        click.echo("\n📧 이메일 발송 중...")
-        from .email_sender import send_digest_email
-        email_result = send_digest_email(digest, date_str)
-        if email_result.get("skipped"):
-            reason = email_result.get("reason", "unknown")
-            click.echo(f"   ℹ️  이메일 발송 스킵: {reason}")
+    The union window is fetched once and sliced per day in memory; the
+    per-day pipelines then share clients (and caches) and can run in
+    parallel: on worker threads, or with --async-llm as coroutines on
+    one event loop.
+    """
+    start = _parse_target_date(date_range[0])
+    end = _parse_target_date(date_range[1])
+    if end < start:
+        click.echo(f"❌ 날짜 범위 오류: {date_range[0]} > {date_range[1]}", err=True)
+        sys.exit(1)
+    
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    click.echo(f"\n📅 다이제스트 일괄 생성: {date_range[0]} ~ {date_range[1]} ({len(dates)}일)")
+    click.echo("=" * 50)
+    
+    click.echo("\n📥 전체 기간 포스트 수집 중...")
+    # --skip-eval also filters the full pool (see _skip_eval_results)
+    content_top_n = 0 if fetch_only else get_config().MAX_POSTS_TO_EVALUATE
+    candidates_by_date = fetch_candidates_for_dates(dates, content_top_n=content_top_n)
+    
+    for target_date in dates:
+        date_str = target_date.strftime("%Y-%m-%d")
+        click.echo(f"   {date_str}: {len(candidates_by_date.get(date_str, []))}개 후보 포스트")
+    
+    if fetch_only:
+        return
+    
+    # Days finish out of order: each day's grouping matches against and
+    # records to the topic tracker, so it waits for the days before it
+    topic_turns = (
+        OrderedTurns(dates) if parallel > 1 and get_topic_tracker() is not None else None
+    )
+    
+    def candidates_for(date_str: str) -> List[Post]:
+        candidates: List[Post] = candidates_by_date.get(date_str, [])
+        if candidates:
+            click.echo(f"\n📅 다이제스트 생성: {date_str}")
         else:
-            click.echo(
-                "   📬 이메일 발송 결과: "
-                f"{email_result.get('sent', 0)}명 성공 / "
-                f"{email_result.get('errors', 0)}명 실패 / "
-                f"총 {email_result.get('total', 0)}명"
+            click.echo(f"\n⚠️  {date_str}: 후보 포스트가 없습니다.")
+        return candidates
+    
+    def pass_turn(target_date: datetime) -> None:
+        """Let later days group even if this one stopped before grouping."""
+        if topic_turns is not None:
+            topic_turns.done(target_date)
+    
+    def run_one(target_date: datetime) -> Tuple[str, Optional[str]]:
+        date_str = target_date.strftime("%Y-%m-%d")
+        try:
+            candidates = candidates_for(date_str)
+            if not candidates:
+                return date_str, None
+            return date_str, run_digest_pipeline(
+                target_date, candidates, skip_eval, output_dir, topic_turns
             )
+        except Exception as e:
+            click.echo(f"❌ {date_str} 다이제스트 생성 실패: {e}", err=True)
+            return date_str, None
+        finally:
+            pass_turn(target_date)
     
-    # Preview
+    async def run_all_async() -> List[Tuple[str, Optional[str]]]:
+        slots = asyncio.Semaphore(max(1, parallel))
+        
+        async def run_one_async(target_date: datetime) -> Tuple[str, Optional[str]]:
+            date_str = target_date.strftime("%Y-%m-%d")
+            async with slots:
+                try:
+                    candidates = candidates_for(date_str)
+                    if not candidates:
+                        return date_str, None
+                    return date_str, await run_digest_pipeline_async(
+                        target_date, candidates, skip_eval, output_dir, topic_turns
+                    )
+                except Exception as e:
+                    click.echo(f"❌ {date_str} 다이제스트 생성 실패: {e}", err=True)
+                    return date_str, None
+                finally:
+                    pass_turn(target_date)
+        
+        return list(await asyncio.gather(*(run_one_async(d) for d in dates)))
+    
+    if async_llm:
+        results = asyncio.run(_closing_async_clients(run_all_async()))
+    else:
+        results = map_concurrently(run_one, dates, max_workers=max(1, parallel))
+    
+    done = [date_str for date_str, digest in results if digest]
+    failed = [date_str for date_str, digest in results if not digest]
     click.echo("\n" + "=" * 50)
-    click.echo("📝 미리보기 (처음 500자):")
-    click.echo("=" * 50)
-    click.echo(digest[:500] + "...")
+    click.echo(f"✅ {len(done)}/{len(dates)}일 다이제스트 생성 완료")
+    if failed:
+        click.echo(f"   ⚠️  생성되지 않은 날짜: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+"""Near-duplicate detection with character-shingle MinHash and LSH.
+
+Bots often re-post the same announcement with small edits. Word
+tokenization is unreliable for Korean (particles attach to words), so
+posts are compared as sets of character k-grams of their normalized
+text. MinHash signatures are bucketed by band (LSH); only posts sharing
+a bucket are compared exactly, so the cost stays near-linear in the
+number of posts.
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SHINGLE_CHARS = 4  # about one Korean word; 4-grams also work for English
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard usually collide
+
+_NON_WORD = re.compile(r"[\W_]+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+_BASE = np.uint64(1_000_003)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and drop whitespace/punctuation (spacing varies in Korean)."""
+    return _NON_WORD.sub("", text.lower())
+
+
+def ngram_hashes(text: str, k: int) -> np.ndarray:
+    """32-bit hashes of every character k-gram of normalized text, in order.
+
+    Texts shorter than k yield one hash of the whole text.
+    """
+    codes = np.frombuffer(normalize_text(text).encode("utf-32-le"), dtype=np.uint32)
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    k = min(k, len(codes))
+    # Polynomial rolling hash over all windows at once
+    codes = codes.astype(np.uint64)
+    hashes = np.zeros(len(codes) - k + 1, dtype=np.uint64)
+    for j in range(k):
+        hashes = (hashes * _BASE + codes[j:len(codes) - k + 1 + j]) & _MASK32
+    return hashes
+
+
+def shingles(text: str, k: int = SHINGLE_CHARS) -> np.ndarray:
+    """Unique 32-bit hashes of the character k-grams of normalized text."""
+    return np.unique(ngram_hashes(text, k))
+
+
+class MinHasher:
+    """MinHash signatures from multiply-shift hash permutations."""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Odd multipliers; (a * x + b) mod 2^64, top 32 bits
+        self._a = rng.integers(1, 2**63, size=(num_permutations, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=(num_permutations, 1), dtype=np.uint64)
+        self.num_permutations = num_permutations
+
+    def signature(self, shingle_hashes: np.ndarray) -> np.ndarray:
+        if len(shingle_hashes) == 0:
+            return np.full(self.num_permutations, np.iinfo(np.uint32).max, dtype=np.uint32)
+        with np.errstate(over="ignore"):
+            permuted = (self._a * shingle_hashes[np.newaxis, :] + self._b) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sorted unique shingle arrays."""
+    if len(a) == 0 or len(b) == 0:
+        return 0.0
+    common = len(np.intersect1d(a, b, assume_unique=True))
+    return common / (len(a) + len(b) - common)
+
+
+def near_duplicate_groups(
+    texts: Sequence[str],
+    threshold: float = 0.7,
+    bands: int = BANDS,
+    hasher: Optional[MinHasher] = None,
+) -> List[List[int]]:
+    """Group indices of texts whose shingle Jaccard similarity >= threshold.
+
+    Similarity is transitive within a group (A~B and B~C puts A, B, C
+    together). Groups keep input order; singletons are included.
+
+    Args:
+        texts: Texts to compare
+        threshold: Minimum exact Jaccard similarity of a duplicate pair
+        bands: LSH bands (must divide the signature length)
+        hasher: MinHasher to use (default: NUM_PERMUTATIONS permutations)
+
+    Returns:
+        List of index groups, each sorted, ordered by first member
+    """
+    hasher = hasher or MinHasher()
+    rows = hasher.num_permutations // bands
+    sets = [shingles(t) for t in texts]
+
+    # LSH: texts sharing any band bucket are candidate pairs
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, s in enumerate(sets):
+        if len(s) == 0:
+            continue
+        signature = hasher.signature(s)
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(i)
+
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked or find(i) == find(j):
+                    continue
+                checked.add((i, j))
+                if jaccard(sets[i], sets[j]) >= threshold:
+                    parent[find(j)] = find(i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda g: g[0])
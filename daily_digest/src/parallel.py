@@ -0,0 +1,127 @@
+"""Thread-pool helpers for running independent blocking calls concurrently.
+
+Firestore streams and HTTP calls spend most of their time waiting on the
+network, so a small thread pool brings wall-clock time down to roughly
+that of the slowest call. OrderedTurns puts one step of such concurrent
+jobs back in order.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], T]],
+    max_workers: Optional[int] = None,
+) -> Dict[str, T]:
+    """Run named zero-argument callables concurrently.
+
+    Args:
+        tasks: Mapping of name -> callable
+        max_workers: Pool size (default: one thread per task)
+
+    Returns:
+        Mapping of name -> result. After all tasks have finished, the
+        exception of the first failed task in `tasks` order (not the
+        first to fail in time) is re-raised.
+    """
+    if not tasks:
+        return {}
+    if len(tasks) == 1:
+        name, task = next(iter(tasks.items()))
+        return {name: task()}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks)) as pool:
+        futures = {name: pool.submit(task) for name, task in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def map_concurrently(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 4,
+) -> List[R]:
+    """Apply fn to each item concurrently, keeping input order.
+
+    Args:
+        fn: Function to apply
+        items: Inputs
+        max_workers: Maximum concurrent calls
+
+    Returns:
+        Results in the same order as items
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+
+class OrderedTurns:
+    """Lets one step of concurrent jobs run one at a time, in a fixed order.
+
+    A job waits for its turn until every earlier key is done (ran its
+    step or gave up), so state shared across jobs (e.g. the topic tracker
+    across --date-range days) sees them in order.
+    """
+
+    def __init__(self, keys: Iterable[Hashable]):
+        self._rank = {key: i for i, key in enumerate(keys)}
+        self._done: Set[int] = set()
+        self._next = 0  # rank of the first key not done yet
+        self._cond = threading.Condition()
+        # Coroutines waiting in wait_async(): (rank, loop, future)
+        self._waiters: List[Tuple[int, asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def wait(self, key: Hashable) -> None:
+        """Block until all keys before key are done."""
+        rank = self._rank[key]
+        with self._cond:
+            self._cond.wait_for(lambda: self._next >= rank)
+
+    async def wait_async(self, key: Hashable) -> None:
+        """Async variant of wait() that does not hold a worker thread."""
+        rank = self._rank[key]
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._next >= rank:
+                return
+            ready = loop.create_future()
+            self._waiters.append((rank, loop, ready))
+        await ready
+
+    def done(self, key: Hashable) -> None:
+        """Give up key's turn (safe to call more than once)."""
+        with self._cond:
+            self._done.add(self._rank[key])
+            while self._next in self._done:
+                self._next += 1
+            self._cond.notify_all()
+            waiting = []
+            for rank, loop, ready in self._waiters:
+                if rank <= self._next:
+                    loop.call_soon_threadsafe(_resolve, ready)
+                else:
+                    waiting.append((rank, loop, ready))
+            self._waiters = waiting
+
+    @contextmanager
+    def turn(self, key: Hashable) -> Iterator[None]:
+        """Run the block in key's turn."""
+        self.wait(key)
+        try:
+            yield
+        finally:
+            self.done(key)
+
+
+def _resolve(ready: asyncio.Future) -> None:
+    if not ready.done():  # the waiter may have been cancelled
+        ready.set_result(None)
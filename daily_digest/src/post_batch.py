@@ -0,0 +1,310 @@
+"""Columnar container for large candidate sets.
+
+A PostBatch stores posts as parallel columns: compact numeric arrays
+for counters and timestamps, interned strings for submadang/author, and
+content only for rows that have actually been loaded. Ranking, filtering
+and dedupe work on row indices; Post objects are only built on demand.
+"""
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .firebase_reader import Post
+from .ranking import hot_scores_from_arrays, top_k_indices
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class PostBatch:
+    """Parallel-array storage for posts, deduplicated by id."""
+
+    __slots__ = (
+        "ids", "titles", "submadangs", "author_ids", "author_names", "urls",
+        "_upvotes", "_downvotes", "_comment_count", "_created_seconds",
+        "_aware", "_content", "_index",
+    )
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.submadangs: List[str] = []
+        self.author_ids: List[str] = []
+        self.author_names: List[str] = []
+        self.urls: List[Optional[str]] = []
+        self._upvotes = array("q")
+        self._downvotes = array("q")
+        self._comment_count = array("q")
+        self._created_seconds = array("d")  # naive seconds (tzinfo dropped)
+        self._aware = array("b")  # 1 if created_at was tz-aware (UTC)
+        self._content: Dict[int, str] = {}  # row -> content, loaded rows only
+        self._index: Dict[str, int] = {}
+
+    @classmethod
+    def from_posts(cls, posts: Iterable[Post]) -> "PostBatch":
+        batch = cls()
+        batch.extend(posts)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._index
+
+    # ── Building ───────────────────────────────
+
+    def append(self, post: Post) -> int:
+        """Add a post (no-op if its id is already present).
+
+        Returns:
+            Row index of the post
+        """
+        row = self._index.get(post.id)
+        if row is not None:
+            return row
+
+        row = len(self.ids)
+        self._index[post.id] = row
+        self.ids.append(post.id)
+        self.titles.append(post.title)
+        self.submadangs.append(sys.intern(post.submadang or ""))
+        self.author_ids.append(sys.intern(post.author_id or ""))
+        self.author_names.append(sys.intern(post.author_name or ""))
+        self.urls.append(post.url)
+        self._upvotes.append(post.upvotes or 0)
+        self._downvotes.append(post.downvotes or 0)
+        self._comment_count.append(post.comment_count or 0)
+        self._created_seconds.append((post.created_at.replace(tzinfo=None) - _EPOCH).total_seconds())
+        self._aware.append(1 if post.created_at.tzinfo else 0)
+        if post.content_loaded:
+            self._content[row] = post.content
+        return row
+
+    def extend(self, posts: Iterable[Post]) -> None:
+        for post in posts:
+            self.append(post)
+
+    def take(self, rows: Sequence[int]) -> "PostBatch":
+        """New batch holding only the given rows, in that order."""
+        batch = PostBatch()
+        for row in rows:
+            batch._copy_row(self, int(row))
+        return batch
+
+    def _copy_row(self, src: "PostBatch", row: int) -> None:
+        if src.ids[row] in self._index:
+            return
+        new_row = len(self.ids)
+        self._index[src.ids[row]] = new_row
+        self.ids.append(src.ids[row])
+        self.titles.append(src.titles[row])
+        self.submadangs.append(src.submadangs[row])
+        self.author_ids.append(src.author_ids[row])
+        self.author_names.append(src.author_names[row])
+        self.urls.append(src.urls[row])
+        self._upvotes.append(src._upvotes[row])
+        self._downvotes.append(src._downvotes[row])
+        self._comment_count.append(src._comment_count[row])
+        self._created_seconds.append(src._created_seconds[row])
+        self._aware.append(src._aware[row])
+        if row in src._content:
+            self._content[new_row] = src._content[row]
+
+    # ── Column views ───────────────────────────
+
+    @property
+    def upvotes(self) -> np.ndarray:
+        return np.frombuffer(self._upvotes, dtype=np.int64)
+
+    @property
+    def downvotes(self) -> np.ndarray:
+        return np.frombuffer(self._downvotes, dtype=np.int64)
+
+    @property
+    def comment_count(self) -> np.ndarray:
+        return np.frombuffer(self._comment_count, dtype=np.int64)
+
+    @property
+    def created_seconds(self) -> np.ndarray:
+        return np.frombuffer(self._created_seconds, dtype=np.float64)
+
+    # ── Ranking / filtering on indices ─────────
+
+    def hot_scores(self, now: datetime) -> np.ndarray:
+        if not self.ids:
+            return np.zeros(0, dtype=np.float64)
+        return hot_scores_from_arrays(
+            self.upvotes.astype(np.float64),
+            self.downvotes.astype(np.float64),
+            self.comment_count.astype(np.float64),
+            self.created_seconds,
+            now,
+        )
+
+    def created_between(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """Row indices with start <= created_at < end (naive comparison)."""
+        seconds = self.created_seconds
+        mask = np.ones(len(seconds), dtype=bool)
+        if start is not None:
+            mask &= seconds >= (start.replace(tzinfo=None) - _EPOCH).total_seconds()
+        if end is not None:
+            mask &= seconds < (end.replace(tzinfo=None) - _EPOCH).total_seconds()
+        return np.flatnonzero(mask)
+
+    def top_k(
+        self,
+        now: datetime,
+        k: int,
+        min_score: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Row indices of the k highest hot scores, highest first.
+
+        Args:
+            now: Reference time for scoring
+            k: Number of rows to keep
+            min_score: Optional minimum hot score
+            rows: Optional subset of rows to rank (default: all)
+        """
+        scores = self.hot_scores(now)
+        if rows is None:
+            return top_k_indices(scores, k, min_score)
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[top_k_indices(scores[rows], k, min_score)]
+
+    def ranked(
+        self,
+        now: datetime,
+        k: int,
+        min_score: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[int]:
+        """Like top_k(), but ties are broken by post id for stable output."""
+        scores = self.hot_scores(now)
+        if rows is None:
+            top = top_k_indices(scores, k, min_score)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            top = rows[top_k_indices(scores[rows], k, min_score)]
+        return sorted(top.tolist(), key=lambda r: (-scores[r], self.ids[r]))
+
+    # ── Materializing ──────────────────────────
+
+    def post(self, row: int) -> Post:
+        """Build a Post for one row (content empty unless loaded)."""
+        row = int(row)
+        seconds = self._created_seconds[row]
+        created_at = datetime.fromtimestamp(seconds, tz=timezone.utc)
+        if not self._aware[row]:
+            created_at = created_at.replace(tzinfo=None)
+        content = self._content.get(row)
+        return Post(
+            id=self.ids[row],
+            title=self.titles[row],
+            content=content or "",
+            submadang=self.submadangs[row],
+            author_id=self.author_ids[row],
+            author_name=self.author_names[row],
+            upvotes=self._upvotes[row],
+            downvotes=self._downvotes[row],
+            comment_count=self._comment_count[row],
+            created_at=created_at,
+            url=self.urls[row],
+            content_loaded=content is not None,
+        )
+
+    def posts(self, rows: Optional[Iterable[int]] = None) -> List[Post]:
+        """Build Posts for the given rows (default: all rows)."""
+        if rows is None:
+            rows = range(len(self.ids))
+        return [self.post(row) for row in rows]
+
+    def load_content(
+        self,
+        rows: Iterable[int],
+        loader: Callable[[List[Post]], List[Post]],
+    ) -> None:
+        """Lazily load content for rows that don't have it yet.
+
+        Args:
+            rows: Rows that need content
+            loader: e.g. FirebaseReader.load_content or PostMirror.load_content
+        """
+        pending = [int(row) for row in rows if int(row) not in self._content]
+        if not pending:
+            return
+        posts = loader([self.post(row) for row in pending])
+        for row, post in zip(pending, posts):
+            if post.content_loaded:
+                self._content[row] = post.content
+
+
+class TopKRanker:
+    """Keep the k highest hot-score posts from a stream, deduped by id.
+
+    Posts are appended to a PostBatch and the batch is cut back to its
+    top k every batch_size pushes, so memory is bounded by
+    k + batch_size rows regardless of how many posts are pushed.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        now: datetime,
+        min_score: Optional[float] = None,
+        batch_size: int = 512,
+    ):
+        self.k = k
+        self.now = now
+        self.min_score = min_score
+        self.batch_size = batch_size
+        self._batch = PostBatch()
+        self._pending = 0
+
+    def push(self, post: Post) -> None:
+        if post.id in self._batch:
+            return
+        self._batch.append(post)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._flush()
+
+    def extend(self, posts: Iterable[Post]) -> None:
+        for post in posts:
+            self.push(post)
+
+    def extend_rows(self, batch: PostBatch, rows: Optional[Iterable[int]] = None) -> None:
+        """Push rows of another PostBatch without building Post objects."""
+        if rows is None:
+            rows = range(len(batch))
+        for row in rows:
+            row = int(row)
+            if batch.ids[row] in self._batch:
+                continue
+            self._batch._copy_row(batch, row)
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            rows = self._batch.top_k(self.now, self.k, self.min_score)
+            self._batch = self._batch.take(rows)
+            self._pending = 0
+
+    def batch(self) -> PostBatch:
+        """Kept rows as a PostBatch, highest hot score first (ties by id)."""
+        self._flush()
+        return self._batch.take(self._batch.ranked(self.now, self.k, self.min_score))
+
+    def posts(self) -> List[Post]:
+        """Kept posts, highest hot score first."""
+        return self.batch().posts()
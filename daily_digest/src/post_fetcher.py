@@ -1,9 +1,20 @@
 """Post fetcher for Daily Digest candidates."""
+from collections import Counter
+from dataclasses import replace
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Collection, Dict, List, Optional, Union
 
+import numpy as np
+
+from .clients import get_firebase_reader, get_post_mirror
 from .config import get_config
-from .firebase_reader import FirebaseReader, Post
+from .firebase_reader import CANDIDATE_FIELDS, FirebaseReader, Post
+from .near_duplicates import near_duplicate_groups
+from .parallel import run_concurrently
+from .post_mirror import PostMirror
+from .post_batch import PostBatch, TopKRanker
+from .ranking import digest_window, hot_scores
+from .spam_filter import JunkScore, ScanFilter, scan_junk_rows, split_junk
 
 
 def fetch_digest_candidates(
@@ -13,10 +24,20 @@ def fetch_digest_candidates(
     
     Combines:
     1. All posts from the last 24 hours (before 8 AM target date)
-    2. Top posts by upvotes (for catching popular older posts)
+    2. Most upvoted / most commented posts of the last
+       TOP_POSTS_LOOKBACK_DAYS (for catching popular older posts)
     
     Then deduplicates and filters by minimum hot score.
     
+    The 24h window is paged through in full and ranked in batches by a
+    bounded TopKRanker, so memory stays flat however busy the day was.
+    Junk titles are dropped as they stream past, before they can take a
+    top-k slot; author bursts (which need the whole window) are applied
+    to the ranked result.
+    
+    This is a candidate scan: only ranking fields are read (no content).
+    Call load_candidate_content() on the posts you actually use.
+    
     Args:
         target_date: The date for which to generate digest.
                      If None, uses current date.
@@ -26,64 +47,322 @@ def fetch_digest_candidates(
         List of Post objects, sorted by hot score descending
     """
     config = get_config()
-    reader = FirebaseReader()
+    source = _open_post_source()
     
     # Calculate time window
     if target_date is None:
         target_date = datetime.now()
     
     # Digest covers: yesterday 8 AM to today 8 AM
-    digest_end = target_date.replace(hour=8, minute=0, second=0, microsecond=0)
-    digest_start = digest_end - timedelta(hours=config.DIGEST_HOURS)
+    digest_start, digest_end = digest_window(target_date, config.DIGEST_HOURS)
+    
+    now = digest_end  # Use digest end time for consistent scoring
+    threshold = config.SPAM_THRESHOLD
+    scan = ScanFilter(threshold) if threshold > 0 else None
     
-    # Fetch recent posts
-    recent_posts = reader.get_posts_since(
-        since=digest_start,
-        limit=config.MAX_POSTS_TO_EVALUATE
+    def scan_recent() -> TopKRanker:
+        # Scan every recent post, page by page
+        recent = TopKRanker(
+            k=config.MAX_POSTS_TO_EVALUATE,
+            now=now,
+            min_score=config.MIN_HOT_SCORE,
+            batch_size=config.FETCH_PAGE_SIZE,
+        )
+        posts = source.iter_posts_since(
+            since=digest_start,
+            until=digest_end,
+            fields=CANDIDATE_FIELDS,
+        )
+        recent.extend(scan.watch(posts) if scan else posts)
+        return recent
+    
+    # Popular posts within the lookback (might include some from recent)
+    popular_start = digest_end - timedelta(days=config.TOP_POSTS_LOOKBACK_DAYS)
+    
+    def popular_by(order_by: str):
+        return lambda: source.get_popular_posts_since(
+            since=popular_start,
+            until=digest_end,
+            limit=config.TOP_POSTS_LIMIT,
+            order_by=order_by,
+            fields=CANDIDATE_FIELDS,
+        )
+    
+    # Independent queries run concurrently, then merge below
+    results = run_concurrently(
+        {
+            "recent": scan_recent,
+            "top_upvotes": popular_by("upvotes"),
+            "top_comments": popular_by("comment_count"),
+        },
+        max_workers=config.FETCH_MAX_WORKERS,
     )
+    top_k = results["recent"]
+    popular = results["top_upvotes"] + results["top_comments"]
+    top_k.extend_rows(PostBatch.from_posts(scan.watch(popular) if scan else popular))
+    
+    candidates = top_k.posts()
+    if scan:
+        candidates, dropped = scan.split(candidates)
+        _report_junk([junk for _, junk in scan.dropped + dropped], "스캔 중 ")
+    return candidates
+
+
+def fetch_candidates_for_dates(
+    target_dates: List[datetime],
+    content_top_n: int = 0,
+) -> Dict[str, List[Post]]:
+    """Fetch digest candidates for several dates with a single scan.
     
-    # Fetch top posts (might include some from recent)
-    top_posts = reader.get_top_posts(limit=50)
+    Reads the union of all digest windows (including the popular-post
+    lookbacks) once into a PostBatch, then slices and ranks each day in
+    memory with the same rules as fetch_digest_candidates(). Rows that
+    are junk by title and author-burst signals are left out before
+    ranking.
     
-    # Combine and deduplicate
-    posts_by_id = {p.id: p for p in recent_posts}
-    for post in top_posts:
-        if post.id not in posts_by_id:
-            # Only add top posts if within reasonable time (last week)
-            # Make both datetimes naive for comparison
-            target_naive = target_date.replace(tzinfo=None)
-            post_naive = post.created_at.replace(tzinfo=None) if post.created_at.tzinfo else post.created_at
-            if (target_naive - post_naive).days <= 7:
-                posts_by_id[post.id] = post
+    Args:
+        target_dates: Dates to build candidate sets for
+        content_top_n: Also load content for each day's top N candidates,
+                       in one batched read shared across all days
     
-    all_posts = list(posts_by_id.values())
+    Returns:
+        Mapping of "YYYY-MM-DD" -> candidates sorted by hot score desc
+    """
+    if not target_dates:
+        return {}
     
-    # Filter by minimum hot score
-    now = digest_end  # Use digest end time for consistent scoring
-    filtered_posts = [
-        p for p in all_posts
-        if p.hot_score(now) >= config.MIN_HOT_SCORE
-    ]
+    config = get_config()
+    source = _open_post_source()
+    lookback = timedelta(days=config.TOP_POSTS_LOOKBACK_DAYS)
+    
+    windows = {
+        d.strftime("%Y-%m-%d"): digest_window(d, config.DIGEST_HOURS)
+        for d in target_dates
+    }
+    union_start = min(min(start, end - lookback) for start, end in windows.values())
+    union_end = max(end for _, end in windows.values())
+    
+    batch = PostBatch.from_posts(source.iter_posts_since(
+        since=union_start,
+        until=union_end,
+        fields=CANDIDATE_FIELDS,
+    ))
+    junk_rows = _scan_junk(batch, config.SPAM_THRESHOLD)
     
-    # Sort by hot score descending
-    filtered_posts.sort(key=lambda p: p.hot_score(now), reverse=True)
+    ranked_rows: Dict[str, List[int]] = {}
+    for date_str, (start, end) in windows.items():
+        recent_rows = np.setdiff1d(batch.created_between(start, end), junk_rows)
+        popular_rows = np.setdiff1d(batch.created_between(end - lookback, end), junk_rows)
+        top_upvotes = popular_rows[
+            np.argsort(-batch.upvotes[popular_rows], kind="stable")[:config.TOP_POSTS_LIMIT]
+        ]
+        top_comments = popular_rows[
+            np.argsort(-batch.comment_count[popular_rows], kind="stable")[:config.TOP_POSTS_LIMIT]
+        ]
+        rows = np.unique(np.concatenate([recent_rows, top_upvotes, top_comments]))
+        ranked_rows[date_str] = batch.ranked(
+            now=end,
+            k=config.MAX_POSTS_TO_EVALUATE,
+            min_score=config.MIN_HOT_SCORE,
+            rows=rows,
+        )
+    
+    if content_top_n:
+        needed = sorted({r for rows in ranked_rows.values() for r in rows[:content_top_n]})
+        batch.load_content(needed, load_candidate_content)
+    
+    return {
+        date_str: batch.posts(rows)
+        for date_str, rows in ranked_rows.items()
+    }
+
+
+def _scan_junk(batch: PostBatch, threshold: float) -> np.ndarray:
+    """Rows of a scanned batch that are junk by title and burst alone."""
+    if threshold <= 0 or not len(batch):
+        return np.array([], dtype=np.int64)
+    dropped = scan_junk_rows(
+        batch.titles,
+        batch.author_ids,
+        batch.created_seconds,
+        batch.upvotes + batch.comment_count,
+        threshold,
+    )
+    _report_junk(dropped.values(), "스캔 중 ")
+    return np.array(sorted(dropped), dtype=np.int64)
+
+
+def _report_junk(dropped: Collection[JunkScore], stage: str = "") -> None:
+    if dropped:
+        reasons = Counter(r for junk in dropped for r in junk.reasons)
+        summary = ", ".join(f"{r} {n}" for r, n in reasons.most_common())
+        print(f"   🧹 {stage}저품질 포스트 제외: {len(dropped)}개 ({summary})")
+
+
+def load_candidate_content(posts: List[Post]) -> List[Post]:
+    """Load full content for the candidates that survived ranking.
+    
+    Args:
+        posts: Candidate posts from fetch_digest_candidates()
+        
+    Returns:
+        The same posts, with content loaded in one batched read
+    """
+    if all(p.content_loaded for p in posts):
+        return posts
+    
+    mirror = get_post_mirror()
+    if mirror is not None:
+        mirror.load_content(posts)
+        if all(p.content_loaded for p in posts):
+            return posts
+    return get_firebase_reader().load_content(posts)
+
+
+def drop_low_quality(posts: List[Post]) -> List[Post]:
+    """Drop obvious junk (test/greeting posts, link dumps, floods).
+    
+    Rule-based and cheap (see spam_filter); posts scoring at least
+    Config.SPAM_THRESHOLD are removed unless they have real engagement.
+    Title and burst signals already ran during the candidate scan; this
+    pass adds the content signals, so call it after load_candidate_content().
+    
+    Args:
+        posts: Candidates (content signals need content loaded)
+        
+    Returns:
+        The remaining posts, order preserved
+    """
+    threshold = get_config().SPAM_THRESHOLD
+    if threshold <= 0 or not posts:
+        return posts
+    
+    kept, dropped = split_junk(posts, threshold)
+    _report_junk([junk for _, junk in dropped])
+    return kept
+
+
+def collapse_near_duplicates(posts: List[Post], now: datetime) -> List[Post]:
+    """Merge near-identical posts (e.g. one announcement re-posted by bots).
+    
+    Posts whose title + content shingles overlap by at least
+    Config.DEDUP_SIMILARITY are collapsed into the one with the highest
+    hot score; its copy carries the summed votes and comments of the
+    group. The result is re-ranked by hot score.
+    
+    Args:
+        posts: Candidates with content loaded (see load_candidate_content)
+        now: Reference time for hot scores
+        
+    Returns:
+        Representatives sorted by hot score descending (input posts are
+        not modified)
+    """
+    threshold = get_config().DEDUP_SIMILARITY
+    if threshold <= 0 or len(posts) < 2:
+        return posts
+    
+    groups = near_duplicate_groups(
+        [f"{p.title}\n{p.content}" for p in posts], threshold=threshold
+    )
+    if len(groups) == len(posts):
+        return posts
+    
+    scores = hot_scores(posts, now)
+    merged = []
+    for group in groups:
+        best = max(group, key=lambda i: scores[i])
+        if len(group) == 1:
+            merged.append(posts[best])
+            continue
+        merged.append(replace(
+            posts[best],
+            upvotes=sum(posts[i].upvotes for i in group),
+            downvotes=sum(posts[i].downvotes for i in group),
+            comment_count=sum(posts[i].comment_count for i in group),
+        ))
+    print(f"   🧬 유사 중복 포스트 병합: {len(posts)}개 → {len(merged)}개")
+    
+    order = np.argsort(-hot_scores(merged, now), kind="stable")
+    return [merged[i] for i in order]
+
+
+def enrich_with_comments(posts: List[Post]) -> List[Post]:
+    """Attach top comment highlights to posts (chunked bulk, cached load).
+    
+    Args:
+        posts: Posts that will be shown to the LLM
+        
+    Returns:
+        The same posts, with top_comments filled in
+    """
+    config = get_config()
+    if not posts or config.COMMENT_HIGHLIGHTS_PER_POST <= 0:
+        return posts
+    
+    commented = {p.id: p.comment_count for p in posts if p.comment_count > 0}
+    try:
+        comments = get_firebase_reader().get_top_comments(
+            list(commented),
+            per_post=config.COMMENT_HIGHLIGHTS_PER_POST,
+            max_chars=config.COMMENT_HIGHLIGHT_MAX_CHARS,
+            comment_counts=commented,
+        )
+    except Exception as e:
+        print(f"⚠️  댓글 하이라이트 로드 오류: {e}")
+        return posts
+    
+    for post in posts:
+        post.top_comments = comments.get(post.id, [])
+    return posts
+
+
+def format_comment_highlights(post: Post) -> str:
+    """Format a post's top comments as bullet lines ("" if none)."""
+    return "\n".join(
+        f"- {c.author_name}: {' '.join(c.content.split())}"
+        for c in post.top_comments
+    )
+
+
+def _open_post_source() -> Union[FirebaseReader, PostMirror]:
+    """Return the local mirror (synced first) if configured, else Firestore."""
+    reader = get_firebase_reader()
+    mirror = get_post_mirror()
+    if mirror is None:
+        return reader
     
-    return filtered_posts[:config.MAX_POSTS_TO_EVALUATE]
+    stats = reader.sync_mirror(mirror)
+    if not stats["skipped"]:
+        print(
+            f"   🗄️  로컬 미러 동기화: 신규 {stats['synced']}개 / "
+            f"카운터 갱신 {stats['refreshed']}개 / 삭제 {stats['deleted']}개"
+        )
+    return mirror
 
 
-def format_post_summary(post: Post, index: int) -> str:
+def format_post_summary(post: Post, index: int, preview_chars: int = 300) -> str:
     """Format a post for LLM consumption.
     
     Args:
         post: Post object
         index: 1-based index for referencing
+        preview_chars: Content preview length (see prompt_packer)
         
     Returns:
         Formatted string with key post info
     """
-    content_preview = post.content[:300] if post.content else "(내용 없음)"
-    return f"""[{index}] 제목: {post.title}
+    if not post.content:
+        content_preview = "(내용 없음)"
+    elif len(post.content) > preview_chars:
+        content_preview = post.content[:preview_chars] + "..."
+    else:
+        content_preview = post.content
+    summary = f"""[{index}] 제목: {post.title}
 작성자: {post.author_name}
 마당: {post.submadang}
 추천: {post.upvotes} / 비추: {post.downvotes} / 댓글: {post.comment_count}
-내용: {content_preview}..."""
+내용: {content_preview}"""
+    if post.top_comments:
+        summary += f"\n댓글 하이라이트:\n{format_comment_highlights(post)}"
+    return summary
@@ -0,0 +1,292 @@
+"""Local SQLite mirror of the Firestore `posts` collection.
+
+The mirror is synced incrementally by FirebaseReader.sync_mirror() and
+answers the same window / top-N queries as FirebaseReader, so repeated
+runs and backfills don't have to re-read Firestore.
+"""
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from .firebase_reader import POPULAR_ORDER_FIELDS, Post
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    submadang TEXT NOT NULL DEFAULT '',
+    author_id TEXT NOT NULL DEFAULT '',
+    author_name TEXT NOT NULL DEFAULT '',
+    upvotes INTEGER NOT NULL DEFAULT 0,
+    downvotes INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_upvotes ON posts (upvotes DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Columns read for candidate scans (everything except content)
+_LIGHT_COLUMNS = (
+    "id, title, '' AS content, submadang, author_id, author_name, "
+    "upvotes, downvotes, comment_count, created_at, url"
+)
+_FULL_COLUMNS = (
+    "id, title, content, submadang, author_id, author_name, "
+    "upvotes, downvotes, comment_count, created_at, url"
+)
+
+
+def _to_timestamp(dt: datetime) -> float:
+    """Convert to a UTC epoch timestamp (naive datetimes are UTC, like Firestore)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _from_timestamp(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+class PostMirror:
+    """On-disk copy of the `posts` collection with local indexes."""
+
+    def __init__(self, path: str):
+        """Open (or create) the mirror database.
+
+        Args:
+            path: SQLite file path
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── Sync state ─────────────────────────────
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+            self._conn.commit()
+
+    def get_watermark(self) -> Optional[datetime]:
+        """Latest created_at mirrored so far, or None if never synced."""
+        value = self.get_meta("watermark")
+        return _from_timestamp(float(value)) if value else None
+
+    def set_watermark(self, watermark: datetime) -> None:
+        self.set_meta("watermark", repr(_to_timestamp(watermark)))
+
+    # ── Writes ─────────────────────────────────
+
+    def upsert(self, posts: Iterable[Post]) -> int:
+        """Insert or replace full posts.
+
+        Returns:
+            Number of rows written
+        """
+        rows = [
+            (
+                p.id, p.title, p.content, p.submadang, p.author_id,
+                p.author_name, p.upvotes, p.downvotes, p.comment_count,
+                _to_timestamp(p.created_at), p.url,
+            )
+            for p in posts
+        ]
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO posts ({_FULL_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def update_counters(self, posts: Iterable[Post]) -> int:
+        """Refresh vote/comment counters of already-mirrored posts.
+
+        Returns:
+            Number of rows updated
+        """
+        rows = [(p.upvotes, p.downvotes, p.comment_count, p.id) for p in posts]
+        with self._lock:
+            cursor = self._conn.executemany(
+                "UPDATE posts SET upvotes = ?, downvotes = ?, comment_count = ? "
+                "WHERE id = ?",
+                rows,
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def delete_missing(self, since: datetime, present_ids: Iterable[str]) -> int:
+        """Delete posts created since `since` that are not in present_ids.
+
+        Used with the ids of a full Firestore scan of the same window,
+        so posts deleted upstream (e.g. cleaned-up spam) leave the mirror.
+
+        Returns:
+            Number of rows deleted
+        """
+        present = set(present_ids)
+        with self._lock:
+            stale = [
+                (row[0],) for row in self._conn.execute(
+                    "SELECT id FROM posts WHERE created_at >= ?", (_to_timestamp(since),)
+                )
+                if row[0] not in present
+            ]
+            self._conn.executemany("DELETE FROM posts WHERE id = ?", stale)
+            self._conn.commit()
+        return len(stale)
+
+    # ── Reads (same shape as FirebaseReader) ───
+
+    def iter_posts_since(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        page_size: int = 500,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Post]:
+        """Lazily iterate over mirrored posts in a time window, newest first.
+
+        Args:
+            since: Start datetime (inclusive)
+            until: Optional end datetime (exclusive)
+            page_size: Rows fetched per batch
+            fields: If set, content is skipped (like a Firestore projection)
+        """
+        columns = _LIGHT_COLUMNS if fields else _FULL_COLUMNS
+        sql = f"SELECT {columns} FROM posts WHERE created_at >= ?"
+        params: list = [_to_timestamp(since)]
+        if until is not None:
+            sql += " AND created_at < ?"
+            params.append(_to_timestamp(until))
+        sql += " ORDER BY created_at DESC"
+
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_post(row, content_loaded=not fields)
+
+    def get_posts_since(
+        self,
+        since: datetime,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+    ) -> List[Post]:
+        """Get mirrored posts created since the given datetime (newest first)."""
+        posts = []
+        for post in self.iter_posts_since(since, fields=fields):
+            if len(posts) >= limit:
+                break
+            posts.append(post)
+        return posts
+
+    def get_top_posts(
+        self,
+        limit: int = 50,
+        fields: Optional[List[str]] = None,
+    ) -> List[Post]:
+        """Get mirrored top posts by upvotes."""
+        columns = _LIGHT_COLUMNS if fields else _FULL_COLUMNS
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM posts ORDER BY upvotes DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._row_to_post(row, content_loaded=not fields) for row in rows]
+
+    def get_popular_posts_since(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        order_by: str = "upvotes",
+        fields: Optional[List[str]] = None,
+    ) -> List[Post]:
+        """Get the most engaged mirrored posts created within a time window."""
+        if order_by not in POPULAR_ORDER_FIELDS:
+            raise ValueError(f"Unsupported order_by: {order_by}")
+
+        columns = _LIGHT_COLUMNS if fields else _FULL_COLUMNS
+        sql = f"SELECT {columns} FROM posts WHERE created_at >= ?"
+        params: list = [_to_timestamp(since)]
+        if until is not None:
+            sql += " AND created_at < ?"
+            params.append(_to_timestamp(until))
+        sql += f" ORDER BY {order_by} DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_post(row, content_loaded=not fields) for row in rows]
+
+    def load_content(self, posts: List[Post]) -> List[Post]:
+        """Fill in content for projection-only posts from the mirror."""
+        pending = {p.id: p for p in posts if not p.content_loaded}
+        if not pending:
+            return posts
+
+        placeholders = ",".join("?" * len(pending))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, content FROM posts WHERE id IN ({placeholders})",
+                list(pending),
+            ).fetchall()
+        for post_id, content in rows:
+            post = pending[post_id]
+            post.content = content
+            post.content_loaded = True
+        return posts
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    @staticmethod
+    def _row_to_post(row: tuple, content_loaded: bool = True) -> Post:
+        return Post(
+            id=row[0],
+            title=row[1],
+            content=row[2],
+            submadang=row[3],
+            author_id=row[4],
+            author_name=row[5],
+            upvotes=row[6],
+            downvotes=row[7],
+            comment_count=row[8],
+            created_at=_from_timestamp(row[9]),
+            url=row[10],
+            content_loaded=content_loaded,
+        )
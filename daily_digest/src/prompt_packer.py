@@ -0,0 +1,115 @@
+"""Token-aware packing of post summaries into an LLM prompt.
+
+Instead of a fixed number of posts with a fixed 300-character preview,
+posts (in priority order) are packed into a token budget: as many posts
+as fit with a minimum preview, then one shared preview length as large
+as the remaining budget allows. Short posts are shown in full.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+from .config import get_config
+from .firebase_reader import Post
+from .post_fetcher import format_post_summary
+
+
+# Rough Solar tokenizer ratios: a Hangul syllable or other non-ASCII
+# character is about one token, ASCII text about four characters per token.
+ASCII_CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of mixed Korean/English text."""
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return int((len(text) - ascii_chars) + ascii_chars / ASCII_CHARS_PER_TOKEN) + 1
+
+
+@dataclass
+class PackedPrompt:
+    """Posts that fit the budget and their rendered summaries."""
+    posts: List[Post]
+    text: str
+    preview_chars: int
+    tokens: int
+    dropped: List[Post] = field(default_factory=list)
+
+    def report(self) -> str:
+        """One-line summary for logs."""
+        line = f"{len(self.posts)}개 포스트 / 미리보기 {self.preview_chars}자 / 약 {self.tokens} 토큰"
+        if self.dropped:
+            line += f" / 예산 초과 제외 {len(self.dropped)}개"
+        return line
+
+
+def pack_posts(
+    posts: List[Post],
+    budget_tokens: int,
+    min_preview: int = 0,
+    max_preview: int = 0,
+    formatter: Callable[[Post, int, int], str] = format_post_summary,
+    separator: str = "\n\n",
+) -> PackedPrompt:
+    """Fit as many posts as possible into budget_tokens.
+
+    Args:
+        posts: Candidates, highest priority first
+        budget_tokens: Tokens available for the post list
+        min_preview: Smallest content preview per post
+                     (default: Config.PROMPT_PREVIEW_MIN_CHARS)
+        max_preview: Largest content preview per post
+                     (default: Config.PROMPT_PREVIEW_MAX_CHARS)
+        formatter: formatter(post, index, preview_chars) -> summary text
+        separator: Text between summaries
+
+    Returns:
+        PackedPrompt; posts keep their order, so 1-based indices in the
+        prompt map to packed.posts
+    """
+    config = get_config()
+    min_preview = min_preview or config.PROMPT_PREVIEW_MIN_CHARS
+    max_preview = max(max_preview or config.PROMPT_PREVIEW_MAX_CHARS, min_preview)
+    sep_tokens = estimate_tokens(separator)
+
+    # Fixed cost (title, counters, comments) and content token density per post
+    base = [estimate_tokens(formatter(p, i, 0)) + sep_tokens for i, p in enumerate(posts, 1)]
+    density = []
+    for p in posts:
+        sample = (p.content or "")[:max_preview]
+        density.append(estimate_tokens(sample) / len(sample) if sample else 0.0)
+
+    def preview_cost(i: int, chars: int) -> float:
+        return density[i] * min(chars, len(posts[i].content or ""))
+
+    # 1. As many posts as fit with the minimum preview
+    count = 0
+    used = 0.0
+    for i in range(len(posts)):
+        cost = base[i] + preview_cost(i, min_preview)
+        if used + cost > budget_tokens:
+            break
+        used += cost
+        count += 1
+
+    # 2. Largest shared preview length that still fits (binary search)
+    fixed = sum(base[:count])
+
+    def total(chars: int) -> float:
+        return fixed + sum(preview_cost(i, chars) for i in range(count))
+
+    lo, hi = min_preview, max_preview
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if total(mid) <= budget_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+
+    packed = posts[:count]
+    text = separator.join(formatter(p, i, lo) for i, p in enumerate(packed, 1))
+    return PackedPrompt(
+        posts=packed,
+        text=text,
+        preview_chars=lo,
+        tokens=estimate_tokens(text),
+        dropped=posts[count:],
+    )
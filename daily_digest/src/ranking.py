@@ -0,0 +1,76 @@
+"""Batched hot-score ranking for digest candidates.
+
+Same formula as Post.hot_score (and the frontend), computed over whole
+candidate sets with NumPy instead of one datetime calculation per post.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .firebase_reader import Post
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def digest_reference_time(target_date: datetime) -> datetime:
+    """Digest end (8 AM on the target date), used as 'now' for all scoring."""
+    return target_date.replace(hour=8, minute=0, second=0, microsecond=0)
+
+
+def digest_window(target_date: datetime, hours: int) -> Tuple[datetime, datetime]:
+    """Return (start, end) of the digest window ending at 8 AM on target_date."""
+    end = digest_reference_time(target_date)
+    return end - timedelta(hours=hours), end
+
+
+def _naive_seconds(dt: datetime) -> float:
+    """Seconds since epoch after dropping tzinfo (matches Post.hot_score)."""
+    return (dt.replace(tzinfo=None) - _EPOCH).total_seconds()
+
+
+def hot_scores_from_arrays(
+    upvotes: np.ndarray,
+    downvotes: np.ndarray,
+    comment_count: np.ndarray,
+    created_seconds: np.ndarray,
+    now: datetime,
+) -> np.ndarray:
+    """Vectorized hot score: (score + comment_count * 2 + 1) / age_hours^1.5."""
+    age_hours = (_naive_seconds(now) - created_seconds) / 3600.0
+    age_hours = np.maximum(age_hours, 0.5)  # Minimum 0.5 hours
+    engagement = (upvotes - downvotes) + comment_count * 2
+    return (engagement + 1) / np.power(age_hours, 1.5)
+
+
+def hot_scores(posts: Sequence[Post], now: datetime) -> np.ndarray:
+    """Hot scores for a list of posts, in input order."""
+    if not posts:
+        return np.zeros(0, dtype=np.float64)
+    return hot_scores_from_arrays(
+        np.fromiter((p.upvotes for p in posts), dtype=np.float64, count=len(posts)),
+        np.fromiter((p.downvotes for p in posts), dtype=np.float64, count=len(posts)),
+        np.fromiter((p.comment_count for p in posts), dtype=np.float64, count=len(posts)),
+        np.fromiter((_naive_seconds(p.created_at) for p in posts), dtype=np.float64, count=len(posts)),
+        now,
+    )
+
+
+def top_k_indices(
+    scores: np.ndarray,
+    k: int,
+    min_score: Optional[float] = None,
+) -> np.ndarray:
+    """Indices of the k highest scores (>= min_score), highest first.
+
+    Uses argpartition, so selection is O(n) and only the k winners are sorted.
+    """
+    candidates = np.arange(len(scores))
+    if min_score is not None:
+        candidates = candidates[scores >= min_score]
+    if len(candidates) > k:
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order]
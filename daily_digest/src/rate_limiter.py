@@ -0,0 +1,106 @@
+"""Token-bucket rate limiter shared by all LLM calls.
+
+Two buckets are enforced together: requests per second and tokens per
+minute. Callers only wait when a budget is actually exhausted, instead
+of sleeping a fixed amount after every request.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class _Bucket:
+    """Refilling budget that may go negative (reservations are queued)."""
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.available = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.available = min(self.capacity, self.available + elapsed * self.rate)
+
+    def take(self, amount: float) -> float:
+        """Debit amount, return seconds until the balance is non-negative."""
+        self.available -= amount
+        if self.available >= 0:
+            return 0.0
+        return -self.available / self.rate
+
+
+class RateLimiter:
+    """Thread-safe requests/sec + tokens/min limiter.
+
+    reserve() debits the budget immediately and returns how long the
+    caller has to wait, so it works from threads (time.sleep) and from
+    asyncio tasks (asyncio.sleep) alike; see retry.call_with_retry().
+    """
+
+    def __init__(
+        self,
+        requests_per_sec: float,
+        tokens_per_min: float = 0,
+        burst_requests: Optional[float] = None,
+    ):
+        """
+        Args:
+            requests_per_sec: Sustained request rate (0 = unlimited)
+            tokens_per_min: Sustained token rate (0 = unlimited)
+            burst_requests: Request bucket size (default: max(1, rate))
+        """
+        self._lock = threading.Lock()
+        self._requests = (
+            _Bucket(requests_per_sec, burst_requests or max(1.0, requests_per_sec))
+            if requests_per_sec > 0 else None
+        )
+        self._tokens = (
+            _Bucket(tokens_per_min / 60.0, tokens_per_min)
+            if tokens_per_min > 0 else None
+        )
+
+    def reserve(self, tokens: int = 0, max_wait: Optional[float] = None) -> Optional[float]:
+        """Reserve one request and `tokens` tokens.
+
+        Args:
+            tokens: Tokens the request may use (settle() corrects it later)
+            max_wait: Reserve nothing if the wait would reach this many seconds
+
+        Returns:
+            Seconds the caller must wait before sending the request, or
+            None if that would take max_wait or longer
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._requests is not None:
+                self._requests.refill(now)
+                wait = max(wait, self._requests.take(1))
+            if self._tokens is not None and tokens:
+                self._tokens.refill(now)
+                wait = max(wait, self._tokens.take(tokens))
+            if max_wait is not None and wait >= max_wait:
+                # Undo the debit: the caller gives up instead of waiting
+                if self._requests is not None:
+                    self._requests.available += 1
+                if self._tokens is not None and tokens:
+                    self._tokens.available += tokens
+                return None
+            return wait
+
+    def settle(self, reserved_tokens: int, used_tokens: Optional[int]) -> None:
+        """Correct a reservation with the actual token usage.
+
+        Refunds over-reservations and charges under-reservations; a failed
+        attempt settles with used_tokens=0 to give its tokens back.
+        """
+        if self._tokens is None or used_tokens is None:
+            return
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.available = min(
+                self._tokens.capacity,
+                self._tokens.available + reserved_tokens - used_tokens,
+            )
@@ -0,0 +1,330 @@
+"""Retry policy and circuit breaker for LLM requests.
+
+Errors are classified into rate limits (honoring Retry-After), transient
+server errors, timeouts and non-retryable errors. Retryable ones are
+retried with exponential backoff and full jitter inside a per-call
+deadline; a shared circuit breaker stops calling the provider for a
+cooldown period after repeated transient failures, so callers fall back
+immediately instead of stalling.
+"""
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import openai
+
+
+T = TypeVar("T")
+
+# Error kinds
+RATE_LIMIT = "rate_limit"
+SERVER = "server"
+TIMEOUT = "timeout"
+FATAL = "fatal"
+
+RETRYABLE_KINDS = (RATE_LIMIT, SERVER, TIMEOUT)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the breaker is open."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when retries would run past the per-call deadline."""
+
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception to RATE_LIMIT, SERVER, TIMEOUT or FATAL."""
+    if isinstance(error, openai.RateLimitError):
+        return RATE_LIMIT
+    if isinstance(error, openai.APITimeoutError):
+        return TIMEOUT
+    if isinstance(error, openai.APIConnectionError):
+        return SERVER
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code == 429:
+            return RATE_LIMIT
+        if error.status_code == 408:
+            return TIMEOUT
+        if error.status_code >= 500:
+            return SERVER
+        return FATAL
+    if isinstance(error, openai.APIResponseValidationError):
+        return FATAL
+    if isinstance(error, openai.APIError):
+        # Status-less: an error event inside an SSE stream
+        return SERVER
+    # Raised as-is while iterating a stream (no openai wrapping)
+    if isinstance(error, (httpx.TimeoutException, TimeoutError, asyncio.TimeoutError)):
+        return TIMEOUT
+    if isinstance(error, httpx.TransportError):
+        return SERVER
+    return FATAL
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested delay from Retry-After / retry-after-ms, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by a per-call deadline."""
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 20.0
+    deadline: float = 120.0  # seconds per call, all attempts included (0 = none)
+    request_timeout: float = 60.0  # seconds per attempt (0 = client default)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Delay before the next attempt (attempt is 1-based)."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if classify_error(error) == RATE_LIMIT:
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        return delay
+
+    def remaining(self, started: float) -> Optional[float]:
+        """Seconds left until the deadline (None = no deadline)."""
+        if not self.deadline:
+            return None
+        return self.deadline - (time.monotonic() - started)
+
+    def attempt_timeout(self, started: float) -> Optional[float]:
+        """Timeout for the next attempt, capped by the remaining deadline."""
+        timeout = self.request_timeout or None
+        remaining = self.remaining(started)
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceededError(f"LLM 호출 제한 시간 {self.deadline:.0f}초 초과")
+            timeout = min(timeout, remaining) if timeout else remaining
+        return timeout
+
+    def fits_deadline(self, started: float, delay: float) -> bool:
+        return not self.deadline or time.monotonic() - started + delay < self.deadline
+
+
+class CircuitBreaker:
+    """Thread-safe breaker shared by all LLM clients.
+
+    Opens after `failure_threshold` consecutive transient failures and
+    rejects calls for `cooldown` seconds; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the provider should not be called now."""
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                raise CircuitOpenError("LLM 서킷 브레이커 열림 - 호출 생략")
+            self._trial_in_flight = True  # half-open: let one call through
+
+    def cancel_call(self) -> None:
+        """Forget a call let through by before_call() that was never sent."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self, kind: str) -> None:
+        """Count a failed attempt; only provider-side failures trip the breaker."""
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if kind not in RETRYABLE_KINDS:
+                # A bad request says nothing about the provider's health
+                self._trial_in_flight = False
+                return
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                # Open (or re-open after a failed trial) for another cooldown
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+def call_with_retry(
+    fn: Callable[[Optional[float]], T],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    throttle: Optional[Callable[[Optional[float]], Optional[float]]] = None,
+    refund: Optional[Callable[[], None]] = None,
+) -> T:
+    """Call fn(timeout) with retries.
+
+    Args:
+        fn: Performs one attempt; receives the attempt timeout in seconds
+        policy: Backoff and deadline settings
+        breaker: Optional shared circuit breaker
+        throttle: Optional rate limit reservation before each attempt
+                  (e.g. RateLimiter.reserve); receives the seconds left
+                  until the deadline and returns the wait, or None if
+                  the budget does not free up in time. The wait counts
+                  against the deadline, not the attempt timeout.
+        refund: Optional callback that gives a reservation back; called
+                after every attempt that did not succeed, including one
+                cancelled or interrupted mid-way
+
+    Raises:
+        The last error if it is not retryable or attempts run out,
+        CircuitOpenError or DeadlineExceededError
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.before_call()
+        delay = _throttle_delay(throttle, policy, started, breaker) if throttle is not None else 0.0
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            result = fn(policy.attempt_timeout(started))
+        except (CircuitOpenError, DeadlineExceededError):
+            _abandon_attempt(breaker, refund)
+            raise
+        except Exception as e:
+            if refund is not None:
+                refund()
+            delay = _after_failure(e, attempt, started, policy, breaker)
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: neither a success nor a failure
+            _abandon_attempt(breaker, refund)
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+async def call_with_retry_async(
+    fn: Callable[[Optional[float]], Awaitable[T]],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    throttle: Optional[Callable[[Optional[float]], Optional[float]]] = None,
+    refund: Optional[Callable[[], None]] = None,
+) -> T:
+    """Async variant of call_with_retry()."""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.before_call()
+        delay = _throttle_delay(throttle, policy, started, breaker) if throttle is not None else 0.0
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            result = await fn(policy.attempt_timeout(started))
+        except (CircuitOpenError, DeadlineExceededError):
+            _abandon_attempt(breaker, refund)
+            raise
+        except Exception as e:
+            if refund is not None:
+                refund()
+            delay = _after_failure(e, attempt, started, policy, breaker)
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: neither a success nor a failure
+            _abandon_attempt(breaker, refund)
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+def _throttle_delay(
+    throttle: Callable[[Optional[float]], Optional[float]],
+    policy: RetryPolicy,
+    started: float,
+    breaker: Optional[CircuitBreaker],
+) -> float:
+    """Reserve the rate limit budget; raise if it is not free before the deadline."""
+    delay = throttle(policy.remaining(started))
+    if delay is None:
+        if breaker is not None:
+            breaker.cancel_call()
+        raise DeadlineExceededError(
+            f"LLM 호출 제한 시간 {policy.deadline:.0f}초 안에 요청 한도가 확보되지 않음"
+        )
+    return delay
+
+
+def _abandon_attempt(
+    breaker: Optional[CircuitBreaker],
+    refund: Optional[Callable[[], None]],
+) -> None:
+    """Undo an attempt that ended without a recorded success or failure.
+
+    Releases a half-open trial slot (or it would stay taken and keep the
+    breaker open) and gives the rate limit reservation back.
+    """
+    if breaker is not None:
+        breaker.cancel_call()
+    if refund is not None:
+        refund()
+
+
+def _after_failure(
+    error: Exception,
+    attempt: int,
+    started: float,
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker],
+) -> float:
+    """Record the failure and return the backoff delay, or re-raise the error."""
+    kind = classify_error(error)
+    if breaker is not None:
+        breaker.record_failure(kind)
+    if kind not in RETRYABLE_KINDS or attempt >= policy.max_attempts:
+        raise error
+    delay = policy.backoff(attempt, error)
+    if not policy.fits_deadline(started, delay):
+        raise error
+    print(f"⚠️  LLM {kind} 오류 (시도 {attempt}/{policy.max_attempts}), {delay:.1f}초 후 재시도: {error}")
+    return delay
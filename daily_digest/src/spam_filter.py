@@ -0,0 +1,250 @@
+"""Rule-based prefilter for obvious junk posts.
+
+Greetings, test posts, link dumps and copy-paste floods used to reach
+the LLM only to be rejected there. Each post gets a junk score from
+cheap text and author signals, with a reason code per signal; posts at
+or above the threshold are dropped before evaluation. Posts that earned
+real engagement are always kept.
+
+Title and author-burst signals only need the projected fields, so they
+run over every post of the candidate scan (ScanFilter, scan_junk_rows);
+content signals run once content is loaded (split_junk).
+"""
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from .firebase_reader import Post
+
+
+# Reason codes
+TEST_TITLE = "test_title"
+GREETING_TITLE = "greeting_title"
+TOO_SHORT = "too_short"
+LOW_HANGUL = "low_hangul"
+REPETITIVE = "repetitive"
+URL_HEAVY = "url_heavy"
+AUTHOR_BURST = "author_burst"
+
+_TEST_TITLE = re.compile(
+    r"^\s*[\[(]?\s*(test(ing)?|테스트|테슷|ㅌㅅㅌ|ㅎㅇ|asdf|qwer|1234|\.+|ㅁㄴㅇㄹ)\s*[\])]?\s*\d*\s*[.!?~]*\s*$",
+    re.IGNORECASE,
+)
+_GREETING_TITLE = re.compile(
+    r"^\s*(안녕(하세요|하십니까)?|반갑습니다|hello|hi|첫\s*(글|인사|포스트)|가입\s*인사|인사\s*드립니다)",
+    re.IGNORECASE,
+)
+_URL = re.compile(r"https?://\S+")
+# Byte-level counting (C speed): UTF-8 lead bytes of U+A000-U+DFFF, which
+# covers the Hangul syllables, and a table deleting all but ASCII letters
+_HANGUL_LEAD_BYTES = (0xEA, 0xEB, 0xEC, 0xED)
+_NOT_ASCII_LETTER = bytes(b for b in range(256) if not chr(b).isascii() or not chr(b).isalpha())
+
+# Signal weights; a post is junk at score >= threshold (default 1.0).
+# A test title alone is junk, and so is a greeting with a short body
+WEIGHTS = {
+    TEST_TITLE: 1.0,
+    GREETING_TITLE: 0.4,
+    TOO_SHORT: 0.6,
+    LOW_HANGUL: 0.3,
+    REPETITIVE: 0.7,
+    URL_HEAVY: 0.6,
+    AUTHOR_BURST: 0.4,
+}
+
+MIN_CONTENT_CHARS = 40
+MIN_HANGUL_RATIO = 0.1
+MIN_COMPRESSION_RATIO = 0.3  # zlib size / raw size; floods compress well
+MAX_SCAN_CHARS = 4000  # signals only look at the start of long posts
+MAX_URL_CHAR_RATIO = 0.5
+BURST_POSTS = 5  # posts by one author ...
+BURST_WINDOW = timedelta(hours=1)  # ... within this window
+ENGAGEMENT_GUARD = 10  # upvotes + comments that always keep a post
+
+
+@dataclass(slots=True)
+class JunkScore:
+    """Junk score of one post and the signals behind it."""
+    score: float = 0.0
+    reasons: List[str] = field(default_factory=list)
+
+    def add(self, reason: str, weight: float = 1.0) -> None:
+        self.score += WEIGHTS[reason] * weight
+        self.reasons.append(reason)
+
+
+def score_title(title: str) -> JunkScore:
+    """Title signals only (available during the candidate scan)."""
+    junk = JunkScore()
+    title = title or ""
+    if _TEST_TITLE.match(title):
+        junk.add(TEST_TITLE)
+    elif _GREETING_TITLE.match(title):
+        junk.add(GREETING_TITLE)
+    return junk
+
+
+def score_post(post: Post) -> JunkScore:
+    """Text signals of one post (content signals only if content is loaded)."""
+    junk = score_title(post.title)
+    if not post.content_loaded:
+        return junk
+
+    content = (post.content or "")[:MAX_SCAN_CHARS]
+    urls = _URL.findall(content) if "http" in content else []
+    text = " ".join((_URL.sub(" ", content) if urls else content).split())
+    if len(text) < MIN_CONTENT_CHARS:
+        # Twice as bad when there is (next to) nothing
+        junk.add(TOO_SHORT, 2.0 if len(text) < MIN_CONTENT_CHARS // 4 else 1.0)
+
+    compact = text.replace(" ", "").encode("utf-8")
+    hangul = sum(compact.count(b) for b in _HANGUL_LEAD_BYTES)
+    letters = hangul + len(compact.translate(None, _NOT_ASCII_LETTER))
+    if letters >= MIN_CONTENT_CHARS and hangul / letters < MIN_HANGUL_RATIO:
+        junk.add(LOW_HANGUL)
+
+    if len(compact) >= 200 and len(zlib.compress(compact)) / len(compact) < MIN_COMPRESSION_RATIO:
+        junk.add(REPETITIVE)
+
+    url_chars = sum(len(u) for u in urls)
+    if url_chars and url_chars / max(len(content.strip()), 1) > MAX_URL_CHAR_RATIO:
+        junk.add(URL_HEAVY)
+    return junk
+
+
+def _burst_rows(
+    author_ids: Sequence[str],
+    times: Sequence,
+    window: Union[timedelta, float] = BURST_WINDOW,
+) -> List[int]:
+    """Indices in an author's burst (BURST_POSTS within window).
+
+    times are datetimes (window a timedelta) or seconds (window in seconds).
+    """
+    by_author: Dict[str, List[int]] = defaultdict(list)
+    for i, author_id in enumerate(author_ids):
+        by_author[author_id].append(i)
+
+    flagged = set()
+    for indices in by_author.values():
+        if len(indices) < BURST_POSTS:
+            continue
+        indices.sort(key=lambda i: times[i])
+        start = 0
+        for end in range(len(indices)):
+            while times[indices[end]] - times[indices[start]] > window:
+                start += 1
+            if end - start + 1 >= BURST_POSTS:
+                flagged.update(indices[start:end + 1])
+    return sorted(flagged)
+
+
+def _burst_posts(posts: Sequence[Post]) -> List[int]:
+    """Indices of posts in an author's burst (BURST_POSTS within BURST_WINDOW)."""
+    return _burst_rows([p.author_id for p in posts], [p.created_at for p in posts])
+
+
+def score_posts(posts: Sequence[Post]) -> List[JunkScore]:
+    """Junk scores for posts, in input order (one pass plus per-author bursts)."""
+    scores = [score_post(p) for p in posts]
+    for i in _burst_posts(posts):
+        scores[i].add(AUTHOR_BURST)
+    return scores
+
+
+def split_junk(
+    posts: Sequence[Post],
+    threshold: float = 1.0,
+) -> Tuple[List[Post], List[Tuple[Post, JunkScore]]]:
+    """Split posts into (kept, [(dropped post, its JunkScore)]), order preserved."""
+    kept: List[Post] = []
+    dropped: List[Tuple[Post, JunkScore]] = []
+    for post, junk in zip(posts, score_posts(posts)):
+        if junk.score >= threshold and not _engaged(post):
+            dropped.append((post, junk))
+        else:
+            kept.append(post)
+    return kept, dropped
+
+
+def scan_junk_rows(
+    titles: Sequence[str],
+    author_ids: Sequence[str],
+    created_seconds: Sequence[float],
+    engagement: Sequence[int],
+    threshold: float = 1.0,
+) -> Dict[int, JunkScore]:
+    """Rows that are junk by title and burst signals alone (columnar scan).
+
+    Args:
+        titles, author_ids, created_seconds: Projected columns, aligned
+        engagement: upvotes + comment_count per row
+        threshold: Junk score that drops a row
+
+    Returns:
+        Mapping of dropped row -> its JunkScore
+    """
+    scores = [score_title(t) for t in titles]
+    for i in _burst_rows(author_ids, created_seconds, BURST_WINDOW.total_seconds()):
+        scores[i].add(AUTHOR_BURST)
+    return {
+        i: junk for i, junk in enumerate(scores)
+        if junk.score >= threshold and engagement[i] < ENGAGEMENT_GUARD
+    }
+
+
+class ScanFilter:
+    """Title and burst signals applied while the candidate window streams.
+
+    watch() drops posts whose title alone reaches the threshold before
+    they take a top-k slot, and remembers every post's author and time;
+    split() then adds the author-burst signal, which needs the whole
+    window, to the posts that were kept.
+    """
+
+    def __init__(self, threshold: float = 1.0):
+        self.threshold = threshold
+        self.dropped: List[Tuple[Post, JunkScore]] = []
+        self._seen: Set[str] = set()
+        self._ids: List[str] = []
+        self._authors: List[str] = []
+        self._times: List = []
+        self._bursts: Optional[Set[str]] = None
+
+    def watch(self, posts: Iterable[Post]) -> Iterator[Post]:
+        """Yield the posts whose title signals stay below the threshold."""
+        for post in posts:
+            if post.id not in self._seen:
+                self._seen.add(post.id)
+                self._ids.append(post.id)
+                self._authors.append(post.author_id)
+                self._times.append(post.created_at)
+                self._bursts = None
+            junk = score_title(post.title)
+            if junk.score >= self.threshold and not _engaged(post):
+                self.dropped.append((post, junk))
+            else:
+                yield post
+
+    def split(self, posts: Sequence[Post]) -> Tuple[List[Post], List[Tuple[Post, JunkScore]]]:
+        """Split posts into (kept, dropped) by title and burst signals."""
+        if self._bursts is None:
+            self._bursts = {self._ids[i] for i in _burst_rows(self._authors, self._times)}
+        kept: List[Post] = []
+        dropped: List[Tuple[Post, JunkScore]] = []
+        for post in posts:
+            junk = score_title(post.title)
+            if post.id in self._bursts:
+                junk.add(AUTHOR_BURST)
+            if junk.score >= self.threshold and not _engaged(post):
+                dropped.append((post, junk))
+            else:
+                kept.append(post)
+        return kept, dropped
+
+
+def _engaged(post: Post) -> bool:
+    return post.upvotes + post.comment_count >= ENGAGEMENT_GUARD
@@ -1,10 +1,15 @@
-"""LLM-based topic grouping for digest posts."""
+"""Topic grouping for digest posts: local clustering, LLM naming."""
+import asyncio
 from dataclasses import dataclass
-from typing import List
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 
 from .digest_evaluator import EvaluationResult
-from .llm_client import LLMClient
-from .post_fetcher import format_post_summary
+from .clients import get_async_llm_client, get_llm_client, get_topic_tracker
+from .config import get_config
+from .topic_clusters import agglomerate, tfidf_vectors
 
 
 @dataclass
@@ -14,49 +19,55 @@ class TopicGroup:
     description: str
     posts: List[EvaluationResult]
     importance: int = 5  # 1-10, for ordering
+    topic_id: Optional[int] = None  # topic_tracker id, once recorded
+    continuing: bool = False  # topic was already covered on an earlier day
 
 
 GROUPING_SYSTEM_PROMPT = """당신은 봇마당 커뮤니티의 편집자입니다.
-포스트들을 주제별로 그룹화하고 중요도를 평가합니다.
+주제별로 묶인 포스트 그룹에 이름을 붙이고 중요도를 평가합니다.
 JSON 형식으로만 응답합니다."""
 
-GROUPING_USER_PROMPT = """다음 포스트들을 주제별로 그룹화해주세요.
-비슷한 주제는 하나로 묶고, 독립적인 주제는 따로 분류합니다.
-
-{posts_list}
-
-=== 그룹화 기준 ===
-- 같은 사건/이슈를 다루는 글은 같은 그룹
-- AI/LLM/봇 관련 기술 주제
-- 봇마당 커뮤니티 관련 주제
-- 뉴스/시사 관련
-- 기타/잡담
-
-각 그룹에 적절한 이름과 한줄 설명을 붙이고,
+NAMING_USER_PROMPT = """다음은 비슷한 주제끼리 미리 묶은 포스트 그룹입니다.
+각 그룹에 이모지로 시작하는 짧은 이름과 한줄 설명을 붙이고,
 중요도(importance)를 1-10으로 평가해주세요.
 (높을수록 다이제스트에서 자세히 다룰 주제)
 
-다음 JSON 형식으로 응답:
+{clusters_list}
+
+다음 JSON 형식으로 응답 (모든 그룹 포함):
 {{
   "groups": [
     {{
+      "group": 1,
       "name": "🤖 AI 에이전트 개발",
       "description": "봇 개발 관련 기술 논의",
-      "post_indices": [1, 4, 7],
       "importance": 8
     }},
     ...
   ]
 }}"""
 
+# Cluster text: the title counts twice, plus the start of the content
+CLUSTER_CONTENT_CHARS = 500
+# Titles shown per cluster in the naming prompt
+NAMING_TITLES_PER_GROUP = 5
+
 
 def group_posts_by_topic(
-    evaluated_posts: List[EvaluationResult]
+    evaluated_posts: List[EvaluationResult],
+    target_date: Optional[datetime] = None,
 ) -> List[TopicGroup]:
-    """Group evaluated posts by topic using LLM.
+    """Group evaluated posts by topic.
+    
+    Posts that continue a topic from an earlier digest (see topic_tracker)
+    join it under its stored name. The rest are clustered locally (see
+    topic_clusters); one short LLM call then names each new cluster and
+    rates its importance. If that call fails the clusters are kept with
+    names and importance derived locally.
     
     Args:
         evaluated_posts: Posts that passed evaluation
+        target_date: Digest date (default: today), for topic tracking
         
     Returns:
         List of TopicGroup, sorted by importance descending
@@ -64,54 +75,206 @@ def group_posts_by_topic(
     if not evaluated_posts:
         return []
     
-    llm = LLMClient()
+    plan = _plan_groups(evaluated_posts, target_date)
+    fresh: List[TopicGroup] = []
+    if plan.clusters:
+        llm = get_llm_client()
+        try:
+            response = llm.chat_json(**_naming_request(plan.clusters))
+            fresh = _named_groups(response, plan.clusters)
+        except Exception as e:
+            print(f"⚠️  그룹 이름 생성 오류: {e}")
+            fresh = _local_groups(plan.clusters)
+    return _finish_groups(plan, fresh)
+
+
+async def group_posts_by_topic_async(
+    evaluated_posts: List[EvaluationResult],
+    target_date: Optional[datetime] = None,
+) -> List[TopicGroup]:
+    """Async variant of group_posts_by_topic()."""
+    if not evaluated_posts:
+        return []
+    
+    plan = await asyncio.to_thread(_plan_groups, evaluated_posts, target_date)
+    fresh: List[TopicGroup] = []
+    if plan.clusters:
+        llm = get_async_llm_client()
+        try:
+            response = await llm.chat_json(**_naming_request(plan.clusters))
+            fresh = _named_groups(response, plan.clusters)
+        except Exception as e:
+            print(f"⚠️  그룹 이름 생성 오류: {e}")
+            fresh = _local_groups(plan.clusters)
+    return await asyncio.to_thread(_finish_groups, plan, fresh)
+
+
+@dataclass
+class _GroupingPlan:
+    """Posts split into continuing topics and new clusters to be named."""
+    date: str  # YYYY-MM-DD
+    vectors: Dict[str, np.ndarray]  # post id -> TF-IDF row
+    continuing: List[TopicGroup]
+    clusters: List[List[EvaluationResult]]
+
+
+def _plan_groups(
+    evaluated_posts: List[EvaluationResult],
+    target_date: Optional[datetime],
+) -> _GroupingPlan:
+    """Match posts to earlier topics, cluster the rest locally."""
+    date = (target_date or datetime.now()).strftime("%Y-%m-%d")
+    texts = [
+        f"{r.post.title}\n{r.post.title}\n{(r.post.content or '')[:CLUSTER_CONTENT_CHARS]}"
+        for r in evaluated_posts
+    ]
+    vectors = tfidf_vectors(texts)
+    
+    tracker = get_topic_tracker()
+    if tracker is not None:
+        tracker.purge(date)
+        matches = tracker.match([r.post.id for r in evaluated_posts], vectors, date)
+    else:
+        matches = [None] * len(evaluated_posts)
     
-    # Format posts list
-    posts_list = "\n\n".join(
-        format_post_summary(r.post, i)
-        for i, r in enumerate(evaluated_posts, 1)
-    )
+    # Continuing topics, in order of their best post
+    continuing: Dict[int, TopicGroup] = {}
+    leftover = []
+    for i, (result, topic) in enumerate(zip(evaluated_posts, matches)):
+        if topic is None:
+            leftover.append(i)
+        elif topic.topic_id in continuing:
+            continuing[topic.topic_id].posts.append(result)
+        else:
+            continuing[topic.topic_id] = TopicGroup(
+                name=topic.name,
+                description=topic.description,
+                posts=[result],
+                topic_id=topic.topic_id,
+                continuing=True,
+            )
+    for group in continuing.values():
+        group.importance = _local_importance(group.posts)
+    if continuing:
+        matched = sum(len(g.posts) for g in continuing.values())
+        print(f"   🔁 계속되는 이야기: {len(continuing)}개 주제 ({matched}개 포스트)")
     
-    try:
-        response = llm.chat_json(
-            user_prompt=GROUPING_USER_PROMPT.format(posts_list=posts_list),
-            system_prompt=GROUPING_SYSTEM_PROMPT,
-            temperature=0.3,
-            max_tokens=2000,
+    clusters = agglomerate(vectors[leftover], get_config().TOPIC_CLUSTER_SIMILARITY)
+    return _GroupingPlan(
+        date=date,
+        vectors={r.post.id: row for r, row in zip(evaluated_posts, vectors)},
+        continuing=list(continuing.values()),
+        clusters=[[evaluated_posts[leftover[i]] for i in cluster] for cluster in clusters],
+    )
+
+
+def _finish_groups(plan: _GroupingPlan, fresh: List[TopicGroup]) -> List[TopicGroup]:
+    """Remember today's topics for the next run; sort by importance."""
+    groups = plan.continuing + fresh
+    tracker = get_topic_tracker()
+    if tracker is not None:
+        for group in groups:
+            ids = [r.post.id for r in group.posts]
+            group.topic_id = tracker.record(
+                plan.date,
+                ids,
+                np.stack([plan.vectors[post_id] for post_id in ids]),
+                name=group.name,
+                description=group.description,
+                topic_id=group.topic_id,
+            )
+    return _by_importance(groups)
+
+
+def _naming_request(clusters: List[List[EvaluationResult]]) -> dict:
+    """chat_json() kwargs for naming clusters."""
+    blocks = []
+    for i, cluster in enumerate(clusters, 1):
+        titles = "\n".join(
+            f"- {r.post.title} ({r.post.submadang})"
+            for r in cluster[:NAMING_TITLES_PER_GROUP]
         )
-        
+        more = len(cluster) - NAMING_TITLES_PER_GROUP
+        if more > 0:
+            titles += f"\n- 외 {more}개"
+        blocks.append(f"[그룹 {i}] 포스트 {len(cluster)}개\n{titles}")
+    return dict(
+        user_prompt=NAMING_USER_PROMPT.format(clusters_list="\n\n".join(blocks)),
+        system_prompt=GROUPING_SYSTEM_PROMPT,
+        temperature=0.3,
+        max_tokens=1500,
+        schema={"groups": list},
+    )
+
+
+def _named_groups(
+    response: Any,
+    clusters: List[List[EvaluationResult]],
+) -> List[TopicGroup]:
+    """Apply LLM names/importance to clusters, in cluster order.
+    
+    Clusters the response skipped keep their local name.
+    """
+    # Handle both {"groups": [...]} and direct list [...] formats
+    if isinstance(response, list):
+        groups_data = response
+    else:
         groups_data = response.get("groups", [])
-        groups = []
-        
-        for g in groups_data:
-            indices = g.get("post_indices", [])
-            posts = []
-            for idx in indices:
-                idx_0based = idx - 1  # Convert to 0-based
-                if 0 <= idx_0based < len(evaluated_posts):
-                    posts.append(evaluated_posts[idx_0based])
-            
-            if posts:  # Only add groups with posts
-                groups.append(TopicGroup(
-                    name=g.get("name", "기타"),
-                    description=g.get("description", ""),
-                    posts=posts,
-                    importance=g.get("importance", 5),
-                ))
-        
-        # Sort by importance
-        groups.sort(key=lambda g: g.importance, reverse=True)
-        return groups
-        
-    except Exception as e:
-        print(f"⚠️  그룹화 오류: {e}")
-        # Fallback: single group with all posts
-        return [TopicGroup(
-            name="📝 오늘의 포스트",
-            description="봇마당에 올라온 글들",
-            posts=evaluated_posts,
-            importance=5,
-        )]
+    
+    groups = _local_groups(clusters)
+    for g in groups_data:
+        if not isinstance(g, dict):
+            continue
+        try:
+            idx = int(g.get("group", 0)) - 1  # Convert to 0-based
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= idx < len(groups):
+            continue
+        group = groups[idx]
+        group.name = g.get("name") or group.name
+        group.description = g.get("description", group.description)
+        try:
+            group.importance = int(g.get("importance", group.importance))
+        except (TypeError, ValueError):
+            pass
+    
+    return groups
+
+
+def _local_groups(clusters: List[List[EvaluationResult]]) -> List[TopicGroup]:
+    """Groups named after their best post and rated by score, in cluster order."""
+    groups = []
+    for cluster in clusters:
+        best = cluster[0]
+        title = best.post.title if len(best.post.title) <= 30 else best.post.title[:30] + "…"
+        name = f"📌 {title}" if len(cluster) > 1 else f"📝 {title}"
+        groups.append(TopicGroup(
+            name=name,
+            description=f"관련 포스트 {len(cluster)}개",
+            posts=cluster,
+            importance=_local_importance(cluster),
+        ))
+    return groups
+
+
+def _local_importance(posts: List[EvaluationResult]) -> int:
+    """Best evaluation score, plus a bonus for topics several posts talk about."""
+    scores = [_as_score(r.score) for r in posts]
+    return min(10, max(scores) + min(2, len(posts) - 1))
+
+
+def _by_importance(groups: List[TopicGroup]) -> List[TopicGroup]:
+    """Sort by importance (stable: ties keep cluster order)."""
+    groups.sort(key=lambda g: g.importance, reverse=True)
+    return groups
+
+
+def _as_score(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 5
 
 
 def split_main_and_brief(
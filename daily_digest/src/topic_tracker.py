@@ -0,0 +1,246 @@
+"""Day-over-day topic memory.
+
+Each digest run stores its topics (name, description and the centroid of
+their posts' TF-IDF vectors, see topic_clusters) and which posts they
+contained. The next day, posts are first matched to the nearest earlier
+topic; only posts no topic claims are clustered fresh. Matched topics
+keep their name, so a running story is recognized without LLM calls.
+
+Vectors use the hashed feature space of topic_clusters, so centroids
+from different days are comparable (IDF weights are per day, which only
+shifts similarities slightly).
+"""
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .topic_clusters import centroid
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    topic_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    centroid BLOB NOT NULL,
+    post_count INTEGER NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    post_id TEXT PRIMARY KEY,
+    topic_id INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_topic ON assignments (topic_id);
+"""
+
+
+@dataclass(slots=True)
+class TrackedTopic:
+    """A topic seen on an earlier day."""
+    topic_id: int
+    name: str
+    description: str
+    first_seen: str  # YYYY-MM-DD
+    last_seen: str
+    post_count: int
+
+
+def _pack(vector: np.ndarray) -> bytes:
+    # Centroids are sparse; zlib shrinks the zero runs
+    return zlib.compress(vector.astype(np.float32).tobytes())
+
+
+def _unpack(blob: bytes) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(blob), dtype=np.float32)
+
+
+class TopicTracker:
+    """SQLite store of topic centroids and post assignments."""
+
+    def __init__(self, path: str, max_age_days: int = 14, similarity: float = 0.2):
+        """Open (or create) the store.
+
+        Args:
+            path: SQLite file path
+            max_age_days: Topics not seen for this many days are forgotten
+            similarity: Minimum cosine similarity of a post to a centroid
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def match(
+        self,
+        post_ids: Sequence[str],
+        vectors: np.ndarray,
+        date: str,
+    ) -> List[Optional[TrackedTopic]]:
+        """Earlier topic of each post (or None).
+
+        A post already assigned to a topic on an earlier day stays in it;
+        others go to the nearest centroid of a topic first seen before
+        date and last seen within max_age_days, if similar enough.
+
+        Args:
+            post_ids: Post ids, aligned with vectors
+            vectors: L2-normalized TF-IDF rows (topic_clusters.tfidf_vectors)
+            date: Digest date, YYYY-MM-DD
+
+        Returns:
+            One TrackedTopic or None per post
+        """
+        oldest = _shift(date, -self.max_age_days)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic_id, name, description, first_seen, last_seen, post_count, centroid "
+                "FROM topics WHERE first_seen < ? AND last_seen >= ?",
+                (date, oldest),
+            ).fetchall()
+            assigned = dict(self._conn.execute(
+                f"SELECT post_id, topic_id FROM assignments "
+                f"WHERE date < ? AND post_id IN ({','.join('?' * len(post_ids))})",
+                [date, *post_ids],
+            ).fetchall()) if post_ids else {}
+
+        topics: List[TrackedTopic] = []
+        centroids = []
+        for *fields, blob in rows:
+            vector = _unpack(blob)
+            if len(vector) != vectors.shape[1]:
+                continue  # stored with another feature size
+            topics.append(TrackedTopic(*fields))
+            centroids.append(vector)
+        if not topics:
+            return [None] * len(post_ids)
+
+        by_id = {t.topic_id: i for i, t in enumerate(topics)}
+        sims = vectors @ np.stack(centroids).T
+        best = sims.argmax(axis=1)
+        matches: List[Optional[TrackedTopic]] = []
+        for row, post_id in enumerate(post_ids):
+            known = by_id.get(assigned.get(post_id, -1))
+            if known is not None:
+                matches.append(topics[known])
+            elif sims[row, best[row]] >= self.similarity:
+                matches.append(topics[best[row]])
+            else:
+                matches.append(None)
+        return matches
+
+    def record(
+        self,
+        date: str,
+        post_ids: Sequence[str],
+        vectors: np.ndarray,
+        name: str,
+        description: str = "",
+        topic_id: Optional[int] = None,
+    ) -> int:
+        """Store a day's topic: update topic_id's centroid, or create a topic.
+
+        Posts already recorded for the topic do not count twice, so a
+        date can be re-run safely.
+
+        Returns:
+            The topic id
+        """
+        with self._lock:
+            if topic_id is None:
+                # Same posts recorded as a new topic by an earlier run of this date
+                topic_id = self._topic_started(post_ids, date)
+            if topic_id is not None:
+                row = self._conn.execute(
+                    "SELECT centroid, post_count, last_seen FROM topics WHERE topic_id = ?",
+                    (topic_id,),
+                ).fetchone()
+            else:
+                row = None
+            known = self._assigned_to(post_ids, topic_id) if row is not None else set()
+            new_rows = [i for i, post_id in enumerate(post_ids) if post_id not in known]
+
+            if row is None:
+                cursor = self._conn.execute(
+                    "INSERT INTO topics "
+                    "(name, description, centroid, post_count, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, description, _pack(centroid(vectors)), len(post_ids), date, date),
+                )
+                topic_id = cursor.lastrowid
+            else:
+                old_centroid, post_count, last_seen = row
+                # Weighted by post count: old centroid stands for its posts
+                total = _unpack(old_centroid) * post_count + vectors[new_rows].sum(axis=0)
+                self._conn.execute(
+                    "UPDATE topics SET name = ?, description = ?, centroid = ?, "
+                    "post_count = ?, last_seen = ? WHERE topic_id = ?",
+                    (
+                        name, description, _pack(_normalized(total)),
+                        post_count + len(new_rows), max(last_seen, date), topic_id,
+                    ),
+                )
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO assignments (post_id, topic_id, date) VALUES (?, ?, ?)",
+                [(post_id, topic_id, date) for post_id in post_ids if post_id not in known],
+            )
+            self._conn.commit()
+        return topic_id
+
+    def purge(self, today: str) -> int:
+        """Forget topics (and their assignments) not seen within max_age_days."""
+        oldest = _shift(today, -self.max_age_days)
+        with self._lock:
+            stale = [r[0] for r in self._conn.execute(
+                "SELECT topic_id FROM topics WHERE last_seen < ?", (oldest,)
+            ).fetchall()]
+            self._conn.executemany(
+                "DELETE FROM assignments WHERE topic_id = ?", [(t,) for t in stale]
+            )
+            self._conn.executemany(
+                "DELETE FROM topics WHERE topic_id = ?", [(t,) for t in stale]
+            )
+            self._conn.commit()
+        return len(stale)
+
+    def _topic_started(self, post_ids: Sequence[str], date: str) -> Optional[int]:
+        if not post_ids:
+            return None
+        placeholders = ",".join("?" * len(post_ids))
+        row = self._conn.execute(
+            "SELECT a.topic_id FROM assignments a JOIN topics t ON t.topic_id = a.topic_id "
+            f"WHERE t.first_seen = ? AND a.post_id IN ({placeholders}) LIMIT 1",
+            [date, *post_ids],
+        ).fetchone()
+        return row[0] if row else None
+
+    def _assigned_to(self, post_ids: Sequence[str], topic_id: int) -> set:
+        if not post_ids:
+            return set()
+        placeholders = ",".join("?" * len(post_ids))
+        return {r[0] for r in self._conn.execute(
+            f"SELECT post_id FROM assignments WHERE topic_id = ? AND post_id IN ({placeholders})",
+            [topic_id, *post_ids],
+        ).fetchall()}
+
+
+def _normalized(vector: np.ndarray) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def _shift(date: str, days: int) -> str:
+    return (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
@@ -0,0 +1,23 @@
+import os
+from datetime import datetime
+
+import pytest
+
+# Config.load() requires credentials; tests never reach the real services
+os.environ.setdefault("FIREBASE_PROJECT_ID", "test-project")
+os.environ.setdefault("UPSTAGE_API_KEY", "test-key")
+
+from src.firebase_reader import Post
+
+
+@pytest.fixture
+def make_post():
+    """Factory of Posts with harmless defaults."""
+    def make(post_id: str = "p1", title: str = "제목", content: str = "내용", **fields) -> Post:
+        values = dict(
+            submadang="general", author_id="a1", author_name="봇", upvotes=0,
+            downvotes=0, comment_count=0, created_at=datetime(2026, 2, 1, 9, 0),
+        )
+        values.update(fields)
+        return Post(id=post_id, title=title, content=content, **values)
+    return make
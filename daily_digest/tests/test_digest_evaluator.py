@@ -0,0 +1,106 @@
+import pytest
+
+from src import digest_evaluator
+from src.digest_evaluator import _batch_results, _tournament
+from src.eval_cache import EvaluationCache, Verdict
+from src.prompt_packer import PackedPrompt
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = EvaluationCache(str(tmp_path / "evaluations.sqlite"))
+    monkeypatch.setattr(digest_evaluator, "get_evaluation_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+def _run(posts, respond):
+    """Drive _tournament; respond(shard_posts) returns the LLM's JSON answer."""
+    sent = []
+    rounds = _tournament(posts)
+    try:
+        shards, _ = next(rounds)
+        while True:
+            sent.append([p.id for shard in shards for p in shard.posts])
+            shards, _ = rounds.send([_batch_results(respond(s.posts), s.posts) for s in shards])
+    except StopIteration as stop:
+        return stop.value, sent
+
+
+def test_batch_results_selected_then_excluded(make_post):
+    posts = [make_post(f"p{i}") for i in range(1, 5)]
+    response = {
+        "selected": [{"index": 1, "score": 6}, {"index": 3, "score": 9}],
+        "excluded": [2, 3, "x", 99],
+    }
+    results = _batch_results(response, posts)
+    assert [(r.post.id, r.include) for r in results] == [
+        ("p3", True), ("p1", True), ("p2", False),
+    ]
+
+
+def test_only_explicit_verdicts_are_cached(cache, make_post):
+    day1 = [make_post(f"p{i}", content=f"내용 {i}") for i in range(1, 5)]
+
+    def first_day(shard_posts):
+        index = {p.id: i for i, p in enumerate(shard_posts, 1)}
+        return {"selected": [{"index": index["p1"], "score": 8}], "excluded": [index["p2"]]}
+
+    selection, _ = _run(day1, first_day)
+    assert [r.post.id for r in selection] == ["p1"]
+    verdicts = cache.get_many(day1, digest_evaluator._evaluation_version())
+    assert {k: v.include for k, v in verdicts.items()} == {"p1": True, "p2": False}
+
+    # Next day: the excluded post is not sent again, the cached selection
+    # is re-judged with the new posts; p3/p4 only missed a shortlist
+    day2 = day1 + [make_post("p5", content="새 글")]
+
+    def second_day(shard_posts):
+        index = {p.id: i for i, p in enumerate(shard_posts, 1)}
+        return {"selected": [{"index": index["p5"], "score": 9}, {"index": index["p1"], "score": 6}]}
+
+    selection, sent = _run(day2, second_day)
+    assert sent == [["p3", "p4", "p5", "p1"]]
+    assert [r.post.id for r in selection] == ["p5", "p1"]
+
+
+def test_cached_selections_skip_shard_rounds(cache, make_post, monkeypatch):
+    monkeypatch.setattr(digest_evaluator, "SHARD_SHORTLIST", 1)
+    monkeypatch.setattr(digest_evaluator, "_shard_posts", lambda posts: [
+        PackedPrompt(posts=posts[i:i + 3], text="", preview_chars=0, tokens=0)
+        for i in range(0, len(posts), 3)
+    ])
+    cache.put_many([(make_post("c1"), Verdict(include=True, score=10, reason=""))],
+                   digest_evaluator._evaluation_version())
+    posts = [make_post("c1")] + [make_post(f"p{i}", content=f"내용 {i}") for i in range(1, 5)]
+
+    # Shard scores are not comparable with the stored one: c1 must win the final round
+    def respond(shard_posts):
+        return {"selected": [{"index": len(shard_posts), "score": 3}]}
+
+    selection, sent = _run(posts, respond)
+    assert sent == [["p1", "p2", "p3", "p4"], ["p3", "p4", "c1"]]
+    assert [r.post.id for r in selection] == ["c1"]
+
+
+def test_no_new_posts_rejudges_cached_selections(cache, make_post):
+    posts = [make_post("p1"), make_post("p2", content="다른 내용")]
+    _run(posts, lambda shard: {"selected": [{"index": 1, "score": 7}, {"index": 2, "score": 9}]})
+    selection, sent = _run(posts, lambda shard: {"selected": [{"index": 2, "score": 8}]})
+    assert len(sent) == 1 and sorted(sent[0]) == ["p1", "p2"]
+    assert len(selection) == 1
+
+
+def test_empty_selection_is_not_a_failure(cache, make_post):
+    posts = [make_post(f"p{i}", content=f"내용 {i}") for i in range(1, 6)]
+    selection, sent = _run(posts, lambda shard: {"selected": [], "excluded": [1, 2, 3, 4, 5]})
+    assert selection == []
+    assert len(sent) == 1
+
+
+def test_failed_evaluation_returns_none(cache, make_post):
+    rounds = _tournament([make_post("p1")])
+    next(rounds)
+    with pytest.raises(StopIteration) as stop:
+        rounds.send([None])
+    assert stop.value.value is None
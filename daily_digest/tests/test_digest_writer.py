@@ -0,0 +1,56 @@
+from src.digest_writer import _apply_edits, _section_issues
+
+LINK = "👉 [자세히 보기](https://botmadang.org/post/abc)"
+TAG = "🔁 **계속되는 이야기** · 봇 코딩 대결"
+SECTION = f"""### 🤖 봇들의 코딩 대결
+
+봇마당 친구들, 오늘은 코딩 봇 대결 이야기예요.
+Let me think about how to summarize this post in Korean now.
+
+{TAG}
+
+{LINK}"""
+
+
+def test_section_issues_flags_english_and_external_links():
+    issues = _section_issues([SECTION + "\n참고: https://example.com/x"])
+    assert any(i.startswith("영어 문장") for i in issues[0])
+    assert any(i.startswith("외부 링크") for i in issues[0])
+
+
+def test_section_issues_ignores_generated_lines():
+    other = f"### 💡 두 번째 이야기\n\n같은 주제의 다른 포스트예요.\n\n{TAG}\n\n{LINK}"
+    first = f"### 🤖 첫 번째 이야기\n\n코딩 봇 대결 결과가 나왔어요.\n\n{TAG}\n\n{LINK}"
+    assert _section_issues([first, other]) == [[], []]
+
+
+def test_section_issues_flags_lines_repeated_across_sections():
+    line = "여러 봇이 같은 문제를 풀고 결과를 비교했어요."
+    issues = _section_issues([f"### A\n\n{line}", f"### B\n\n{line}"])
+    assert issues[0] == []
+    assert issues[1] == [f"중복 문장: {line}"]
+
+
+def test_apply_edits_removes_flagged_text():
+    edits = {"edits": [{"find": "Let me think about how to summarize this post in Korean now.\n", "replace": ""}]}
+    edited = _apply_edits(SECTION, edits)
+    assert "Let me think" not in edited
+    assert edited.startswith("### 🤖 봇들의 코딩 대결")
+    assert TAG in edited and LINK in edited
+
+
+def test_apply_edits_skips_protected_and_unknown_edits():
+    edits = {"edits": [
+        {"find": "### 🤖 봇들의 코딩 대결", "replace": "### 새 제목"},
+        {"find": LINK, "replace": ""},
+        {"find": TAG, "replace": ""},
+        {"find": "원문에 없는 문장", "replace": "x"},
+        "not an edit",
+    ]}
+    assert _apply_edits(SECTION, edits) == SECTION
+
+
+def test_apply_edits_keeps_section_when_body_would_vanish():
+    section = f"### 제목\n\n본문 한 줄이에요.\n\n{LINK}"
+    edits = {"edits": [{"find": "본문 한 줄이에요.", "replace": ""}]}
+    assert _apply_edits(section, edits) == section
@@ -0,0 +1,111 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from src.firebase_reader import FirebaseReader
+from src.post_mirror import PostMirror
+
+
+class _Query:
+    """Just enough of a Firestore query over an in-memory comments list."""
+
+    def __init__(self, docs, log):
+        self._docs = docs
+        self._log = log
+
+    def where(self, field, op, value):
+        assert (field, op) == ("post_id", "in") and len(value) <= 30
+        return _Query([d for d in self._docs if d["post_id"] in value], self._log)
+
+    def order_by(self, field, direction=None):
+        return _Query(sorted(self._docs, key=lambda d: d[field], reverse=True), self._log)
+
+    def limit(self, n):
+        return _Query(self._docs[:n], self._log)
+
+    def select(self, fields):
+        return self
+
+    def stream(self):
+        self._log.append(len(self._docs))
+        return [SimpleNamespace(id=d["id"], to_dict=lambda d=d: dict(d)) for d in self._docs]
+
+
+def _reader(comments, log):
+    reader = FirebaseReader.__new__(FirebaseReader)  # skip Firebase setup
+    reader.db = SimpleNamespace(collection=lambda name: _Query(comments, log))
+    reader._comment_cache = {}
+    reader._comment_lock = threading.Lock()
+    return reader
+
+
+def _comment(post_id, upvotes, content="좋은 글이네요"):
+    return {
+        "id": f"{post_id}-{upvotes}", "post_id": post_id, "author_name": "봇",
+        "content": content, "upvotes": upvotes,
+    }
+
+
+def test_busy_post_does_not_crowd_out_others():
+    comments = [_comment("busy", 100 + i) for i in range(50)] + [_comment("quiet", 1)]
+    log = []
+    found = _reader(comments, log).get_top_comments(["busy", "quiet"], per_post=2)
+    assert [c.upvotes for c in found["busy"]] == [149, 148]
+    assert [c.upvotes for c in found["quiet"]] == [1]
+    assert log == [4, 1]  # the quiet post is re-queried alone
+
+
+def test_known_comment_counts_end_the_read():
+    comments = [_comment("busy", 100 + i) for i in range(50)] + [_comment("quiet", 1)]
+    log = []
+    found = _reader(comments, log).get_top_comments(
+        ["busy", "quiet"], per_post=2, comment_counts={"busy": 50, "quiet": 1},
+    )
+    assert [c.upvotes for c in found["quiet"]] == [1]
+    assert log == [3, 1]
+
+
+def test_posts_are_loaded_in_chunks():
+    post_ids = [f"p{i}" for i in range(61)]
+    comments = [_comment(pid, i) for i, pid in enumerate(post_ids)]
+    log = []
+    found = _reader(comments, log).get_top_comments(post_ids, per_post=1)
+    assert len(log) == 3
+    assert all([c.post_id for c in found[pid]] == [pid] for pid in post_ids)
+
+
+def test_cache_is_keyed_by_limits():
+    comments = [_comment("p1", i, "가" * 100) for i in range(5)]
+    log = []
+    reader = _reader(comments, log)
+    assert len(reader.get_top_comments(["p1"], per_post=3, max_chars=300)["p1"]) == 3
+    assert len(reader.get_top_comments(["p1"], per_post=3, max_chars=300)["p1"]) == 3
+    assert len(log) == 1  # second call served from the cache
+
+    short = reader.get_top_comments(["p1"], per_post=3, max_chars=150)["p1"]
+    assert [len(c.content) for c in short] == [100, 50]
+    assert len(reader.get_top_comments(["p1"], per_post=1)["p1"]) == 1
+    assert len(log) == 3
+
+
+def test_blank_comments_are_skipped():
+    comments = [_comment("p1", 9, "  "), _comment("p1", 5)]
+    assert [c.upvotes for c in _reader(comments, []).get_top_comments(["p1"])["p1"]] == [5]
+
+
+def test_sync_mirror_drops_posts_deleted_upstream(tmp_path, make_post):
+    now = datetime.now(timezone.utc)
+    kept = make_post("kept", created_at=now - timedelta(hours=1))
+    spam = make_post("spam", created_at=now - timedelta(hours=2))
+    old = make_post("old", created_at=now - timedelta(days=30))
+    mirror = PostMirror(str(tmp_path / "posts.sqlite"))
+    mirror.upsert([kept, spam, old])
+    mirror.set_watermark(kept.created_at)
+
+    reader = FirebaseReader.__new__(FirebaseReader)  # skip Firebase setup
+    # Firestore no longer has "spam"; "old" is outside the refresh window
+    reader.iter_posts_since = lambda since, fields=None: iter([kept])
+    stats = reader.sync_mirror(mirror, force=True)
+    assert stats["deleted"] == 1
+    assert sorted(p.id for p in mirror.iter_posts_since(now - timedelta(days=60))) == ["kept", "old"]
+    mirror.close()
@@ -0,0 +1,47 @@
+import pytest
+
+from src.json_extract import extract_json, matches_schema
+
+SCHEMA = {"selected": list}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"selected": [1, 2]}', {"selected": [1, 2]}),
+    ('```json\n{"selected": [1]}\n```', {"selected": [1]}),
+    ('Let me think [draft] {"selected": [0]}\n최종: {"selected": [3]}', {"selected": [3]}),
+    ('{"selected": [{"index": 1, "ok": True, "note": None},],}', {"selected": [{"index": 1, "ok": True, "note": None}]}),
+    ('{"selected": [{"index": 1}, {"index": 2, "reason": "잘린', {"selected": [{"index": 1}, {"index": 2, "reason": "잘린"}]}),
+    ('{"selected": [{"index": 1}, {"index": 2, "reason":', {"selected": [{"index": 1}, {"index": 2, "reason": None}]}),
+    ('{"note": "a } in a string", "selected": []}', {"note": "a } in a string", "selected": []}),
+    (
+        'Format should be {"selected": [{"index": 1, "score": 8}]}.\n'
+        '{"selected": [{"index": 3, "score": 9}, {"index": 5, "reason": "괜찮',
+        {"selected": [{"index": 3, "score": 9}, {"index": 5, "reason": "괜찮"}]},
+    ),
+])
+def test_extract_json_repairs(text, expected):
+    assert extract_json(text, SCHEMA) == expected
+
+
+def test_bare_list_answers_single_list_schema():
+    assert extract_json('[{"index": 1}]', SCHEMA) == [{"index": 1}]
+
+
+def test_schema_match_beats_bare_list():
+    assert extract_json('[1] {"selected": [2]}', SCHEMA) == {"selected": [2]}
+
+
+def test_stray_bracket_after_answer_is_ignored():
+    assert extract_json('{"selected": [1]} 참고 [', None) == {"selected": [1]}
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_json("요약할 내용이 없어요.", SCHEMA)
+
+
+def test_wrong_types_do_not_match():
+    with pytest.raises(ValueError):
+        extract_json('{"selected": "none"}', SCHEMA)
+    assert matches_schema({"include": True}, {"include": bool})
+    assert not matches_schema([1], {"include": bool})
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.json_extract import extract_json
+from src.llm_stream import JsonEnd, SectionEnd, StreamCollector, extract_korean
+
+
+def _feed(detector, text: str, size: int = 7):
+    """Feed text in fixed-size chunks; end offset in the full text, or None."""
+    for start in range(0, len(text), size):
+        end = detector.feed(text[start:start + size])
+        if end is not None:
+            return end
+    return None
+
+
+DEEP_DIVE = """### 🤖 봇들의 코딩 대결
+
+봇마당 친구들, 오늘은 코딩 봇 대결 이야기예요.
+여러 봇이 같은 문제를 풀고 결과를 비교했어요.
+
+---
+
+### 💡 왜 중요한가?
+
+어떤 봇이 실전에서 강한지 보여주는 첫 공개 비교잖아요.
+
+### 🗣️ 커뮤니티 반응
+
+댓글에서는 다음 라운드 주제를 두고 투표가 한창이에요.
+"""
+
+
+def test_section_end_keeps_all_subheadings():
+    assert _feed(SectionEnd(), DEEP_DIVE) is None
+
+
+def test_section_end_stops_at_link_line():
+    text = DEEP_DIVE + "\n👉 [자세히 보기](https://example.com/made-up)\n"
+    end = _feed(SectionEnd(), text)
+    assert end == text.index("👉")
+    assert text[:end] == DEEP_DIVE + "\n"
+
+
+def test_section_end_keeps_pointer_body_lines():
+    text = DEEP_DIVE + "\n👉 왜 중요한가?\n👉 첫 공개 비교라서요.\n👉 [자세히 보기](x)\n"
+    end = _feed(SectionEnd(), text)
+    assert end == text.index("👉 [자세히")
+
+
+def test_section_end_ignores_leading_link():
+    text = "[자세히 보기] 먼저 나온 줄\n본문이에요.\n[자세히 보기](x)\n"
+    assert _feed(SectionEnd(), text) == text.rindex("[자세히 보기]")
+
+
+@pytest.mark.parametrize("size", [1, 5, 1000])
+def test_json_end_stops_after_leading_value(size):
+    text = '```json\n{"groups": [{"name": "a}b"}]}\n```\n뒤에 더'
+    end = _feed(JsonEnd({"groups": list}), text, size)
+    assert text[:end].endswith('"a}b"}]}')
+
+
+@pytest.mark.parametrize("size", [1, 5, 1000])
+def test_json_end_reads_past_draft(size):
+    text = '초안: {"selected":[{"index":1}]}\n수정본: {"selected":[{"index":2},{"index":4}]}'
+    assert _feed(JsonEnd({"selected": list}), text, size) is None
+    assert extract_json(text) == {"selected": [{"index": 2}, {"index": 4}]}
+
+
+def test_json_end_waits_for_schema():
+    assert _feed(JsonEnd({"groups": list}), '{"other": 1} 그리고') is None
+
+
+def test_extract_korean_takes_last_korean_block():
+    reasoning = "Let's think about this.\nWait, count characters: 12\n오늘의 요약이에요.\n두 번째 줄이에요."
+    assert extract_korean(reasoning) == "오늘의 요약이에요.\n두 번째 줄이에요."
+
+
+def test_collector_cuts_answer_at_detected_end():
+    collector = StreamCollector(SectionEnd)
+    done = False
+    for piece in ["### 제목\n", "본문이에요.\n", "👉 [자세히", " 보기](x)\n"]:
+        delta = SimpleNamespace(content=piece, reasoning=None)
+        done = collector.feed(SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)]))
+    assert done
+    assert collector.answer() == "### 제목\n본문이에요.\n"
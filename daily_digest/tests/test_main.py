@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from src import main
+from src.main import SKIP_EVAL_POSTS, _skip_eval_results
+
+
+def _body(seed: int) -> str:
+    """Unrelated Hangul text, so distinct posts never look like duplicates."""
+    rng = random.Random(seed)
+    return "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(80))
+
+
+@pytest.fixture(autouse=True)
+def no_io(monkeypatch):
+    monkeypatch.setattr(main, "load_candidate_content", lambda posts: posts)
+    monkeypatch.setattr(main, "enrich_with_comments", lambda posts: posts)
+
+
+def _candidates(make_post, n, replace=()):
+    """n posts in descending hot-score order; replace maps index -> fields."""
+    posts = []
+    for i in range(n):
+        fields = dict(title=f"글 {i}", content=_body(i), upvotes=2 * (n - i))
+        fields.update(dict(replace).get(i, {}))
+        posts.append(make_post(f"p{i}", **fields))
+    return posts
+
+
+def test_skip_eval_backfills_dropped_junk(make_post):
+    junk = {"title": "테스트", "content": "ㅎ", "upvotes": 0}
+    posts = _candidates(make_post, 20, {i: junk for i in (1, 4, 6)})
+    selected = [r.post.id for r in _skip_eval_results(posts[0].created_at, posts)]
+    assert len(selected) == SKIP_EVAL_POSTS
+    assert not {"p1", "p4", "p6"} & set(selected)
+    assert selected[-1] == "p17"
+
+
+def test_skip_eval_backfills_junk_and_merged_duplicates(make_post):
+    junk = {"title": "테스트", "content": "ㅎ", "upvotes": 0}
+    repost = {"title": "글 0", "content": _body(0)}
+    posts = _candidates(make_post, 20, {1: junk, 3: repost, 5: repost})
+    selected = [r.post.id for r in _skip_eval_results(posts[0].created_at, posts)]
+    assert len(selected) == SKIP_EVAL_POSTS
+    assert not {"p1", "p3", "p5"} & set(selected)
+    assert "p17" in selected
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import numpy as np
+
+from src.near_duplicates import (
+    MinHasher, jaccard, near_duplicate_groups, normalize_text, shingles,
+)
+from src.post_fetcher import collapse_near_duplicates
+
+ANNOUNCEMENT = "봇마당 정기 점검 안내: 오늘 밤 11시부터 새벽 2시까지 서버 점검이 진행됩니다. 이용에 참고해 주세요!"
+
+
+def test_normalize_ignores_spacing_and_punctuation():
+    assert normalize_text("봇 마당,  Hello!") == normalize_text("봇마당 hello")
+
+
+def test_shingles_are_unique_and_sorted():
+    s = shingles("가나다라가나다라")
+    assert list(s) == sorted(set(s.tolist()))
+    assert len(shingles("")) == 0
+    assert len(shingles("짧")) == 1
+
+
+def test_jaccard():
+    a = shingles(ANNOUNCEMENT)
+    assert jaccard(a, a) == 1.0
+    assert jaccard(a, shingles("전혀 다른 주제의 글이에요 완전히")) < 0.1
+    assert jaccard(a, np.zeros(0, dtype=np.uint64)) == 0.0
+
+
+def test_minhash_signature_estimates_similarity():
+    hasher = MinHasher(num_permutations=128)
+    a = hasher.signature(shingles(ANNOUNCEMENT))
+    b = hasher.signature(shingles(ANNOUNCEMENT.replace("2시", "3시")))
+    c = hasher.signature(shingles("오늘 점심 메뉴 추천 받아요 김치찌개 어때요"))
+    assert (a == b).mean() > 0.6
+    assert (a == c).mean() < 0.1
+
+
+def test_groups_small_edits_together():
+    texts = [
+        ANNOUNCEMENT,
+        "오늘 점심 메뉴 추천 받아요. 김치찌개랑 된장찌개 중에 고민 중이에요.",
+        ANNOUNCEMENT.replace("11시", "10시") + " 감사합니다.",
+        "[재공지] " + ANNOUNCEMENT,
+        "",
+    ]
+    assert near_duplicate_groups(texts, threshold=0.7) == [[0, 2, 3], [1], [4]]
+
+
+def test_collapse_keeps_best_and_sums_engagement(make_post):
+    posts = [
+        make_post("a", "점검 안내", ANNOUNCEMENT, upvotes=2, comment_count=1),
+        make_post("b", "점검 안내", ANNOUNCEMENT + " 다시 올려요", upvotes=9, comment_count=3),
+        make_post("c", "점심 메뉴", "김치찌개 어때요? 된장찌개도 좋아요. 추천 부탁해요.", upvotes=1),
+    ]
+    merged = collapse_near_duplicates(posts, datetime(2026, 2, 1, 12, 0))
+    assert [p.id for p in merged] == ["b", "c"]
+    assert (merged[0].upvotes, merged[0].comment_count) == (11, 4)
+    assert posts[1].upvotes == 9  # inputs are not modified
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from src.parallel import OrderedTurns, map_concurrently
+
+
+def test_turns_run_in_key_order():
+    turns = OrderedTurns(range(4))
+    order = []
+
+    def job(key):
+        time.sleep(0.01 * (4 - key))  # later keys reach their turn first
+        if key == 2:
+            turns.done(key)  # gave up before its turn
+            return
+        with turns.turn(key):
+            order.append(key)
+
+    map_concurrently(job, range(4), max_workers=4)
+    assert order == [0, 1, 3]
+
+
+def test_async_turns_run_in_key_order():
+    turns = OrderedTurns(range(3))
+    order = []
+
+    async def job(key):
+        await asyncio.sleep(0.01 * (3 - key))
+        await turns.wait_async(key)
+        order.append(key)
+        turns.done(key)
+
+    async def main():
+        await asyncio.gather(*(job(k) for k in range(3)))
+
+    asyncio.run(main())
+    assert order == [0, 1, 2]
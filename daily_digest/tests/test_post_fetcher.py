@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import post_fetcher
+from src.config import get_config
+
+TARGET = datetime(2026, 2, 2)
+
+
+class FakeSource:
+    def __init__(self, posts):
+        self.posts = posts
+
+    def iter_posts_since(self, since, until, fields=None):
+        return iter([p for p in self.posts if since <= p.created_at < until])
+
+    def get_popular_posts_since(self, since, until, limit, order_by, fields=None):
+        return []
+
+
+@pytest.fixture
+def window(make_post, monkeypatch):
+    """Ten posts in yesterday's window; the two hottest have junk titles."""
+    config = get_config()
+    monkeypatch.setattr(config, "MAX_POSTS_TO_EVALUATE", 3)
+    monkeypatch.setattr(config, "MIN_HOT_SCORE", 0)
+    monkeypatch.setattr(config, "SPAM_THRESHOLD", 1.0)
+    start, _ = post_fetcher.digest_window(TARGET, config.DIGEST_HOURS)
+    posts = [
+        make_post(
+            f"p{i}", title="테스트" if i < 2 else f"글 {i}", upvotes=9 - i,
+            author_id=f"a{i}", created_at=start + timedelta(hours=1),
+            content="", content_loaded=False,
+        )
+        for i in range(10)
+    ]
+    monkeypatch.setattr(post_fetcher, "_open_post_source", lambda: FakeSource(posts))
+    return posts
+
+
+def test_scan_drops_junk_before_top_k(window):
+    candidates = post_fetcher.fetch_digest_candidates(TARGET)
+    assert [p.id for p in candidates] == ["p2", "p3", "p4"]
+
+
+def test_batched_scan_drops_junk_before_ranking(window):
+    by_date = post_fetcher.fetch_candidates_for_dates([TARGET])
+    assert [p.id for p in by_date["2026-02-02"]] == ["p2", "p3", "p4"]
+
+
+def test_scan_filter_off(window, monkeypatch):
+    monkeypatch.setattr(get_config(), "SPAM_THRESHOLD", 0)
+    candidates = post_fetcher.fetch_digest_candidates(TARGET)
+    assert [p.id for p in candidates] == ["p0", "p1", "p2"]
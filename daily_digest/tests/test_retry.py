@@ -0,0 +1,213 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from src.llm_client import LLMClient
+from src.rate_limiter import RateLimiter
+from src.retry import (
+    FATAL, RATE_LIMIT, SERVER, TIMEOUT, CircuitBreaker, CircuitOpenError,
+    DeadlineExceededError, RetryPolicy, call_with_retry, call_with_retry_async, classify_error,
+    retry_after_seconds,
+)
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+
+
+def _status_error(status: int) -> openai.APIStatusError:
+    response = httpx.Response(status, request=REQUEST)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+@pytest.mark.parametrize("error, kind", [
+    (openai.RateLimitError("slow down", response=httpx.Response(429, request=REQUEST), body=None), RATE_LIMIT),
+    (openai.APITimeoutError(REQUEST), TIMEOUT),
+    (openai.APIConnectionError(request=REQUEST), SERVER),
+    (_status_error(429), RATE_LIMIT),
+    (_status_error(408), TIMEOUT),
+    (_status_error(503), SERVER),
+    (_status_error(400), FATAL),
+    # Raised while iterating a stream
+    (httpx.ReadTimeout("read timed out"), TIMEOUT),
+    (httpx.RemoteProtocolError("peer closed connection"), SERVER),
+    (openai.APIError("overloaded", request=REQUEST, body=None), SERVER),
+    (TimeoutError(), TIMEOUT),
+    (ValueError("bad"), FATAL),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def _chunk(text: str) -> SimpleNamespace:
+    delta = SimpleNamespace(content=text, reasoning=None)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+
+class _Stream:
+    def __init__(self, texts, error=None):
+        self._texts = texts
+        self._error = error
+        self.closed = False
+
+    def __iter__(self):
+        for text in self._texts:
+            yield _chunk(text)
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("error", [
+    httpx.ReadTimeout("read timed out"),
+    httpx.RemoteProtocolError("peer closed connection"),
+    openai.APIError("overloaded", request=REQUEST, body=None),
+])
+def test_stream_broken_partway_is_retried(error):
+    streams = [_Stream(["안녕", "하세"], error), _Stream(["안녕", "하세요"])]
+
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        return streams[calls.append(kwargs) or len(calls) - 1]
+
+    calls = []
+    client = _fake_client(
+        LLMClient(retry_policy=RetryPolicy(base_delay=0, deadline=0), breaker=CircuitBreaker()),
+        create,
+    )
+
+    assert client.chat("인사해 줘", stream=True) == "안녕하세요"
+    assert len(calls) == 2
+    assert all(s.closed for s in streams)
+
+
+def _fake_client(client: LLMClient, create) -> LLMClient:
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client
+
+
+def test_reserve_gives_up_past_max_wait():
+    limiter = RateLimiter(requests_per_sec=1, burst_requests=1)
+    assert limiter.reserve() == 0
+    assert limiter.reserve(max_wait=0.5) is None  # next slot is ~1s away
+    wait = limiter.reserve(max_wait=5)
+    assert 0.9 < wait <= 1.0  # the refused reservation was not kept
+
+
+def test_rate_limit_wait_counts_against_deadline():
+    limiter = RateLimiter(requests_per_sec=0, tokens_per_min=60)  # 1 token/sec
+    limiter.reserve(60)  # budget exhausted for a minute
+    breaker = CircuitBreaker()
+    client = _fake_client(
+        LLMClient(rate_limiter=limiter, retry_policy=RetryPolicy(deadline=5), breaker=breaker),
+        lambda **kwargs: pytest.fail("request sent"),
+    )
+    with pytest.raises(DeadlineExceededError):
+        client.chat("안녕", max_tokens=10, stream=False)
+
+
+def test_failed_attempt_refunds_tokens():
+    limiter = RateLimiter(requests_per_sec=0, tokens_per_min=6000)
+
+    def create(**kwargs):
+        raise _status_error(400)
+
+    client = _fake_client(
+        LLMClient(rate_limiter=limiter, retry_policy=RetryPolicy(base_delay=0)), create
+    )
+    with pytest.raises(openai.APIStatusError):
+        client.chat("안녕", max_tokens=3000, stream=False)
+    assert limiter.reserve(5990, max_wait=0.1) == 0
+
+
+def test_backoff_honors_retry_after():
+    response = httpx.Response(429, request=REQUEST, headers={"retry-after": "7"})
+    error = openai.RateLimitError("slow down", response=response, body=None)
+    assert RetryPolicy(base_delay=0.1, max_delay=1).backoff(1, error) == 7
+
+
+def test_retry_after_ms_takes_precedence():
+    response = httpx.Response(429, request=REQUEST, headers={"retry-after-ms": "1500", "retry-after": "9"})
+    assert retry_after_seconds(openai.RateLimitError("x", response=response, body=None)) == 1.5
+
+
+def test_transient_errors_retried_until_success():
+    errors = [_status_error(503), httpx.ReadTimeout("slow")]
+
+    def fn(timeout):
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert call_with_retry(fn, RetryPolicy(base_delay=0)) == "ok"
+
+
+def test_fatal_error_is_not_retried():
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        raise _status_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        call_with_retry(fn, RetryPolicy(base_delay=0))
+    assert len(calls) == 1
+
+
+def test_breaker_opens_then_lets_one_trial_through(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+    breaker.record_failure(SERVER)
+    breaker.record_failure(FATAL)  # bad requests do not count
+    breaker.before_call()
+    breaker.record_failure(SERVER)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] += 31
+    breaker.before_call()  # half-open trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one trial at a time
+    breaker.record_success()
+    breaker.before_call()
+
+
+def _half_open_breaker(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+    breaker.record_failure(SERVER)
+    now[0] += 31
+    return breaker
+
+
+def test_cancelled_trial_releases_half_open_breaker(monkeypatch):
+    breaker = _half_open_breaker(monkeypatch)
+    refunds = []
+
+    async def fn(timeout):
+        raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(call_with_retry_async(
+            fn, RetryPolicy(), breaker, throttle=lambda max_wait: 0.0,
+            refund=lambda: refunds.append(1),
+        ))
+    assert refunds == [1]
+    breaker.before_call()  # the next trial is let through
+
+
+def test_trial_past_deadline_releases_half_open_breaker(monkeypatch):
+    breaker = _half_open_breaker(monkeypatch)
+    refunds = []
+    with pytest.raises(DeadlineExceededError):
+        call_with_retry(
+            lambda timeout: pytest.fail("request sent"), RetryPolicy(deadline=-1), breaker,
+            refund=lambda: refunds.append(1),
+        )
+    assert refunds == [1]
+    breaker.before_call()
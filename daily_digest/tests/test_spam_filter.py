@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+import pytest
+
+from src.spam_filter import (
+    AUTHOR_BURST, GREETING_TITLE, LOW_HANGUL, REPETITIVE, TEST_TITLE, TOO_SHORT, URL_HEAVY,
+    ScanFilter, scan_junk_rows, score_post, score_posts, split_junk,
+)
+
+BODY = "오늘은 새로 만든 봇의 메모리 구조를 공유해요. 대화 기록을 요약해서 저장하니 응답 품질이 훨씬 좋아졌어요."
+
+
+@pytest.mark.parametrize("title, content, reasons", [
+    ("테스트", BODY, [TEST_TITLE]),
+    ("[test] 1", BODY, [TEST_TITLE]),
+    ("안녕하세요 새로 온 봇이에요", BODY, [GREETING_TITLE]),
+    ("메모리 구조 공유", "ㅎㅎ", [TOO_SHORT]),
+    ("메모리 구조 공유", "This post is written entirely in English without any Korean text at all.", [LOW_HANGUL]),
+    ("메모리 구조 공유", "도배 " * 200, [REPETITIVE]),
+    ("링크 모음", "https://example.com/a-very-long-link-path https://example.com/another-long-link " + BODY[:45], [URL_HEAVY]),
+    ("메모리 구조 공유", BODY, []),
+])
+def test_score_post_reasons(make_post, title, content, reasons):
+    assert score_post(make_post(title=title, content=content)).reasons == reasons
+
+
+@pytest.mark.parametrize("title, content, is_junk", [
+    ("테스트", BODY, True),
+    ("안녕하세요 새로 온 봇이에요", "잘 부탁드려요! 앞으로 자주 올게요.", True),
+    ("안녕하세요 새로 온 봇이에요", BODY, False),
+    ("메모리 구조 공유", "짧지만 괜찮은 요약 글이에요.", False),
+])
+def test_split_junk_threshold(make_post, title, content, is_junk):
+    kept, dropped = split_junk([make_post(title=title, content=content)])
+    assert (len(dropped), len(kept)) == ((1, 0) if is_junk else (0, 1))
+
+
+def test_content_signals_need_loaded_content(make_post):
+    post = make_post(title="테스트", content="", content_loaded=False)
+    assert score_post(post).reasons == [TEST_TITLE]
+
+
+def test_author_burst(make_post):
+    start = make_post().created_at
+    burst = [
+        make_post(f"b{i}", content=BODY, author_id="flood", created_at=start + timedelta(minutes=5 * i))
+        for i in range(5)
+    ]
+    spread = [
+        make_post(f"s{i}", content=BODY, author_id="calm", created_at=start + timedelta(hours=2 * i))
+        for i in range(5)
+    ]
+    scores = score_posts(burst + spread)
+    assert all(AUTHOR_BURST in s.reasons for s in scores[:5])
+    assert not any(s.reasons for s in scores[5:])
+
+
+def test_split_junk_keeps_engaged_posts(make_post):
+    junk = make_post("junk", title="테스트", content="ㅎ")
+    engaged = make_post("engaged", title="테스트", content="ㅎ", upvotes=8, comment_count=2)
+    good = make_post("good", title="메모리 구조 공유", content=BODY)
+    kept, dropped = split_junk([junk, engaged, good], threshold=1.0)
+    assert [p.id for p in kept] == ["engaged", "good"]
+    assert [(p.id, j.reasons) for p, j in dropped] == [("junk", [TEST_TITLE, TOO_SHORT])]
+
+
+def test_scan_filter_drops_junk_titles_while_streaming(make_post):
+    scan = ScanFilter()
+    posts = [
+        make_post("junk", title="테스트", content="", content_loaded=False),
+        make_post("engaged", title="테스트", upvotes=10),
+        make_post("good", title="메모리 구조 공유", content="", content_loaded=False),
+    ]
+    assert [p.id for p in scan.watch(posts)] == ["engaged", "good"]
+    assert [(p.id, j.reasons) for p, j in scan.dropped] == [("junk", [TEST_TITLE])]
+
+
+def test_scan_filter_bursts_span_the_whole_window(make_post):
+    start = make_post().created_at
+    flood = [
+        make_post(f"b{i}", title="안녕하세요 또 왔어요", author_id="flood",
+                  created_at=start + timedelta(minutes=5 * i))
+        for i in range(5)
+    ]
+    scan = ScanFilter(threshold=0.8)
+    list(scan.watch(flood))
+    # Only one burst post made the top-k cut; the burst is still seen
+    kept, dropped = scan.split(flood[:1])
+    assert kept == []
+    assert dropped[0][1].reasons == [GREETING_TITLE, AUTHOR_BURST]
+
+
+def test_scan_junk_rows():
+    titles = ["테스트", "안녕하세요", "메모리 구조 공유", "테스트"]
+    rows = scan_junk_rows(
+        titles, ["a", "b", "c", "d"], [0.0, 0.0, 0.0, 0.0], [0, 0, 0, 12],
+    )
+    assert {i: j.reasons for i, j in rows.items()} == {0: [TEST_TITLE]}
@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.digest_evaluator import EvaluationResult
+from src.topic_clusters import agglomerate, centroid, tfidf_vectors
+from src.topic_grouper import _named_groups
+
+TEXTS = [
+    "GPT 에이전트 메모리 구조 설계 후기",
+    "에이전트 메모리 구조를 벡터 DB로 바꿨어요",
+    "오늘 봇마당 점심 메뉴 투표 결과",
+    "점심 메뉴 투표 2차 결과 발표",
+    "새 봇 가입 인사드립니다",
+]
+
+
+def test_tfidf_rows_are_normalized():
+    vectors = tfidf_vectors(TEXTS, dim=1 << 10)
+    assert vectors.shape == (5, 1 << 10)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    sims = vectors @ vectors.T
+    assert sims[0, 1] > sims[0, 2]
+    assert sims[2, 3] > sims[2, 4]
+
+
+def test_agglomerate_groups_by_topic():
+    clusters = agglomerate(tfidf_vectors(TEXTS), threshold=0.15)
+    assert clusters == [[0, 1], [2, 3], [4]]
+
+
+def test_agglomerate_threshold_bounds():
+    vectors = tfidf_vectors(TEXTS)
+    assert agglomerate(vectors, threshold=1.1) == [[i] for i in range(5)]
+    assert agglomerate(vectors, threshold=-1.0) == [[0, 1, 2, 3, 4]]
+    assert agglomerate(vectors[:0], threshold=0.5) == []
+
+
+def test_centroid_is_normalized_mean():
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0]])
+    assert np.allclose(centroid(vectors), [2 ** -0.5, 2 ** -0.5])
+
+
+def test_named_groups_falls_back_to_local_names(make_post):
+    clusters = [
+        [EvaluationResult(make_post("a", title="메모리 구조"), True, "", 7)],
+        [EvaluationResult(make_post("b", title="점심 메뉴"), True, "", 4)],
+    ]
+    response = {"groups": [
+        {"group": 2, "name": "🍚 점심 투표", "importance": "x"},
+        {"group": 9, "name": "없는 그룹"},
+        "noise",
+    ]}
+    groups = _named_groups(response, clusters)
+    assert [g.name for g in groups] == ["📝 메모리 구조", "🍚 점심 투표"]
+    assert [g.importance for g in groups] == [7, 4]